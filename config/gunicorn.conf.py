@@ -0,0 +1,37 @@
+"""Запуск: gunicorn -c config/gunicorn.conf.py
+
+GUNICORN_WORKER_CLASS=gthread (по умолчанию, WSGI) или uvicorn (ASGI, config.asgi).
+Число воркеров и потоков считается от числа CPU и переопределяется
+переменными GUNICORN_WORKERS и GUNICORN_THREADS. При постоянных соединениях
+к БД каждый поток держит соединение: workers * threads не должно превышать
+max_connections PostgreSQL (или пула pgbouncer).
+"""
+
+import multiprocessing
+import os
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings_production")
+
+cpus = multiprocessing.cpu_count()
+
+bind = os.getenv("GUNICORN_BIND") or "0.0.0.0:8000"
+
+if (os.getenv("GUNICORN_WORKER_CLASS") or "gthread") == "uvicorn":
+    # цикл событий обслуживает конкурентные запросы, воркер на каждый CPU
+    wsgi_app = "config.asgi:application"
+    worker_class = "uvicorn.workers.UvicornWorker"
+    workers = int(os.getenv("GUNICORN_WORKERS") or cpus)
+    threads = 1
+else:
+    wsgi_app = "config.wsgi:application"
+    worker_class = "gthread"
+    workers = int(os.getenv("GUNICORN_WORKERS") or 2 * cpus + 1)
+    # потоки ждут ответов БД, но держат по соединению
+    threads = int(os.getenv("GUNICORN_THREADS") or max(2, min(cpus, 4)))
+
+# перезапуск воркеров ограничивает рост памяти, разброс - чтобы не все сразу
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS") or 1000)
+max_requests_jitter = max_requests // 10
+timeout = int(os.getenv("GUNICORN_TIMEOUT") or 30)
+keepalive = 5
+accesslog = "-"
@@ -22,7 +22,9 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
+    "django_filters",
     "rest_framework.authtoken",
     "rest_framework_simplejwt",
     "django_celery_beat",
@@ -34,7 +36,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "ttracker.instrumentation.QueryMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "ttracker.compression.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -43,6 +47,9 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# JSON через orjson (ttracker.renderers), TTRACKER_ORJSON=false - стандартный json DRF
+TTRACKER_ORJSON = os.getenv("TTRACKER_ORJSON", "true").lower() in ("1", "true")
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework_simplejwt.authentication.JWTAuthentication",
@@ -50,8 +57,23 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "ttracker.renderers.ORJSONRenderer" if TTRACKER_ORJSON else "rest_framework.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "ttracker.renderers.ORJSONParser" if TTRACKER_ORJSON else "rest_framework.parsers.JSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
 }
 
+# Сжатие ответов gzip/zstd (zstd - при установленном пакете zstandard):
+# TTRACKER_COMPRESSION=true - для всех ответов, иначе только для представлений
+# с CompressedResponseMixin. Ответы меньше TTRACKER_COMPRESSION_MIN_SIZE байт не сжимаются
+TTRACKER_COMPRESSION = os.getenv("TTRACKER_COMPRESSION", "").lower() in ("1", "true")
+TTRACKER_COMPRESSION_MIN_SIZE = int(os.getenv("TTRACKER_COMPRESSION_MIN_SIZE") or 1024)
+
 ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
@@ -81,6 +103,12 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD"),
         "HOST": os.getenv("POSTGRES_HOST"),
         "PORT": os.getenv("POSTGRES_PORT"),
+        # Время жизни соединения в секундах (0 - новое соединение на каждый запрос),
+        # перед повторным использованием соединение проверяется
+        "CONN_MAX_AGE": int(os.getenv("POSTGRES_CONN_MAX_AGE") or 0),
+        "CONN_HEALTH_CHECKS": True,
+        # pgbouncer в режиме transaction не поддерживает серверные курсоры (iterator)
+        "DISABLE_SERVER_SIDE_CURSORS": os.getenv("POSTGRES_PGBOUNCER", "").lower() in ("1", "true"),
     }
 }
 
@@ -124,6 +152,71 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
 }
 
+REDIS_URL = os.getenv("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    # Локальный кеш процесса для разработки и тестов
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+TTRACKER_CACHE_TIMEOUT = int(os.getenv("TTRACKER_CACHE_TIMEOUT") or 300)
+
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL") or REDIS_URL or "memory://"
+CELERY_TASK_IGNORE_RESULT = True
+# Задачи выполняются сразу в процессе, без брокера и воркера (разработка и тесты)
+CELERY_TASK_ALWAYS_EAGER = os.getenv("CELERY_TASK_ALWAYS_EAGER", "").lower() in ("1", "true")
+CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
+
+# Периодический пересчет предложенных исполнителей важных задач (секунды)
+TTRACKER_SUGGESTIONS_INTERVAL = int(os.getenv("TTRACKER_SUGGESTIONS_INTERVAL") or 300)
+# Задержка пересчета после изменения задач и сотрудников, изменения за это время объединяются
+TTRACKER_SUGGESTIONS_DELAY = int(os.getenv("TTRACKER_SUGGESTIONS_DELAY") or 10)
+
+# Периодическое сжатие журнала изменений задач для дельта-синхронизации (секунды)
+TTRACKER_CHANGES_COMPACT_INTERVAL = int(os.getenv("TTRACKER_CHANGES_COMPACT_INTERVAL") or 3600)
+
+CELERY_BEAT_SCHEDULE = {
+    "compute-assignment-suggestions": {
+        "task": "ttracker.tasks.compute_assignment_suggestions",
+        "schedule": TTRACKER_SUGGESTIONS_INTERVAL,
+    },
+    "compact-task-changes": {
+        "task": "ttracker.tasks.compact_task_changes",
+        "schedule": TTRACKER_CHANGES_COMPACT_INTERVAL,
+    },
+}
+
+# Превышение query_budget представлением: "log" - предупреждение в лог, "raise" - исключение
+TTRACKER_QUERY_BUDGET_ACTION = os.getenv("TTRACKER_QUERY_BUDGET_ACTION") or "log"
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {
+            "class": "logging.StreamHandler",
+        },
+    },
+    "loggers": {
+        # метрики запросов (INFO) и превышения бюджета запросов (WARNING)
+        "ttracker.performance": {
+            "handlers": ["console"],
+            "level": os.getenv("TTRACKER_PERFORMANCE_LOG_LEVEL") or "WARNING",
+            "propagate": False,
+        },
+    },
+}
+
 SWAGGER_SETTINGS = {
    'SECURITY_DEFINITIONS': {
       'Basic': {
@@ -0,0 +1,40 @@
+"""Профиль настроек для запуска через gunicorn (config/gunicorn.conf.py).
+
+DJANGO_SETTINGS_MODULE=config.settings_production
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from config.settings import *  # noqa: F401,F403
+from config.settings import BASE_DIR, DATABASES, MIDDLEWARE, REDIS_URL
+
+# Кеш ответов, валидаторы условного GET и журнал изменений графа задач сбрасываются
+# версиями в кеше, и версии должны быть общими для всех воркеров. С локальным кешем
+# процесса (без REDIS_URL) остальные воркеры отдавали бы устаревшие ответы
+if not REDIS_URL:
+    raise ImproperlyConfigured("REDIS_URL is required in production: response caching needs a shared cache.")
+
+DEBUG = os.getenv("DEBUG", "").lower() in ("1", "true")
+
+# Имена хостов через запятую; без переменной список пуст и Django отклоняет все запросы
+ALLOWED_HOSTS = [host.strip() for host in os.getenv("ALLOWED_HOSTS", "").split(",") if host.strip()]
+
+# Статика админки и swagger отдается приложением через WhiteNoise из STATIC_ROOT
+# (заполняется командой python manage.py collectstatic --noinput)
+STATIC_ROOT = BASE_DIR / "staticfiles"
+MIDDLEWARE = [
+    *MIDDLEWARE[:MIDDLEWARE.index("django.middleware.security.SecurityMiddleware") + 1],
+    "whitenoise.middleware.WhiteNoiseMiddleware",
+    *MIDDLEWARE[MIDDLEWARE.index("django.middleware.security.SecurityMiddleware") + 1:],
+]
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"},
+}
+
+# Постоянные соединения: воркер gunicorn (поток gthread) держит одно соединение
+# и не тратит время на его установку в каждом запросе. Под ASGI каждый запрос
+# выполняется в новом потоке и соединения не переиспользуются - используйте pgbouncer
+DATABASES["default"]["CONN_MAX_AGE"] = int(os.getenv("POSTGRES_CONN_MAX_AGE") or 600)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from ttracker.models import Employee, Task
+from ttracker.models import AssignmentSuggestion, Employee, Task
 
 
 @admin.register(Employee)
@@ -10,6 +10,7 @@ class EmployeeAdmin(admin.ModelAdmin):
         "name",
         "position",
         "vacation_status",
+        "active_task_count",
         "email",
         "phone_number",
     )
@@ -28,4 +29,16 @@ class TaskAdmin(admin.ModelAdmin):
         "status",
         "description",
         "owner",
-    )
\ No newline at end of file
+    )
+
+@admin.register(AssignmentSuggestion)
+class AssignmentSuggestionAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "strategy",
+        "position",
+        "task",
+        "employee",
+        "computed_at",
+    )
+    list_filter = ("strategy",)
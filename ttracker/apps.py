@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TtrackerConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "ttracker"
+
+    def ready(self):
+        import ttracker.signals  # noqa: F401
@@ -0,0 +1,214 @@
+import heapq
+from datetime import date
+
+import numpy as np
+
+from ttracker.models import Employee
+
+
+class LoadBalancer:
+    """Распределение задач между сотрудниками по степени занятости.
+
+    Счетчики задач в исполнении всех сотрудников загружаются одним
+    запросом, дальше распределение идет по min-куче в памяти
+    без обращений к БД.
+    """
+
+    # Допустимый перевес нагрузки исполнителя родительской задачи
+    # относительно наименее загруженного сотрудника
+    PARENT_EXECUTOR_SLACK = 2
+
+    def __init__(self, employees):
+        self.employees = {employee.pk: employee for employee in employees}
+        self.loads = {employee.pk: employee.active_task_count for employee in employees}
+        self._heap = [
+            (employee.active_task_count, employee.pk)
+            for employee in employees
+            if not employee.vacation_status
+        ]
+        heapq.heapify(self._heap)
+
+    @classmethod
+    def from_db(cls):
+        """Загружает сотрудников со счетчиками задач в исполнении одним запросом"""
+        employees = Employee.objects.only('name', 'vacation_status', 'active_task_count')
+        return cls(list(employees))
+
+    @property
+    def has_available(self):
+        return bool(self._heap)
+
+    def least_loaded(self):
+        """Наименее загруженный сотрудник, не находящийся в отпуске"""
+        # Записи с устаревшей нагрузкой удаляются лениво
+        while self._heap:
+            load, pk = self._heap[0]
+            if load == self.loads[pk]:
+                return self.employees[pk]
+            heapq.heappop(self._heap)
+        return None
+
+    def add_load(self, employee, weight=1):
+        """Учитывает назначенную сотруднику задачу"""
+        self.loads[employee.pk] += weight
+        if not employee.vacation_status:
+            heapq.heappush(self._heap, (self.loads[employee.pk], employee.pk))
+
+    def pick_employee(self, task):
+        """Исполнитель родительской задачи, если он не перегружен,
+        иначе наименее загруженный сотрудник"""
+        least_loaded = self.least_loaded()
+        parent_task = task.parental_task
+        if parent_task and parent_task.executor_id in self.employees:
+            parent_executor = self.employees[parent_task.executor_id]
+            limit = self.loads[least_loaded.pk] + self.PARENT_EXECUTOR_SLACK
+            if self.loads[parent_executor.pk] <= limit:
+                return parent_executor
+        return least_loaded
+
+    def assign(self, tasks):
+        """Возвращает список пар (задача, сотрудник)"""
+        task_employee_mapping = []
+        for task in tasks:
+            employee = self.pick_employee(task)
+            self.add_load(employee)
+            task_employee_mapping.append((task, employee))
+        return task_employee_mapping
+
+
+def urgency(task, today=None, horizon=14):
+    """Вес задачи по сроку: 1 для задач со сроком дальше horizon дней,
+    до 2 для задач со сроком сегодня или просроченных"""
+    days_left = (task.deadline - (today or date.today())).days
+    return 1 + min(max(horizon - days_left, 0), horizon) / horizon
+
+
+class DeadlineBalancer(LoadBalancer):
+    """Задачи распределяются в порядке срочности, срочная задача
+    увеличивает нагрузку исполнителя сильнее обычной"""
+
+    def assign(self, tasks):
+        weights = {id(task): urgency(task) for task in tasks}
+        assigned = {}
+        for task in sorted(tasks, key=lambda task: (task.deadline, task.pk)):
+            employee = self.pick_employee(task)
+            self.add_load(employee, weights[id(task)])
+            assigned[id(task)] = employee
+        return [(task, assigned[id(task)]) for task in tasks]
+
+
+def linear_sum_assignment(cost):
+    """Назначение минимальной стоимости (венгерский алгоритм с кратчайшими
+    увеличивающими путями) для матрицы строк не больше, чем столбцов.
+
+    Возвращает номер столбца для каждой строки. Внутренний цикл по столбцам
+    векторизован, время O(n^2 * m) в худшем случае.
+    """
+    rows, columns = cost.shape
+    u = np.zeros(rows + 1)
+    v = np.zeros(columns + 1)
+    # row_of[j] - строка (с 1), назначенная столбцу j; 0 - столбец свободен
+    row_of = np.zeros(columns + 1, dtype=np.int64)
+    way = np.zeros(columns + 1, dtype=np.int64)
+    for row in range(1, rows + 1):
+        row_of[0] = row
+        column = 0
+        min_reduced = np.full(columns + 1, np.inf)
+        used = np.zeros(columns + 1, dtype=bool)
+        while True:
+            used[column] = True
+            current_row = row_of[column]
+            reduced = cost[current_row - 1] - u[current_row] - v[1:]
+            free = ~used[1:]
+            improve = free & (reduced < min_reduced[1:])
+            min_reduced[1:][improve] = reduced[improve]
+            way[1:][improve] = column
+            candidates = np.where(free, min_reduced[1:], np.inf)
+            delta = candidates.min()
+            ties = candidates == delta
+            # при равенстве свободный столбец сразу завершает увеличивающий путь
+            unassigned = ties & (row_of[1:] == 0)
+            next_column = int(np.argmax(unassigned if unassigned.any() else ties)) + 1
+            u[row_of[used]] += delta
+            v[used] -= delta
+            min_reduced[~used] -= delta
+            column = next_column
+            if row_of[column] == 0:
+                break
+        while column:
+            previous = way[column]
+            row_of[column] = row_of[previous]
+            column = previous
+    assignment = np.empty(rows, dtype=np.int64)
+    assigned_columns = np.nonzero(row_of[1:])[0]
+    assignment[row_of[assigned_columns + 1] - 1] = assigned_columns
+    return assignment
+
+
+class MinCostBalancer(LoadBalancer):
+    """Распределение минимальной суммарной стоимости.
+
+    Стоимость назначения задачи на k-е новое место сотрудника -
+    срочность задачи, умноженная на его нагрузку с учетом уже назначенных
+    (load + k), за вычетом PARENT_EXECUTOR_SLACK для исполнителя родительской
+    задачи. Задачи решаются блоками по CHUNK_SIZE в порядке срочности.
+    Для блока достаточно CHUNK_SIZE самых дешевых мест и мест исполнителей
+    родительских задач, поэтому матрица стоимости не зависит от числа сотрудников.
+    """
+
+    CHUNK_SIZE = 128
+
+    def assign(self, tasks):
+        available = [pk for pk, employee in self.employees.items() if not employee.vacation_status]
+        if not available:
+            return [(task, None) for task in tasks]
+        position = {pk: index for index, pk in enumerate(available)}
+        employees = np.array(available, dtype=np.int64)
+        loads = np.array([self.loads[pk] for pk in available], dtype=float)
+
+        ordered = sorted(tasks, key=lambda task: (task.deadline, task.pk))
+        assigned = {}
+        for start in range(0, len(ordered), self.CHUNK_SIZE):
+            chunk = ordered[start:start + self.CHUNK_SIZE]
+            weights = np.array([urgency(task) for task in chunk])
+            parents = np.array([
+                position.get(task.parental_task.executor_id, -1) if task.parental_task else -1
+                for task in chunk
+            ], dtype=np.int64)
+
+            slot_employees, slot_loads = self.candidate_slots(loads, parents, len(chunk))
+            affinity = slot_employees[None, :] == parents[:, None]
+            cost = weights[:, None] * (slot_loads[None, :] - self.PARENT_EXECUTOR_SLACK * affinity)
+            chosen = slot_employees[linear_sum_assignment(cost)]
+
+            np.add.at(loads, chosen, 1)
+            for task, index in zip(chunk, chosen):
+                assigned[id(task)] = self.employees[int(employees[index])]
+
+        for pk, load in zip(available, loads):
+            self.loads[pk] = load
+        return [(task, assigned[id(task)]) for task in tasks]
+
+    @staticmethod
+    def candidate_slots(loads, parents, size):
+        """Места (сотрудник, нагрузка) для блока из size задач: size самых
+        дешевых мест и места исполнителей родительских задач"""
+        count = len(loads)
+        depth = np.arange(size)
+        slot_loads = (loads[:, None] + depth[None, :]).ravel()
+        slot_employees = np.repeat(np.arange(count), size)
+        selected = np.zeros(len(slot_loads), dtype=bool)
+        cheapest = min(size, len(slot_loads))
+        selected[np.argpartition(slot_loads, cheapest - 1)[:cheapest]] = True
+        # исполнителю родительских задач нужно по месту на каждую такую задачу
+        executors, demand = np.unique(parents[parents >= 0], return_counts=True)
+        for employee, needed in zip(executors, demand):
+            selected[employee * size:employee * size + needed] = True
+        return slot_employees[selected], slot_loads[selected]
+
+
+STRATEGIES = {
+    "greedy": LoadBalancer,
+    "deadline": DeadlineBalancer,
+    "optimal": MinCostBalancer,
+}
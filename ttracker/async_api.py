@@ -0,0 +1,90 @@
+from inspect import isawaitable
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from rest_framework.response import Response
+
+from ttracker.cache import CachedResponseMixin
+from ttracker.conditional import ConditionalResponseMixin
+
+
+class AsyncAPIViewMixin:
+    """Асинхронный dispatch для представлений DRF.
+
+    DRF не поддерживает корутины в обработчиках, поэтому dispatch повторяет
+    APIView.dispatch: аутентификация, проверка прав и троттлинг (initial)
+    обращаются к БД синхронно и выполняются через sync_to_async, обработчик
+    get - корутина с асинхронными запросами ORM. Под ASGI-сервером ожидание
+    БД и медленных клиентов не занимает поток воркера.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if isawaitable(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def get(self, request, *args, **kwargs):
+        """Условный ответ и кеш, как в ConditionalGetMixin и CachedResponseMixin, иначе handle_get"""
+        conditional = isinstance(self, ConditionalResponseMixin)
+        if conditional:
+            response = await sync_to_async(self.conditional_response)(request)
+            if response is not None:
+                return response
+        if isinstance(self, CachedResponseMixin):
+            key, response = await sync_to_async(self.get_cached_response)(request)
+            if response is None:
+                response = await self.handle_get(request, *args, **kwargs)
+                response = await sync_to_async(self.cache_response)(key, response)
+        else:
+            response = await self.handle_get(request, *args, **kwargs)
+        return self.set_validators(response) if conditional else response
+
+
+class AsyncListMixin(AsyncAPIViewMixin):
+    """Асинхронный ListAPIView: пагинатор должен реализовать apaginate_queryset"""
+
+    async def handle_get(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.paginator is None:
+            objects = [obj async for obj in queryset.aiterator()]
+            return Response(self.get_serializer(objects, many=True).data)
+        page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class AsyncRetrieveMixin(AsyncAPIViewMixin):
+    """Асинхронный RetrieveAPIView"""
+
+    async def aget_object(self):
+        """Как GenericAPIView.get_object, объект загружается через aget"""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def handle_get(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        return Response(self.get_serializer(instance).data)
@@ -0,0 +1,672 @@
+import asyncio
+import itertools
+import json
+import math
+import platform
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Callable, Optional
+
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.db.models import Q
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ttracker import compression, exporters
+from ttracker.assignment import STRATEGIES
+from ttracker.generators import DataGenerator
+from ttracker.renderers import ORJSONRenderer
+from ttracker.search import search_employees, search_tasks
+from ttracker.serializer import EmployeeSerializer, EmployeeValuesSerializer, TaskListSerializer, TaskValuesSerializer
+from ttracker.models import Employee, Task
+from users.models import User
+
+BENCHMARK_EMAIL = "benchmark@example.com"
+BENCHMARK_PASSWORD = "benchmark"
+# Отклонения меньше этого порога считаются шумом измерений
+NOISE_FLOOR_MS = 2.0
+
+
+def percentile(values, q):
+    """Перцентиль методом ближайшего ранга"""
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(durations, queries=None):
+    """Сводка измерений в миллисекундах"""
+    durations_ms = [duration * 1000 for duration in durations]
+    summary = {
+        "p50_ms": round(percentile(durations_ms, 50), 3),
+        "p95_ms": round(percentile(durations_ms, 95), 3),
+        "p99_ms": round(percentile(durations_ms, 99), 3),
+        "mean_ms": round(statistics.fmean(durations_ms), 3),
+    }
+    if queries is not None:
+        summary["queries"] = max(queries)
+    return summary
+
+
+@dataclass
+class Route:
+    """Маршрут для замера: запрос строится заново перед каждым повтором"""
+    name: str
+    method: str
+    url: Callable[["BenchmarkContext"], str]
+    data: Optional[Callable[["BenchmarkContext"], object]] = None
+    authenticated: bool = True
+    status: tuple = (200,)
+
+
+@dataclass
+class BenchmarkContext:
+    user: User
+    task: Task
+    employee: Employee
+    leaf: Optional[Task] = None
+    refresh_token: str = ""
+    counter: int = 0
+
+    def next_id(self):
+        self.counter += 1
+        return self.counter
+
+    def new_task(self):
+        return Task.objects.create(title=f"Бенчмарк удаление {self.next_id()}", deadline="2024-09-30").pk
+
+
+def _task_url(name):
+    return lambda ctx: reverse(name, args=(ctx.task.pk,))
+
+
+ROUTES = [
+    Route("employee-list", "get", lambda ctx: reverse("ttracker:employee-list")),
+    Route("employee-detail", "get", lambda ctx: reverse("ttracker:employee-detail", args=(ctx.employee.pk,))),
+    Route("employee-active-tasks", "get", lambda ctx: reverse("ttracker:employee-active-tasks")),
+    Route("task-list", "get", lambda ctx: reverse("ttracker:task-list")),
+    Route("task-list-deep-page", "get", lambda ctx: reverse("ttracker:task-list") + "?page=last"),
+    Route("task-list-cursor", "get", lambda ctx: reverse("ttracker:task-list") + "?pagination=cursor"),
+    Route("task-list-filtered", "get",
+          lambda ctx: reverse("ttracker:task-list") + "?status=in_progress&has_parent=true&ordering=-deadline"),
+    Route("task-list-fields", "get",
+          lambda ctx: reverse("ttracker:task-list") + "?pagination=cursor&page_size=100&fields=id,title,deadline"),
+    Route("task-list-full-page", "get", lambda ctx: reverse("ttracker:task-list") + "?pagination=cursor&page_size=100"),
+    Route("task-detail", "get", _task_url("ttracker:task-detail")),
+    Route("task-subtree", "get", _task_url("ttracker:task-subtree")),
+    Route("task-ancestors", "get", lambda ctx: reverse("ttracker:task-ancestors", args=(ctx.leaf.pk,))),
+    Route("task-analysis", "get", lambda ctx: reverse("ttracker:task-analysis")),
+    Route("important-tasks", "get", lambda ctx: reverse("ttracker:important-tasks"), status=(200, 404)),
+    Route("important-tasks-deadline", "get", lambda ctx: reverse("ttracker:important-tasks") + "?strategy=deadline",
+          status=(200, 404)),
+    Route("important-tasks-optimal", "get", lambda ctx: reverse("ttracker:important-tasks") + "?strategy=optimal",
+          status=(200, 404)),
+    Route("search-tasks", "get", lambda ctx: reverse("ttracker:search") + "?q=схемы"),
+    Route("search-employees", "get", lambda ctx: reverse("ttracker:search") + "?type=employees&q=Иванов"),
+    Route("export-tasks", "get", lambda ctx: reverse("ttracker:export", args=("tasks",))),
+    Route("task-create", "post", lambda ctx: reverse("ttracker:task-create"),
+          data=lambda ctx: {"title": f"Бенчмарк {ctx.next_id()}", "deadline": "2024-09-30"}, status=(201,)),
+    Route("task-update", "patch", _task_url("ttracker:task-update"),
+          data=lambda ctx: {"title": f"Бенчмарк обновление {ctx.next_id()}"}),
+    Route("task-delete", "delete", lambda ctx: reverse("ttracker:task-delete", args=(ctx.new_task(),)),
+          status=(204,)),
+    Route("task-bulk-create", "post", lambda ctx: reverse("ttracker:task-bulk"),
+          data=lambda ctx: [{"title": f"Бенчмарк пакет {ctx.next_id()}", "deadline": "2024-09-30"}
+                            for _ in range(100)], status=(201,)),
+    Route("user-list", "get", lambda ctx: reverse("users:user-list")),
+    Route("user-detail", "get", lambda ctx: reverse("users:user-detail", args=(ctx.user.pk,))),
+    Route("token-obtain", "post", lambda ctx: reverse("users:token_obtain_pair"),
+          data=lambda ctx: {"email": BENCHMARK_EMAIL, "password": BENCHMARK_PASSWORD}, authenticated=False),
+    Route("token-refresh", "post", lambda ctx: reverse("users:token_refresh"),
+          data=lambda ctx: {"refresh": ctx.refresh_token}, authenticated=False),
+]
+
+
+# Пары маршрутов для замера конкурентности: синхронный (WSGI) и асинхронный (ASGI) вариант
+CONCURRENCY_ROUTES = [
+    ("task-list", lambda ctx: reverse("ttracker:task-list"), lambda ctx: reverse("ttracker:async-task-list")),
+    ("task-detail", _task_url("ttracker:task-detail"), _task_url("ttracker:async-task-detail")),
+    ("employee-active-tasks", lambda ctx: reverse("ttracker:employee-active-tasks"),
+     lambda ctx: reverse("ttracker:async-employee-active-tasks")),
+]
+
+
+def seed(tasks, seed=0, workers=1):
+    """Дополняет БД сгенерированными данными до указанного числа задач"""
+    missing = tasks - Task.objects.count()
+    if missing > 0:
+        employees = max(tasks // 100, 10) - Employee.objects.count()
+        DataGenerator(employees=max(employees, 0), tasks=missing, seed=seed, workers=workers).insert()
+
+
+def make_context():
+    user = User.objects.filter(email=BENCHMARK_EMAIL).first()
+    if user is None:
+        user = User(email=BENCHMARK_EMAIL, is_active=True)
+        user.set_password(BENCHMARK_PASSWORD)
+        user.save()
+    refresh = APIClient().post(
+        reverse("users:token_obtain_pair"),
+        {"email": BENCHMARK_EMAIL, "password": BENCHMARK_PASSWORD},
+    ).json()["refresh"]
+    return BenchmarkContext(
+        user=user,
+        task=Task.objects.order_by("pk").first(),
+        employee=Employee.objects.order_by("pk").first(),
+        leaf=Task.objects.order_by("-pk").first(),
+        refresh_token=refresh,
+    )
+
+
+def _consume(response):
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+
+
+def measure_route(route, ctx, repeat=20, use_cache=False):
+    """Задержка и число запросов к БД для одного маршрута"""
+    client = APIClient()
+    if route.authenticated:
+        client.force_authenticate(user=ctx.user)
+    durations, queries = [], []
+    # первый запрос прогревает импорты и кеши приложения и не учитывается
+    for iteration in range(repeat + 1):
+        url = route.url(ctx)
+        data = route.data(ctx) if route.data else None
+        if not use_cache:
+            cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = getattr(client, route.method)(url, data, format="json")
+            _consume(response)
+            elapsed = time.perf_counter() - started
+        if response.status_code not in route.status:
+            raise AssertionError(f"{route.name}: unexpected status {response.status_code}")
+        if iteration:
+            durations.append(elapsed)
+            queries.append(len(captured))
+    return summarize(durations, queries)
+
+
+def measure_assignment(tasks=3000, employees=300, repeat=5, seed=0):
+    """Время стратегий распределения задач на данных в памяти, без БД"""
+    rng = random.Random(seed)
+    staff = [
+        Employee(pk=pk, name=f"Сотрудник {pk}", vacation_status=rng.random() < 0.1,
+                 active_task_count=rng.randint(0, 20))
+        for pk in range(1, employees + 1)
+    ]
+    batch = [
+        Task(pk=pk, deadline=date.today() + timedelta(days=rng.randint(-5, 60)),
+             parental_task=Task(executor_id=rng.randint(1, employees)) if rng.random() < 0.7 else None)
+        for pk in range(1, tasks + 1)
+    ]
+    results = {}
+    for name, balancer_class in STRATEGIES.items():
+        durations = []
+        for _ in range(repeat):
+            balancer = balancer_class(staff)
+            started = time.perf_counter()
+            balancer.assign(batch)
+            durations.append(time.perf_counter() - started)
+        loads = [balancer.loads[employee.pk] for employee in staff if not employee.vacation_status]
+        results[name] = dict(summarize(durations), load_spread=round(max(loads) - min(loads), 3))
+    return results
+
+
+# Запросы поиска: (сущность, строка, вариант через ILIKE, вариант через индекс поиска)
+SEARCH_CASES = [
+    ("tasks", "вычислителя",
+     lambda q: Task.objects.filter(Q(title__icontains=q) | Q(description__icontains=q)).order_by("id"),
+     search_tasks),
+    ("tasks", "печатной платы",
+     lambda q: Task.objects.filter(Q(title__icontains=q) | Q(description__icontains=q)).order_by("id"),
+     search_tasks),
+    ("employees", "Кузнецов",
+     lambda q: Employee.objects.filter(name__icontains=q).order_by("id"), search_employees),
+]
+
+
+def measure_search(repeat=20, page_size=20):
+    """Поиск через ILIKE '%q%' (как SearchFilter) и через индекс поиска:
+    подсчет и первая страница, как у /ttracker/search/"""
+    results = {}
+    for entity, query, ilike, indexed in SEARCH_CASES:
+        for path, build in (("ilike", ilike), ("search", indexed)):
+            durations, found = [], 0
+            for iteration in range(repeat + 1):
+                started = time.perf_counter()
+                queryset = build(query)
+                found = queryset.count()
+                list(queryset[:page_size])
+                if iteration:
+                    durations.append(time.perf_counter() - started)
+            results[f"{entity} '{query}' {path}"] = dict(summarize(durations), found=found)
+    return results
+
+
+# Сериализаторы для сравнения: (имя, сериализатор экземпляров, сериализатор строк values())
+SERIALIZER_CASES = [
+    ("tasks", TaskListSerializer, TaskValuesSerializer),
+    ("employees", EmployeeSerializer, EmployeeValuesSerializer),
+]
+
+
+def measure_serializers(rows=2000, repeat=10):
+    """Пропускная способность вывода списков: ModelSerializer по экземплярам
+    моделей и ValuesSerializerMixin по строкам values(). Время включает
+    чтение из БД и рендеринг JSON, отдельно - только сериализацию.
+    Ответы обоих путей должны совпадать побайтно"""
+    renderer = JSONRenderer()
+    results = {}
+    for name, model_serializer, values_serializer in SERIALIZER_CASES:
+        queryset = model_serializer.Meta.model.objects.order_by("pk")
+        paths = {
+            "model": (lambda: list(queryset[:rows]), model_serializer),
+            "values": (lambda: list(values_serializer.values_queryset(queryset)[:rows]), values_serializer),
+        }
+        content = {}
+        for path, (load, serializer_class) in paths.items():
+            totals, serialization = [], []
+            for iteration in range(repeat + 1):
+                started = time.perf_counter()
+                objects = load()
+                loaded = time.perf_counter()
+                data = serializer_class(objects, many=True).data
+                serialized = time.perf_counter()
+                content[path] = renderer.render(data)
+                if iteration:
+                    totals.append(time.perf_counter() - started)
+                    serialization.append(serialized - loaded)
+            count = len(objects)
+            results[f"{name} {path}"] = dict(
+                summarize(totals),
+                rows=count,
+                rows_per_s=round(count / statistics.fmean(totals)),
+                serialize_rows_per_s=round(count / statistics.fmean(serialization)),
+            )
+        if content["model"] != content["values"]:
+            raise AssertionError(f"{name}: values() output differs from {model_serializer.__name__}")
+        model, values = results[f"{name} model"], results[f"{name} values"]
+        values["speedup"] = round(values["rows_per_s"] / model["rows_per_s"], 2)
+        values["serialize_speedup"] = round(values["serialize_rows_per_s"] / model["serialize_rows_per_s"], 2)
+    return results
+
+
+def _stdlib_ndjson(rows, batch_size=100):
+    """Выгрузка NDJSON через стандартный json (как до перехода на orjson)"""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row, ensure_ascii=False))
+        if len(lines) >= batch_size:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def measure_rendering(rows=2000, repeat=10):
+    """Рендеринг страницы списка задач (JSONRenderer DRF и ORJSONRenderer)
+    и выгрузки задач в NDJSON (json и orjson): время, размер ответа без сжатия
+    и со сжатием gzip (и zstd при установленном zstandard). Ответы рендереров
+    должны совпадать побайтно"""
+    page = TaskValuesSerializer(list(TaskValuesSerializer.values_queryset(Task.objects.order_by("pk"))[:rows]),
+                                many=True).data
+    export = list(itertools.islice(exporters.export_rows("tasks"), rows))
+    cases = {
+        "task-list json": lambda: JSONRenderer().render(page),
+        "task-list orjson": lambda: ORJSONRenderer().render(page),
+        "export json": lambda: "".join(_stdlib_ndjson(export)).encode("utf-8"),
+        "export orjson": lambda: "".join(exporters.render_ndjson(export)).encode("utf-8"),
+    }
+    encodings = ["gzip"] + (["zstd"] if compression.zstandard is not None else [])
+    results = {}
+    for name, render in cases.items():
+        durations = []
+        for iteration in range(repeat + 1):
+            started = time.perf_counter()
+            content = render()
+            if iteration:
+                durations.append(time.perf_counter() - started)
+        results[name] = dict(summarize(durations), rows=len(page), bytes=len(content))
+        for encoding in encodings:
+            started = time.perf_counter()
+            compressed = compression.compress(content, encoding)
+            results[name][f"{encoding}_bytes"] = len(compressed)
+            results[name][f"{encoding}_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    if JSONRenderer().render(page) != ORJSONRenderer().render(page):
+        raise AssertionError("ORJSONRenderer output differs from JSONRenderer")
+    for name in ("task-list", "export"):
+        stdlib, fast = results[f"{name} json"], results[f"{name} orjson"]
+        fast["speedup"] = round(stdlib["mean_ms"] / fast["mean_ms"], 2)
+        fast["gzip_ratio"] = round(fast["bytes"] / fast["gzip_bytes"], 2)
+    return results
+
+
+def _concurrency_summary(durations, statuses, elapsed):
+    return dict(
+        summarize(durations),
+        rps=round(len(durations) / elapsed, 1),
+        errors=sum(1 for code in statuses if code != 200),
+    )
+
+
+def _measure_wsgi(path, token, clients, requests, threads, client_delay):
+    """Синхронный вариант: WSGIHandler в пуле из threads потоков (как воркер gunicorn --threads).
+    Поток занят, пока медленный клиент читает ответ"""
+    handler = WSGIHandler()
+    factory = RequestFactory()
+    slots = threading.Semaphore(clients)
+    durations, statuses = [], []
+
+    def call(number, submitted):
+        try:
+            environ = factory._base_environ(
+                PATH_INFO=path, QUERY_STRING=f"_={number}", HTTP_AUTHORIZATION=f"Bearer {token}"
+            )
+            status_line = []
+            body = handler(environ, lambda status, headers, exc_info=None: status_line.append(status))
+            for _ in body:
+                pass
+            body.close()
+            time.sleep(client_delay)
+            durations.append(time.perf_counter() - submitted)
+            statuses.append(int(status_line[0].split()[0]))
+        finally:
+            slots.release()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for number in range(requests):
+            slots.acquire()
+            pool.submit(call, number, time.perf_counter())
+    return _concurrency_summary(durations, statuses, time.perf_counter() - started)
+
+
+def _measure_asgi(path, token, clients, requests, client_delay):
+    """Асинхронный вариант: ASGIHandler в одном цикле событий.
+    Медленный клиент читает ответ, не занимая поток"""
+    handler = ASGIHandler()
+    durations, statuses = [], []
+
+    async def call(number, slots):
+        async with slots:
+            submitted = time.perf_counter()
+            scope = {
+                "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+                "scheme": "http", "path": path, "query_string": f"_={number}".encode(),
+                "server": ("testserver", 80), "client": ("127.0.0.1", 0),
+                "headers": [(b"host", b"testserver"), (b"authorization", f"Bearer {token}".encode())],
+            }
+            received = False
+
+            async def receive():
+                nonlocal received
+                if not received:
+                    received = True
+                    return {"type": "http.request", "body": b"", "more_body": False}
+                # соединение не разрывается, ожидание отменяет обработчик
+                await asyncio.Future()
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    statuses.append(message["status"])
+                elif not message.get("more_body"):
+                    await asyncio.sleep(client_delay)
+
+            await handler(scope, receive, send)
+            durations.append(time.perf_counter() - submitted)
+
+    async def main():
+        slots = asyncio.Semaphore(clients)
+        await asyncio.gather(*(call(number, slots) for number in range(requests)))
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    return _concurrency_summary(durations, statuses, time.perf_counter() - started)
+
+
+def measure_concurrency(ctx, clients=50, requests=500, threads=4, client_delay=0.05, report=None):
+    """Задержка и пропускная способность синхронных и асинхронных маршрутов
+    при clients одновременных медленных клиентах (каждый читает ответ client_delay секунд).
+
+    Каждый запрос уникален (параметр _), поэтому кеш ответов не срабатывает.
+    """
+    report = report or (lambda message: None)
+    token = str(RefreshToken.for_user(ctx.user).access_token)
+    results = {}
+    for name, sync_url, async_url in CONCURRENCY_ROUTES:
+        results[name] = {
+            "wsgi": _measure_wsgi(sync_url(ctx), token, clients, requests, threads, client_delay),
+            "asgi": _measure_asgi(async_url(ctx), token, clients, requests, client_delay),
+        }
+        for mode, summary in results[name].items():
+            report(f"{name:<24} {mode}  {summary['rps']:>8.1f} rps  p50 {summary['p50_ms']:>9.2f} ms  "
+                   f"p95 {summary['p95_ms']:>9.2f} ms  errors {summary['errors']}")
+    return results
+
+
+def measure_connection_reuse(ctx, route_name="task-detail", requests=200, max_ages=(0, 600)):
+    """Задержка маршрута под WSGIHandler с разным CONN_MAX_AGE.
+
+    При CONN_MAX_AGE=0 обработчик закрывает соединение в конце запроса
+    (сигнал request_finished) и каждый запрос устанавливает новое,
+    при постоянных соединениях установка соединения уходит из задержки.
+    """
+    url = next(route.url for route in ROUTES if route.name == route_name)(ctx)
+    token = str(RefreshToken.for_user(ctx.user).access_token)
+    environ = RequestFactory()._base_environ(PATH_INFO=url, HTTP_AUTHORIZATION=f"Bearer {token}")
+    handler = WSGIHandler()
+    created = []
+
+    def count_connection(sender, connection, **kwargs):
+        created.append(connection.alias)
+
+    max_age_before = connection.settings_dict["CONN_MAX_AGE"]
+    results = {}
+    connection_created.connect(count_connection)
+    try:
+        for max_age in max_ages:
+            connection.settings_dict["CONN_MAX_AGE"] = max_age
+            # срок жизни соединения вычисляется при подключении
+            connection.close()
+            durations = []
+            created.clear()
+            for iteration in range(requests + 1):
+                cache.clear()
+                started = time.perf_counter()
+                for _ in handler(dict(environ), lambda status, headers, exc_info=None: None):
+                    pass
+                if iteration:
+                    durations.append(time.perf_counter() - started)
+            results[f"conn_max_age={max_age}"] = dict(summarize(durations), connections=len(created))
+    finally:
+        connection_created.disconnect(count_connection)
+        connection.settings_dict["CONN_MAX_AGE"] = max_age_before
+    return results
+
+
+def run(sizes, repeat=20, routes=None, use_cache=False, seed_value=0, workers=1, report=None):
+    """Замеры всех маршрутов на каждом размере данных"""
+    report = report or (lambda message: None)
+    routes = routes or ROUTES
+    results = {}
+    for size in sorted(sizes):
+        seed(size, seed=seed_value, workers=workers)
+        ctx = make_context()
+        results[str(size)] = {}
+        for route in routes:
+            summary = measure_route(route, ctx, repeat=repeat, use_cache=use_cache)
+            results[str(size)][route.name] = summary
+            report(f"{size:>9} {route.name:<24} p50 {summary['p50_ms']:>9.2f} ms  "
+                   f"p95 {summary['p95_ms']:>9.2f} ms  queries {summary['queries']}")
+    return {
+        "meta": {
+            "vendor": connection.vendor,
+            "python": platform.python_version(),
+            "repeat": repeat,
+            "seed": seed_value,
+        },
+        "results": results,
+    }
+
+
+@contextmanager
+def temporary_database():
+    """Замеры идут на временной БД, как при запуске тестов"""
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def _seed_first_size(options):
+    seed(options["sizes"][0], seed=options["seed"], workers=options["workers"])
+
+
+def assignment_mode(options, report):
+    tasks, employees = options["assignment"]
+    results = measure_assignment(tasks, employees, repeat=options["repeat"], seed=options["seed"])
+    for name, summary in results.items():
+        report(f"{name:<10} p50 {summary['p50_ms']:>9.2f} ms  p95 {summary['p95_ms']:>9.2f} ms  "
+               f"load spread {summary['load_spread']}")
+
+
+def connections_mode(options, report):
+    _seed_first_size(options)
+    results = measure_connection_reuse(make_context(), requests=options["repeat"])
+    for name, summary in results.items():
+        report(f"{name:<18} p50 {summary['p50_ms']:>9.2f} ms  p95 {summary['p95_ms']:>9.2f} ms  "
+               f"new connections {summary['connections']}")
+
+
+def serializers_mode(options, report):
+    _seed_first_size(options)
+    results = measure_serializers(rows=options["serializers"], repeat=options["repeat"])
+    for name, summary in results.items():
+        speedup = f"  x{summary['speedup']} (serialization x{summary['serialize_speedup']})" \
+            if "speedup" in summary else ""
+        report(f"{name:<18} {summary['rows']:>7} rows  p50 {summary['p50_ms']:>9.2f} ms  "
+               f"{summary['rows_per_s']:>9} rows/s{speedup}")
+
+
+def rendering_mode(options, report):
+    _seed_first_size(options)
+    results = measure_rendering(rows=options["rendering"], repeat=options["repeat"])
+    for name, summary in results.items():
+        compressed = "  ".join(f"{key[:-6]} {summary[key]} B" for key in summary if key.endswith("_bytes"))
+        speedup = f"  x{summary['speedup']}" if "speedup" in summary else ""
+        report(f"{name:<18} {summary['rows']:>7} rows  p50 {summary['p50_ms']:>9.2f} ms  "
+               f"{summary['bytes']:>9} B  {compressed}{speedup}")
+
+
+def search_mode(options, report):
+    _seed_first_size(options)
+    results = measure_search(repeat=options["repeat"])
+    for name, summary in results.items():
+        report(f"{name:<40} p50 {summary['p50_ms']:>9.2f} ms  p95 {summary['p95_ms']:>9.2f} ms  "
+               f"found {summary['found']}")
+
+
+def concurrency_mode(options, report):
+    _seed_first_size(options)
+    measure_concurrency(
+        make_context(),
+        clients=options["concurrency"],
+        requests=options["requests"],
+        threads=options["threads"],
+        client_delay=options["client_delay"] / 1000,
+        report=report,
+    )
+
+
+@dataclass
+class Mode:
+    """Отдельный режим команды benchmark вместо замера всех маршрутов.
+
+    Режим включается своим флагом, получает все опции команды и пишет
+    результаты через report. Новый режим — функция и запись в MODES.
+    """
+    flag: str
+    run: Callable[[dict, Callable[[str], None]], None]
+    argument: dict
+    uses_db: bool = True
+
+    @property
+    def dest(self):
+        return self.flag.lstrip("-").replace("-", "_")
+
+
+MODES = [
+    Mode("--assignment", assignment_mode, uses_db=False, argument=dict(
+        type=int, nargs=2, metavar=("TASKS", "EMPLOYEES"),
+        help="замерить только стратегии распределения задач, без БД")),
+    Mode("--connections", connections_mode, argument=dict(
+        action="store_true",
+        help="сравнить задержку без постоянных соединений к БД и с ними (CONN_MAX_AGE)")),
+    Mode("--serializers", serializers_mode, argument=dict(
+        type=int, metavar="ROWS",
+        help="сравнить вывод списков через ModelSerializer и через строки values()")),
+    Mode("--rendering", rendering_mode, argument=dict(
+        type=int, metavar="ROWS",
+        help="сравнить рендеринг JSON (json и orjson) и размер ответов со сжатием")),
+    Mode("--search", search_mode, argument=dict(
+        action="store_true",
+        help="сравнить поиск через ILIKE и через полнотекстовый/триграммный индекс")),
+    Mode("--concurrency", concurrency_mode, argument=dict(
+        type=int, metavar="CLIENTS",
+        help="сравнить синхронные (WSGI) и асинхронные (ASGI) маршруты "
+             "при указанном числе одновременных клиентов")),
+]
+
+
+def compare(current, baseline, threshold=0.2, noise_floor_ms=NOISE_FLOOR_MS):
+    """Список регрессий относительно базовых замеров.
+
+    Регрессией считается рост p95 больше чем на threshold (доля) и больше
+    порога шума, а также любой рост числа запросов к БД.
+    """
+    regressions = []
+    for size, routes in current["results"].items():
+        for name, summary in routes.items():
+            reference = baseline.get("results", {}).get(size, {}).get(name)
+            if reference is None:
+                continue
+            limit = max(reference["p95_ms"] * (1 + threshold), reference["p95_ms"] + noise_floor_ms)
+            if summary["p95_ms"] > limit:
+                regressions.append(
+                    f"{size} {name}: p95 {summary['p95_ms']:.2f} ms > {reference['p95_ms']:.2f} ms baseline"
+                )
+            if summary.get("queries", 0) > reference.get("queries", 0):
+                regressions.append(
+                    f"{size} {name}: {summary['queries']} queries > {reference['queries']} baseline"
+                )
+    return regressions
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save(results, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,157 @@
+from rest_framework.exceptions import ValidationError
+
+from ttracker.models import Employee, Task
+from ttracker.serializer import TaskBulkItemSerializer
+from ttracker.tree import find_cycles
+from ttracker.validators import CYCLE_ERROR, TitleValidator
+
+DOES_NOT_EXIST = 'Invalid pk "{pk_value}" - object does not exist.'
+NOT_FOUND = "Not found."
+
+
+class TaskBatch:
+    """Проверка пакета задач за один проход.
+
+    Каждый элемент проверяется сериализатором без обращений к БД,
+    существование исполнителей и родительских задач проверяется
+    одним запросом на весь пакет.
+    """
+
+    references = (("executor", Employee), ("parental_task", Task))
+
+    def __init__(self, items, partial=False):
+        self.items = items
+        self.partial = partial
+        self.valid = []
+        self.errors = []
+
+    def add_error(self, index, errors):
+        self.errors.append({"index": index, "errors": errors})
+
+    def validate(self):
+        candidates = []
+        for index, item in enumerate(self.items):
+            serializer = TaskBulkItemSerializer(data=item, partial=self.partial)
+            if serializer.is_valid():
+                candidates.append((index, serializer.validated_data))
+            else:
+                self.add_error(index, serializer.errors)
+
+        existing = {
+            field: self.existing_pks(model, [data.get(field) for _, data in candidates])
+            for field, model in self.references
+        }
+        for index, data in candidates:
+            errors = {
+                field: [DOES_NOT_EXIST.format(pk_value=data[field])]
+                for field, _ in self.references
+                if data.get(field) is not None and data[field] not in existing[field]
+            }
+            if errors:
+                self.add_error(index, errors)
+            else:
+                self.valid.append((index, data))
+        self.errors.sort(key=lambda error: error["index"])
+        return not self.errors
+
+    @staticmethod
+    def existing_pks(model, pks):
+        pks = {pk for pk in pks if pk is not None}
+        if not pks:
+            return set()
+        return set(model.objects.filter(pk__in=pks).values_list("pk", flat=True))
+
+    @staticmethod
+    def to_model_fields(data):
+        """Ссылки передаются в модель через *_id, без загрузки объектов"""
+        fields = dict(data)
+        fields.pop("id", None)
+        for field, _ in TaskBatch.references:
+            if field in fields:
+                fields[f"{field}_id"] = fields.pop(field)
+        return fields
+
+
+class TaskUpdateBatch(TaskBatch):
+    """Пакет изменений существующих задач с проверкой названий как в TaskSerializer"""
+
+    title_validator = TitleValidator(field="title")
+
+    def __init__(self, items):
+        super().__init__(items, partial=True)
+        self.tasks = {}
+
+    def validate(self):
+        super().validate()
+        valid, self.valid = self.valid, []
+
+        ids = [data.get("id") for _, data in valid]
+        self.tasks = Task.objects.in_bulk([pk for pk in ids if pk is not None])
+
+        for index, data in valid:
+            errors = {}
+            if data.get("id") is None:
+                errors["id"] = ["This field is required."]
+            elif data["id"] not in self.tasks:
+                errors["id"] = [NOT_FOUND]
+            if "title" in data:
+                try:
+                    self.title_validator(data)
+                except ValidationError as exc:
+                    errors["title"] = exc.detail
+            if errors:
+                self.add_error(index, errors)
+            else:
+                self.valid.append((index, data))
+
+        # новые родительские задачи проверяются совместно одним запросом
+        cycles = find_cycles({
+            data["id"]: data["parental_task"] for _, data in self.valid
+            if data.get("parental_task") not in (None, self.tasks[data["id"]].parental_task_id)
+        })
+        if cycles:
+            for index, data in self.valid:
+                if data["id"] in cycles:
+                    self.add_error(index, {"parental_task": [CYCLE_ERROR]})
+            self.valid = [(index, data) for index, data in self.valid if data["id"] not in cycles]
+
+        conflicts = self.title_conflicts()
+        if conflicts:
+            for index, data in self.valid:
+                if index in conflicts:
+                    self.add_error(index, {"title": ["The fields title must make a unique set."]})
+            self.valid = [(index, data) for index, data in self.valid if index not in conflicts]
+        self.errors.sort(key=lambda error: error["index"])
+        return not self.errors
+
+    def title_conflicts(self):
+        """Индексы элементов, чьи названия заняты после применения пакета.
+
+        Название занято задачей из БД, если пакет не меняет ее название,
+        или предыдущим элементом пакета для другой задачи. Отклоненный
+        элемент не переименовывает свою задачу, и ее прежнее название снова
+        занято, поэтому проверка повторяется до устойчивого результата.
+        Задачи из БД с нужными названиями читаются одним запросом.
+        """
+        renames = [(index, data["id"], data["title"]) for index, data in self.valid if "title" in data]
+        if not renames:
+            return set()
+        owners = dict(
+            Task.objects.filter(title__in={title for _, _, title in renames}).values_list("title", "pk")
+        )
+        rejected = set()
+        while True:
+            renamed = {
+                pk for index, pk, title in renames
+                if index not in rejected and title != self.tasks[pk].title
+            }
+            claimed = {title: pk for title, pk in owners.items() if pk not in renamed}
+            conflicts = set()
+            for index, pk, title in renames:
+                if index in rejected:
+                    continue
+                if claimed.setdefault(title, pk) != pk:
+                    conflicts.add(index)
+            if not conflicts:
+                return rejected
+            rejected |= conflicts
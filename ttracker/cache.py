@@ -0,0 +1,137 @@
+import hashlib
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+CACHE_PREFIX = "ttracker"
+STATS_EVENTS = ("hit", "miss")
+
+
+def _version_key(namespace):
+    return f"{CACHE_PREFIX}:version:{namespace}"
+
+
+def _stats_key(event):
+    return f"{CACHE_PREFIX}:stats:{event}"
+
+
+def _sequence_key(name):
+    return f"{CACHE_PREFIX}:sequence:{name}"
+
+
+def _incr(key, initial):
+    """Атомарное увеличение счетчика с созданием при отсутствии"""
+    cache.add(key, initial, timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # ключ вытеснен между add и incr
+        cache.set(key, initial + 1, timeout=None)
+        return initial + 1
+
+
+def next_sequence(name):
+    """Следующее значение общего для всех процессов порядкового номера.
+
+    Начальное значение от времени, чтобы после вытеснения ключа номера
+    не повторились и пропуск был заметен читателям.
+    """
+    return _incr(_sequence_key(name), int(time.time() * 1000))
+
+
+def get_sequence(name):
+    """Текущее значение порядкового номера (создается при отсутствии)"""
+    key = _sequence_key(name)
+    cache.add(key, int(time.time() * 1000), timeout=None)
+    return cache.get(key)
+
+
+def get_versions(namespaces):
+    """Текущие версии пространств имен, от которых зависит ответ"""
+    keys = [_version_key(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+    return [versions.get(key, 0) for key in keys]
+
+
+def _bump(namespaces):
+    for namespace in namespaces:
+        # Начальная версия от времени, чтобы вытесненный счетчик
+        # не совпал со старыми закешированными ответами
+        _incr(_version_key(namespace), int(time.time() * 1000))
+
+
+def invalidate(*namespaces):
+    """Сбрасывает закешированные ответы, зависящие от пространств имен.
+
+    Версии увеличиваются сразу и повторно после фиксации транзакции,
+    чтобы ответ, построенный на незафиксированных данных, не остался в кеше.
+    """
+    _bump(namespaces)
+    connection = transaction.get_connection()
+    if connection.in_atomic_block:
+        transaction.on_commit(partial(_bump, namespaces))
+
+
+def record(event):
+    _incr(_stats_key(event), 0)
+
+
+def get_stats():
+    """Счетчики попаданий и промахов кеша ответов"""
+    stats = cache.get_many([_stats_key(event) for event in STATS_EVENTS])
+    return {event: stats.get(_stats_key(event), 0) for event in STATS_EVENTS}
+
+
+def request_digest(request):
+    """Хеш адреса и параметров запроса для ключей кеша"""
+    params = sorted(request.query_params.lists())
+    raw = f"{request.build_absolute_uri(request.path)}?{params}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class CachedResponseMixin:
+    """Кеширование GET-ответов с ключом по эндпоинту, параметрам запроса и пользователю.
+
+    Ключ включает версии пространств имен из cache_dependencies, которые
+    увеличиваются сигналами при изменении моделей (см. ttracker.signals).
+    """
+
+    cache_dependencies = ()
+    cache_timeout = None
+
+    def get_cache_dependencies(self):
+        return self.cache_dependencies
+
+    def get_cache_key(self, request):
+        versions = ".".join(str(version) for version in get_versions(self.get_cache_dependencies()))
+        return f"{CACHE_PREFIX}:response:{type(self).__name__}:{request.user.pk}:{versions}:{request_digest(request)}"
+
+    def get_cached_response(self, request):
+        """Ключ ответа и закешированный ответ (None при промахе)"""
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is None:
+            record("miss")
+            return key, None
+        record("hit")
+        response = Response(data)
+        response["X-Cache"] = "HIT"
+        return key, response
+
+    def cache_response(self, key, response):
+        if response.status_code == status.HTTP_200_OK:
+            timeout = self.cache_timeout or settings.TTRACKER_CACHE_TIMEOUT
+            cache.set(key, response.data, timeout=timeout)
+        response["X-Cache"] = "MISS"
+        return response
+
+    def get(self, request, *args, **kwargs):
+        key, cached = self.get_cached_response(request)
+        if cached is not None:
+            return cached
+        return self.cache_response(key, super().get(request, *args, **kwargs))
@@ -0,0 +1,64 @@
+from contextlib import nullcontext
+
+from django.db import connections, transaction
+from django.db.models import Exists, OuterRef
+
+from ttracker.models import TASK_CHANGES_LOCK_KEY, Task, TaskChange
+
+# Размер ответа дельта-синхронизации по умолчанию и максимальный (записей журнала)
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+
+
+def changes_since(since, limit=DEFAULT_LIMIT, queryset=None):
+    """Изменения задач после курсора since: не более limit записей журнала.
+
+    Возвращает {"cursor": курсор для следующего запроса, "has_more": есть ли
+    еще изменения, "changed": [Task], "deleted": [id]}. Стоимость - два
+    запроса по индексам (журнал по первичному ключу и задачи по id),
+    независимо от размера таблицы задач. Несколько изменений одной задачи
+    дают одну запись в ответе с ее текущим состоянием. Задачи, которых нет
+    в базе на момент запроса, считаются удаленными.
+
+    Курсор надежен и при параллельной записи: в PostgreSQL чтение журнала
+    берет монопольную блокировку журнала (один дополнительный запрос) и ждет
+    фиксации транзакций, уже получивших id записей; записи, начатые позже,
+    получат id больше выданного курсора. В SQLite запись последовательна.
+    """
+    connection = connections[TaskChange.objects.db]
+    postgresql = connection.vendor == 'postgresql'
+    with transaction.atomic(using=connection.alias) if postgresql else nullcontext():
+        if postgresql:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_xact_lock(%s)', [TASK_CHANGES_LOCK_KEY])
+        rows = list(
+            TaskChange.objects.filter(pk__gt=since).order_by('pk').values_list('pk', 'task_id', 'deleted')[:limit + 1]
+        )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    deleted = {}
+    for _, task_id, is_deleted in rows:
+        deleted[task_id] = is_deleted
+    if queryset is None:
+        queryset = Task.objects.all()
+    alive = [task_id for task_id, is_deleted in deleted.items() if not is_deleted]
+    changed = list(queryset.filter(pk__in=alive).order_by('pk')) if alive else []
+    found = {task.pk for task in changed}
+    return {
+        "cursor": rows[-1][0] if rows else since,
+        "has_more": has_more,
+        "changed": changed,
+        "deleted": sorted(task_id for task_id in deleted if task_id not in found),
+    }
+
+
+def compact_changes():
+    """Удаляет записи журнала, перекрытые более новыми записями той же задачи.
+
+    Для любого курсора последняя запись каждой задачи сохраняется, поэтому
+    ответ changes_since не меняется. Надгробия удаленных задач остаются.
+    Возвращает число удаленных записей.
+    """
+    newer = TaskChange.objects.filter(task_id=OuterRef('task_id'), pk__gt=OuterRef('pk'))
+    deleted, _ = TaskChange.objects.filter(Exists(newer)).delete()
+    return deleted
@@ -0,0 +1,124 @@
+import gzip
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence
+
+try:
+    import zstandard
+except ImportError:  # zstd - необязательная зависимость
+    zstandard = None
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+_ACCEPT_RE = re.compile(r"\s*([^\s;,]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?")
+
+
+def accepted_encodings(request):
+    """Кодировки из Accept-Encoding без q=0"""
+    encodings = set()
+    for item in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        match = _ACCEPT_RE.match(item)
+        if match is None:
+            continue
+        try:
+            quality = float(match.group(2) or 1)
+        except ValueError:
+            continue
+        if quality > 0:
+            encodings.add(match.group(1).lower())
+    return encodings
+
+
+def choose_encoding(request):
+    """zstd (если установлен zstandard) или gzip, None - клиент не принимает ни одну"""
+    encodings = accepted_encodings(request)
+    if zstandard is not None and "zstd" in encodings:
+        return "zstd"
+    if "gzip" in encodings:
+        return "gzip"
+    return None
+
+
+def compress(content, encoding):
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(content)
+    return gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _compress_stream(iterator, encoding):
+    if encoding == "gzip":
+        yield from compress_sequence(iterator)
+        return
+    compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    for chunk in iterator:
+        data = compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def compress_response(request, response, min_size):
+    """Сжимает ответ 200 по Accept-Encoding. Обычный ответ сжимается, если
+    тело не меньше min_size байт и сжатие уменьшает его, потоковый - всегда.
+    ETag ослабляется: сжатое тело отличается побайтно, но условный GET
+    по слабому сравнению продолжает работать"""
+    if response.status_code != 200 or response.has_header("Content-Encoding"):
+        return response
+    patch_vary_headers(response, ("Accept-Encoding",))
+    encoding = choose_encoding(request)
+    if encoding is None:
+        return response
+    if response.streaming:
+        if response.is_async:
+            return response
+        response.streaming_content = _compress_stream(response.streaming_content, encoding)
+        del response["Content-Length"]
+    else:
+        if len(response.content) < min_size:
+            return response
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+    etag = response.get("ETag")
+    if etag and etag.startswith('"'):
+        response.headers["ETag"] = "W/" + etag
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Сжатие ответов gzip или zstd.
+
+    Для всех ответов - при TTRACKER_COMPRESSION, для отдельных представлений -
+    CompressedResponseMixin (порог представления задается compression_min_size).
+    """
+
+    def process_response(self, request, response):
+        min_size = getattr(response, "compression_min_size", None)
+        if min_size is None and settings.TTRACKER_COMPRESSION:
+            min_size = settings.TTRACKER_COMPRESSION_MIN_SIZE
+        if min_size is None:
+            return response
+        return compress_response(request, response, min_size)
+
+
+class CompressedResponseMixin:
+    """Сжатие ответов представления DRF (нужен CompressionMiddleware)"""
+
+    compression_min_size = None
+
+    def get_compression_min_size(self):
+        if self.compression_min_size is not None:
+            return self.compression_min_size
+        return settings.TTRACKER_COMPRESSION_MIN_SIZE
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        response.compression_min_size = self.get_compression_min_size()
+        return response
@@ -0,0 +1,110 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from ttracker.cache import CACHE_PREFIX, get_versions, request_digest
+
+
+class ConditionalResponseMixin:
+    """ETag и Last-Modified для GET-ответов по столбцу updated_at.
+
+    Валидаторы считаются одним агрегирующим запросом (число строк и
+    последнее изменение) по тому же запросу, что и ответ, без сериализации.
+    При совпадении If-None-Match или If-Modified-Since возвращается 304
+    до сериализации и до обращения к кешу ответов. Если заданы
+    cache_dependencies, валидаторы кешируются до изменения данных
+    и повторный запрос клиента не обращается к БД. Валидаторы верны, пока
+    все пути записи ставят updated_at и сбрасывают версии кеша: save,
+    TaskQuerySet.update и сброс parental_task подзадач при удалении родителя.
+    """
+
+    cache_dependencies = ()
+    last_modified_field = "updated_at"
+
+    def get_cache_dependencies(self):
+        return self.cache_dependencies
+
+    @property
+    def is_detail(self):
+        return (self.lookup_url_kwarg or self.lookup_field) in self.kwargs
+
+    def get_validators_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.is_detail:
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return queryset.order_by()
+
+    def compute_validators(self, request):
+        """(ETag, время изменения) или None для пустого ответа"""
+        stats = self.get_validators_queryset().aggregate(
+            count=Count("pk"), last_modified=Max(self.last_modified_field)
+        )
+        if not stats["count"]:
+            return None
+        raw = f"{request_digest(request)}:{stats['count']}:{stats['last_modified'].isoformat()}"
+        etag = quote_etag(hashlib.sha1(raw.encode("utf-8")).hexdigest())
+        return etag, int(stats["last_modified"].timestamp())
+
+    def get_validators(self, request):
+        dependencies = self.get_cache_dependencies()
+        if not dependencies:
+            return self.compute_validators(request)
+        versions = ".".join(str(version) for version in get_versions(dependencies))
+        key = f"{CACHE_PREFIX}:validators:{type(self).__name__}:{versions}:{request_digest(request)}"
+        validators = cache.get(key)
+        if validators is None:
+            # пустой ответ кешируется как (), чтобы не повторять агрегат
+            validators = self.compute_validators(request) or ()
+            cache.set(key, validators, timeout=settings.TTRACKER_CACHE_TIMEOUT)
+        return validators or None
+
+    def conditional_response(self, request):
+        """Ответ 304 (или 412 для If-Match) либо None, если ответ нужно построить"""
+        self.validators = self.get_validators(request)
+        if self.validators is None:
+            return None
+        etag, last_modified = self.validators
+        # удаление строки списка не меняет последнее изменение,
+        # поэтому If-Modified-Since проверяется только для одного объекта
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified if self.is_detail else None
+        )
+        return self.set_validators(response) if response is not None else None
+
+    def set_validators(self, response):
+        if self.validators and response.status_code in (200, 304):
+            etag, last_modified = self.validators
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+
+class ConditionalGetMixin(ConditionalResponseMixin):
+    """Условный GET для обобщенных представлений (ListAPIView, RetrieveAPIView)"""
+
+    def get(self, request, *args, **kwargs):
+        response = self.conditional_response(request)
+        if response is not None:
+            return response
+        return self.set_validators(super().get(request, *args, **kwargs))
+
+
+class ConditionalViewSetMixin(ConditionalResponseMixin):
+    """Условный GET для действий list и retrieve наборов представлений"""
+
+    def list(self, request, *args, **kwargs):
+        response = self.conditional_response(request)
+        if response is not None:
+            return response
+        return self.set_validators(super().list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        response = self.conditional_response(request)
+        if response is not None:
+            return response
+        return self.set_validators(super().retrieve(request, *args, **kwargs))
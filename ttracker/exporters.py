@@ -0,0 +1,75 @@
+import csv
+
+from ttracker.renderers import dumps
+from ttracker.serializer import EmployeeValuesSerializer, TaskValuesSerializer
+
+# Выгрузка строится из строк values() сериализаторами списков, поэтому
+# значения совпадают с ответами API (даты - ISO 8601, телефоны - строки)
+EXPORTS = {
+    "tasks": TaskValuesSerializer,
+    "employees": EmployeeValuesSerializer,
+}
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+CHUNK_SIZE = 2000
+
+
+def export_fields(name, fieldset=None):
+    """Столбцы выгрузки: все поля или поля fieldset"""
+    return tuple(key for key, _, _ in EXPORTS[name](fieldset=fieldset).values_plan)
+
+
+def export_rows(name, chunk_size=CHUNK_SIZE, fieldset=None):
+    """Строки таблицы в виде словарей (только поля fieldset, если задан).
+
+    Чтение идет курсором на стороне сервера порциями по chunk_size строк
+    без создания экземпляров моделей, поэтому память не зависит от размера таблицы.
+    """
+    serializer_class = EXPORTS[name]
+    model = serializer_class.Meta.model
+    plan = serializer_class(fieldset=fieldset).values_plan
+    rows = serializer_class.values_queryset(model.objects.order_by("pk"), fieldset).iterator(chunk_size=chunk_size)
+    for row in rows:
+        yield serializer_class.convert_row(row, plan)
+
+
+class _Echo:
+    """Буфер для csv.writer, возвращающий записанную строку"""
+
+    def write(self, value):
+        return value
+
+
+def render_ndjson(rows, batch_size=100):
+    """Каждая строка - отдельный компактный JSON-объект (orjson), строки отдаются пачками"""
+    lines = []
+    for row in rows:
+        lines.append(dumps(row))
+        if len(lines) >= batch_size:
+            yield (b"\n".join(lines) + b"\n").decode("utf-8")
+            lines = []
+    if lines:
+        yield (b"\n".join(lines) + b"\n").decode("utf-8")
+
+
+def render_csv(rows, fields, batch_size=100):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    lines = []
+    for row in rows:
+        lines.append(writer.writerow([row[field] for field in fields]))
+        if len(lines) >= batch_size:
+            yield "".join(lines)
+            lines = []
+    if lines:
+        yield "".join(lines)
+
+
+def render(name, output_format, chunk_size=CHUNK_SIZE, fieldset=None):
+    """Потоковое представление таблицы в формате ndjson или csv"""
+    rows = export_rows(name, chunk_size=chunk_size, fieldset=fieldset)
+    if output_format == "csv":
+        return render_csv(rows, export_fields(name, fieldset))
+    return render_ndjson(rows)
@@ -0,0 +1,97 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+from ttracker.values import ValuesSerializerMixin, get_model_field
+
+FIELDS_PARAM = "fields"
+EXCLUDE_PARAM = "exclude"
+
+
+def _names(value):
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def parse_fieldset(query_params, available):
+    """Набор полей ответа по параметрам fields и exclude (через запятую).
+
+    None - параметры не заданы, выводятся все поля. Неизвестные поля
+    вызывают ValidationError. Порядок полей в ответе не меняется.
+    """
+    if FIELDS_PARAM not in query_params and EXCLUDE_PARAM not in query_params:
+        return None
+    errors = {}
+    selected = set(available)
+    for param in (FIELDS_PARAM, EXCLUDE_PARAM):
+        if param not in query_params:
+            continue
+        names = _names(query_params[param])
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            errors[param] = [f"Unknown fields: {', '.join(unknown)}. Choose from: {', '.join(available)}."]
+        elif param == FIELDS_PARAM:
+            selected &= set(names)
+        else:
+            selected -= set(names)
+    if errors:
+        raise ValidationError(errors)
+    if not selected:
+        raise ValidationError({FIELDS_PARAM: ["At least one field must be selected."]})
+    return frozenset(selected)
+
+
+class SparseFieldsetSerializerMixin:
+    """Сериализатор с необязательным набором полей ответа fieldset"""
+
+    def __init__(self, *args, fieldset=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fieldset is not None:
+            for name in list(self.fields):
+                if name not in fieldset:
+                    self.fields.pop(name)
+
+
+class SparseFieldsetMixin:
+    """Параметры ?fields= и ?exclude= для GET-запросов представлений DRF.
+
+    Набор полей сужает и ответ сериализатора, и столбцы запроса: строки
+    values() читают только столбцы выбранных полей (values_columns - столбцы,
+    нужные представлению помимо ответа), экземпляры моделей загружаются
+    через only(). Невыбранные столбцы (например, description задачи)
+    не читаются из БД.
+    """
+
+    values_columns = ()
+
+    def get_fieldset(self):
+        if not hasattr(self, "_fieldset"):
+            self._fieldset = None
+            if self.request.method in SAFE_METHODS:
+                serializer_class = self.get_serializer_class()
+                available = tuple(serializer_class().fields)
+                self._fieldset = parse_fieldset(self.request.query_params, available)
+        return self._fieldset
+
+    def get_values_columns(self):
+        return self.values_columns
+
+    def narrow_queryset(self, queryset):
+        """Запрос, читающий только столбцы выбранных полей"""
+        fieldset = self.get_fieldset()
+        serializer_class = self.get_serializer_class()
+        if issubclass(serializer_class, ValuesSerializerMixin):
+            return serializer_class.values_queryset(queryset, fieldset, self.get_values_columns())
+        if fieldset is None:
+            return queryset
+        model = queryset.model
+        fields = serializer_class().fields
+        columns = [
+            fields[name].source for name in fieldset
+            if "." not in fields[name].source and get_model_field(model, fields[name].source) is not None
+        ]
+        return queryset.only(model._meta.pk.name, *columns)
+
+    def get_serializer(self, *args, **kwargs):
+        fieldset = self.get_fieldset()
+        if fieldset is not None:
+            kwargs.setdefault("fieldset", fieldset)
+        return super().get_serializer(*args, **kwargs)
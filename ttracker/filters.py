@@ -0,0 +1,36 @@
+from django_filters import rest_framework as filters
+
+from ttracker.models import Task
+
+
+class TaskOrderingFilter(filters.OrderingFilter):
+    """Сортировка по разрешенным полям, id дополняет ключ сортировки:
+    порядок страниц однозначен и совпадает с индексами вида (поле, id)"""
+
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        ordering = [self.get_ordering_value(param) for param in value]
+        last = ordering[-1]
+        if last.lstrip("-") != "id":
+            ordering.append("-id" if last.startswith("-") else "id")
+        return qs.order_by(*ordering)
+
+
+class TaskFilter(filters.FilterSet):
+    """Фильтры списка задач, каждому соответствует индекс Task:
+    status - task_status_deadline_idx, executor - task_executor_deadline_idx,
+    owner - task_owner_deadline_idx, deadline_after/deadline_before -
+    task_deadline_id_idx, has_parent - task_parent_status_idx.
+    Исполнитель и создатель задаются id и не проверяются отдельным запросом"""
+
+    status = filters.ChoiceFilter(choices=Task.STATUSES)
+    executor = filters.NumberFilter(field_name="executor_id")
+    owner = filters.NumberFilter(field_name="owner_id")
+    deadline = filters.DateFromToRangeFilter()
+    has_parent = filters.BooleanFilter(field_name="parental_task", lookup_expr="isnull", exclude=True)
+    ordering = TaskOrderingFilter(fields=("id", "deadline", "title", "updated_at"))
+
+    class Meta:
+        model = Task
+        fields = ("status", "executor", "owner", "deadline", "has_parent")
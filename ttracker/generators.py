@@ -0,0 +1,209 @@
+import json
+import random
+from datetime import date, timedelta
+from multiprocessing import Pool
+
+from django.core.management.color import no_style
+from django.db import connection, connections
+from django.db.models import Max
+
+from ttracker.models import Employee, Task, rebuild_active_task_counts, skipped_active_task_deltas
+
+LAST_NAMES = ['Иванов', 'Петров', 'Сидоров', 'Кузнецов', 'Смирнов', 'Попов', 'Александров', 'Фёдоров', 'Морозов',
+              'Соколов']
+FIRST_NAMES = ['Алексей', 'Иван', 'Петр', 'Дмитрий', 'Александр', 'Сергей', 'Олег', 'Максим']
+MIDDLE_NAMES = ['Алексеевич', 'Иванович', 'Петрович', 'Сергеевич', 'Александрович', 'Олегович', 'Максимович']
+TASK_ACTIONS = ['Разработка', 'Проверка', 'Согласование', 'Доработка', 'Испытания', 'Расчет', 'Оформление']
+TASK_SUBJECTS = ['схемы вычислителя', 'интерфейса передачи данных', 'блока питания', 'конструкторской документации',
+                 'программы испытаний', 'печатной платы', 'технического задания']
+
+POSITION_WEIGHTS = [
+    (Employee.POSITION_CAT1, 25),
+    (Employee.POSITION_CAT2, 35),
+    (Employee.POSITION_CAT3, 35),
+    (Employee.MANAGER, 5),
+]
+STATUS_WEIGHTS = [
+    (Task.STATUS_DONE, 60),
+    (Task.STATUS_IN_PROGRESS, 25),
+    (Task.STATUS_OPEN, 15),
+]
+VACATION_PROBABILITY = 0.1
+NO_EXECUTOR_PROBABILITY = 0.05
+# Вероятность продолжить цепочку от предыдущей задачи: средняя длина цепочки 1 / (1 - p)
+CHAIN_PROBABILITY = 0.85
+BRANCH_PROBABILITY = 0.1
+BASE_DATE = date(2024, 9, 1)
+CHUNK_SIZE = 10000
+
+
+def _weighted(rng, weights):
+    values, value_weights = zip(*weights)
+    return rng.choices(values, weights=value_weights)[0]
+
+
+def _rng(seed, kind, chunk):
+    # строковое зерно дает одинаковую последовательность в любом процессе
+    return random.Random(f"{seed}:{kind}:{chunk}")
+
+
+def generate_employees(seed, chunk, start, stop, pk_offset=0):
+    """Сотрудники с номерами [start, stop) в виде (pk, поля)"""
+    rng = _rng(seed, "employees", chunk)
+    for i in range(start, stop):
+        pk = pk_offset + i + 1
+        yield pk, {
+            "name": f"{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)} {rng.choice(MIDDLE_NAMES)}",
+            "position": _weighted(rng, POSITION_WEIGHTS),
+            "email": f"user{pk}@mail.ru",
+            "phone_number": "+79" + "".join(str(rng.randint(0, 9)) for _ in range(9)),
+            "vacation_status": rng.random() < VACATION_PROBABILITY,
+        }
+
+
+def generate_tasks(seed, chunk, start, stop, employees, pk_offset=0, employee_offset=0):
+    """Задачи с номерами [start, stop) в виде (pk, поля).
+
+    Родительские задачи выбираются только внутри своего блока, поэтому блоки
+    генерируются и записываются независимо. Цепочки продолжаются от предыдущей
+    задачи с вероятностью CHAIN_PROBABILITY, что дает глубокие ветвящиеся иерархии.
+    """
+    rng = _rng(seed, "tasks", chunk)
+    for i in range(start, stop):
+        pk = pk_offset + i + 1
+        parent = None
+        if i > start:
+            roll = rng.random()
+            if roll < CHAIN_PROBABILITY:
+                parent = pk - 1
+            elif roll < CHAIN_PROBABILITY + BRANCH_PROBABILITY:
+                parent = rng.randint(pk_offset + start + 1, pk - 1)
+
+        status = _weighted(rng, STATUS_WEIGHTS)
+        # закрытые задачи чаще в прошлом, открытые - в будущем
+        offset = {
+            Task.STATUS_DONE: rng.triangular(-365, 30, -60),
+            Task.STATUS_IN_PROGRESS: rng.triangular(-30, 120, 14),
+            Task.STATUS_OPEN: rng.triangular(0, 365, 60),
+        }[status]
+        executor = None
+        if employees and not (status == Task.STATUS_OPEN and rng.random() < NO_EXECUTOR_PROBABILITY):
+            executor = employee_offset + rng.randint(1, employees)
+        yield pk, {
+            "title": f"{rng.choice(TASK_ACTIONS)} {rng.choice(TASK_SUBJECTS)} №{pk}",
+            "description": None,
+            "deadline": (BASE_DATE + timedelta(days=int(offset))).isoformat(),
+            "parental_task": parent,
+            "executor": executor,
+            "status": status,
+            "owner": None,
+        }
+
+
+def chunks(total, chunk_size):
+    return [(chunk, start, min(start + chunk_size, total))
+            for chunk, start in enumerate(range(0, total, chunk_size))]
+
+
+def _records(job):
+    kind, seed, chunk, start, stop, options = job
+    if kind == "employees":
+        return generate_employees(seed, chunk, start, stop, options["employee_offset"])
+    return generate_tasks(seed, chunk, start, stop, options["employees"],
+                          options["task_offset"], options["employee_offset"])
+
+
+def render_chunk(job):
+    """Блок записей в формате фикстуры Django: по объекту на строку"""
+    kind, output_format = job[0], job[-1]["format"]
+    model = "ttracker.employee" if kind == "employees" else "ttracker.task"
+    lines = [
+        json.dumps({"model": model, "pk": pk, "fields": fields}, ensure_ascii=False)
+        for pk, fields in _records(job)
+    ]
+    separator = "\n" if output_format == "ndjson" else ",\n"
+    return separator.join(lines)
+
+
+def insert_chunk(job):
+    """Запись блока напрямую в БД через bulk_create с заданными id"""
+    kind = job[0]
+    model = Employee if kind == "employees" else Task
+    objs = []
+    for pk, fields in _records(job):
+        if kind == "tasks":
+            fields = dict(fields, parental_task_id=fields.pop("parental_task"),
+                          executor_id=fields.pop("executor"), owner_id=fields.pop("owner"))
+        objs.append(model(pk=pk, **fields))
+    # счетчики сотрудников пересчитываются один раз после всех блоков: параллельные
+    # блоки не ждут друг друга на блокировках общих сотрудников
+    with skipped_active_task_deltas():
+        model.objects.bulk_create(objs, batch_size=2000)
+    return len(objs)
+
+
+class DataGenerator:
+    """Детерминированная генерация сотрудников и задач по зерну.
+
+    Данные делятся на блоки по chunk_size записей, каждый блок генерируется
+    собственным генератором случайных чисел, поэтому результат не зависит
+    от числа процессов.
+    """
+
+    def __init__(self, employees, tasks, seed=0, chunk_size=CHUNK_SIZE, workers=1):
+        self.employees = employees
+        self.tasks = tasks
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.workers = workers
+
+    def jobs(self, options):
+        return [
+            (kind, self.seed, chunk, start, stop, options)
+            for kind, total in (("employees", self.employees), ("tasks", self.tasks))
+            for chunk, start, stop in chunks(total, self.chunk_size)
+        ]
+
+    def _map(self, func, jobs, uses_database=False):
+        if self.workers <= 1:
+            yield from map(func, jobs)
+            return
+        if uses_database:
+            # дочерние процессы открывают собственные соединения с БД
+            connections.close_all()
+        with Pool(self.workers) as pool:
+            yield from pool.imap(func, jobs)
+
+    def write(self, stream, output_format="json"):
+        """Потоковая запись в файл: фикстура Django (json) или по объекту на строку (ndjson)"""
+        options = {"format": output_format, "employees": self.employees,
+                   "employee_offset": 0, "task_offset": 0}
+        first = True
+        if output_format == "json":
+            stream.write("[\n")
+        for text in self._map(render_chunk, self.jobs(options)):
+            if not text:
+                continue
+            if not first:
+                stream.write(",\n" if output_format == "json" else "\n")
+            stream.write(text)
+            first = False
+        stream.write("\n]\n" if output_format == "json" else "\n")
+
+    def insert(self):
+        """Запись напрямую в БД, id продолжают уже существующие"""
+        options = {
+            "format": None,
+            "employees": self.employees,
+            "employee_offset": Employee.objects.aggregate(pk=Max("pk"))["pk"] or 0,
+            "task_offset": Task.objects.aggregate(pk=Max("pk"))["pk"] or 0,
+        }
+        jobs = self.jobs(options)
+        # задачи ссылаются на сотрудников, поэтому сотрудники записываются первыми
+        created = sum(self._map(insert_chunk, [job for job in jobs if job[0] == "employees"], True))
+        created += sum(self._map(insert_chunk, [job for job in jobs if job[0] == "tasks"], True))
+        rebuild_active_task_counts()
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [Employee, Task]):
+                cursor.execute(sql)
+        return created
@@ -0,0 +1,257 @@
+import heapq
+import threading
+from array import array
+from datetime import date
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from ttracker.cache import CACHE_PREFIX, get_sequence, get_versions, next_sequence
+from ttracker.models import Task
+
+STATUS_CODES = {Task.STATUS_OPEN: 0, Task.STATUS_IN_PROGRESS: 1, Task.STATUS_DONE: 2}
+DELETED = -1
+UNFINISHED = (STATUS_CODES[Task.STATUS_OPEN], STATUS_CODES[Task.STATUS_IN_PROGRESS])
+
+SEQUENCE = "graph"
+LOAD_CHUNK_SIZE = 5000
+# При большем отставании граф загружается заново, а не догоняется по журналу
+MAX_PENDING_CHANGES = 10000
+
+_UNRESOLVED = -1
+_VISITING = -2
+_NO_DEADLINE = date.max.toordinal()
+
+
+def _change_key(seq):
+    return f"{CACHE_PREFIX}:graph:change:{seq}"
+
+
+def _ordinal(value):
+    value = Task._meta.get_field("deadline").to_python(value)
+    return value.toordinal() if value else _NO_DEADLINE
+
+
+def _publish(change):
+    seq = next_sequence(SEQUENCE)
+    cache.set(_change_key(seq), change, timeout=settings.TTRACKER_CACHE_TIMEOUT)
+
+
+def record_change(task, deleted=False):
+    """Публикует изменение задачи в журнал графа после фиксации транзакции.
+
+    Журнал общий для всех процессов (хранится в кеше), каждый процесс
+    применяет к своему графу только записи новее уже примененных.
+    """
+    if deleted:
+        change = (task.pk, None, DELETED, _NO_DEADLINE)
+    else:
+        change = (task.pk, task.parental_task_id, STATUS_CODES[task.status], _ordinal(task.deadline))
+    transaction.on_commit(partial(_publish, change))
+
+
+class TaskGraph:
+    """Граф подчинения задач в компактных массивах.
+
+    Узел задачи - позиция в массивах ids, parents (позиция родителя, -1 без
+    родителя), statuses и deadlines (порядковый номер дня). Граф загружается
+    одним проходом values_list, дальше обновляется по журналу изменений.
+    Массовые операции (update, bulk_create, delete через QuerySet) журнал
+    не пишут и приводят к полной перезагрузке по версии task:bulk.
+
+    Подзадача блокирует родительскую: родительская задача не может быть
+    завершена, пока не завершены ее подзадачи.
+    """
+
+    def __init__(self):
+        self.ids = array("q")
+        self.parents = array("q")
+        self.statuses = array("b")
+        self.deadlines = array("l")
+        self.index = {}
+        self.seq = None
+        self.bulk_version = None
+        self._analysis = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_db(cls):
+        graph = cls()
+        # версии читаются до чтения таблицы: изменения во время чтения
+        # применятся повторно, записи журнала идемпотентны
+        graph.seq = get_sequence(SEQUENCE)
+        graph.bulk_version = get_versions(("task:bulk",))[0]
+        rows = Task.objects.order_by().values_list(
+            "id", "parental_task_id", "status", "deadline"
+        ).iterator(chunk_size=LOAD_CHUNK_SIZE)
+        parent_ids = array("q")
+        for pk, parent_id, status, deadline in rows:
+            graph.index[pk] = len(graph.ids)
+            graph.ids.append(pk)
+            parent_ids.append(parent_id or 0)
+            graph.statuses.append(STATUS_CODES[status])
+            graph.deadlines.append(deadline.toordinal() if deadline else _NO_DEADLINE)
+        index = graph.index
+        graph.parents = array("q", (index.get(parent_id, -1) for parent_id in parent_ids))
+        return graph
+
+    def apply(self, pk, parent_id, status, deadline):
+        """Изменение одной задачи: новая задача добавляется в конец массивов"""
+        position = self.index.get(pk)
+        if position is None:
+            position = self.index[pk] = len(self.ids)
+            self.ids.append(pk)
+            self.parents.append(-1)
+            self.statuses.append(status)
+            self.deadlines.append(deadline)
+        self.parents[position] = self.index.get(parent_id, -1) if parent_id is not None else -1
+        self.statuses[position] = status
+        self.deadlines[position] = deadline
+        self._analysis = None
+
+    def pending_changes(self):
+        """Записи журнала новее примененных или None, если нужна перезагрузка"""
+        seq = get_sequence(SEQUENCE)
+        if get_versions(("task:bulk",))[0] != self.bulk_version:
+            return None
+        if seq == self.seq:
+            return []
+        if seq is None or self.seq is None or not 0 < seq - self.seq <= MAX_PENDING_CHANGES:
+            return None
+        keys = [_change_key(number) for number in range(self.seq + 1, seq + 1)]
+        changes = cache.get_many(keys)
+        if len(changes) != len(keys):
+            return None
+        self.seq = seq
+        return [changes[key] for key in keys]
+
+    def chains(self):
+        """Для каждого узла: число незавершенных задач выше по цепочке родителей,
+        которые он блокирует, и ближайший срок на этой цепочке.
+
+        Каждый узел разрешается один раз, поэтому время линейное.
+        """
+        count = len(self.ids)
+        parents, statuses, deadlines = self.parents, self.statuses, self.deadlines
+        blocked = array("q", [_UNRESOLVED]) * count
+        chain_deadlines = array("l", [_NO_DEADLINE]) * count
+
+        def unfinished_parent(position):
+            parent = parents[position]
+            return parent if parent >= 0 and statuses[parent] in UNFINISHED else -1
+
+        for start in range(count):
+            if blocked[start] != _UNRESOLVED:
+                continue
+            path, position = [], start
+            while position >= 0 and blocked[position] == _UNRESOLVED:
+                blocked[position] = _VISITING
+                path.append(position)
+                position = unfinished_parent(position)
+            if position >= 0 and blocked[position] >= 0:
+                above, deadline = blocked[position] + 1, chain_deadlines[position]
+            else:
+                # корень цепочки или цикл в данных
+                above, deadline = 0, _NO_DEADLINE
+            for position in reversed(path):
+                blocked[position] = above
+                chain_deadlines[position] = min(deadlines[position], deadline)
+                above, deadline = above + 1, chain_deadlines[position]
+        return blocked, chain_deadlines
+
+    def analyze(self, limit):
+        """Открытые задачи, блокирующие больше всего работы, и самые длинные
+        цепочки незавершенных задач (от подзадачи к корню)"""
+        if self._analysis is not None and self._analysis[0] >= limit:
+            return self._analysis[1]
+        blocked, chain_deadlines = self.chains()
+        statuses, ids = self.statuses, self.ids
+        open_code = STATUS_CODES[Task.STATUS_OPEN]
+
+        has_unfinished_child = array("b", [0]) * len(ids)
+        for position, parent in enumerate(self.parents):
+            if parent >= 0 and statuses[position] in UNFINISHED:
+                has_unfinished_child[parent] = 1
+
+        blockers = heapq.nsmallest(
+            limit,
+            (position for position, status in enumerate(statuses)
+             if status == open_code and blocked[position] > 0),
+            key=lambda position: (-blocked[position], self.deadlines[position], ids[position]),
+        )
+        starts = heapq.nsmallest(
+            limit,
+            (position for position, status in enumerate(statuses)
+             if status in UNFINISHED and not has_unfinished_child[position]),
+            key=lambda position: (-blocked[position], chain_deadlines[position], ids[position]),
+        )
+        result = {
+            "blockers": [(ids[position], blocked[position]) for position in blockers],
+            "chains": [
+                ([ids[node] for node in self.walk_up(start, blocked[start] + 1)],
+                 date.fromordinal(chain_deadlines[start]) if chain_deadlines[start] != _NO_DEADLINE else None)
+                for start in starts
+            ],
+        }
+        self._analysis = (limit, result)
+        return result
+
+    def walk_up(self, position, length):
+        for _ in range(length):
+            yield position
+            position = self.parents[position]
+
+
+_graph = None
+_lock = threading.Lock()
+
+
+def _refresh():
+    global _graph
+    changes = _graph.pending_changes() if _graph is not None else None
+    if changes is None:
+        _graph = TaskGraph.from_db()
+    else:
+        for change in changes:
+            _graph.apply(*change)
+    return _graph
+
+
+def get_graph():
+    """Граф процесса, догнанный по журналу изменений или загруженный заново"""
+    with _lock:
+        return _refresh()
+
+
+def reset():
+    global _graph
+    with _lock:
+        _graph = None
+
+
+def analyze(limit=10):
+    """Результат анализа с названиями и сроками задач (один запрос к БД
+    кроме загрузки графа)"""
+    with _lock:
+        result = _refresh().analyze(limit)
+    blockers = result["blockers"][:limit]
+    chains = result["chains"][:limit]
+    pks = {pk for pk, _ in blockers} | {pk for chain, _ in chains for pk in chain}
+    tasks = Task.objects.only("title", "deadline", "status").in_bulk(pks)
+
+    def describe(pk):
+        task = tasks[pk]
+        return {"id": pk, "title": task.title, "deadline": task.deadline, "status": task.status}
+
+    return {
+        "blockers": [dict(describe(pk), blocked_tasks=count) for pk, count in blockers if pk in tasks],
+        "critical_chains": [
+            {"length": len(chain), "deadline": deadline,
+             "tasks": [describe(pk) for pk in chain if pk in tasks]}
+            for chain, deadline in chains
+        ],
+    }
@@ -0,0 +1,231 @@
+import codecs
+import csv
+import json
+import time
+
+from django.db import transaction
+
+from ttracker.models import Employee, Task
+from ttracker.tree import find_cycles
+from users.models import User
+
+MODELS = {"tasks": Task, "employees": Employee}
+MODEL_LABELS = {"ttracker.task": "tasks", "ttracker.employee": "employees"}
+FORMATS = ("json", "ndjson", "csv")
+BATCH_SIZE = 2000
+READ_SIZE = 64 * 1024
+
+
+class ImportDataError(ValueError):
+    """Ошибка формата входных данных"""
+
+
+def open_input(path, encoding=None):
+    """Открывает файл с определением кодировки по BOM (фикстуры проекта в UTF-16)"""
+    if encoding is None:
+        with open(path, "rb") as f:
+            head = f.read(4)
+        if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            encoding = "utf-16"
+        else:
+            encoding = "utf-8-sig"
+    return open(path, encoding=encoding, newline="")
+
+
+def iter_json_array(stream, read_size=READ_SIZE):
+    """Потоковый разбор JSON-массива: объекты отдаются по мере чтения файла"""
+    decoder = json.JSONDecoder()
+    buffer, pos, started = "", 0, False
+    while True:
+        chunk = stream.read(read_size)
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buffer):
+                break
+            if not started:
+                if buffer[pos] != "[":
+                    raise ImportDataError("JSON input must be an array")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                item, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if not chunk:
+                    raise ImportDataError(f"Malformed JSON near: {buffer[pos:pos + 80]!r}")
+                # объект не дочитан, нужен следующий блок
+                break
+            yield item
+        if not chunk:
+            raise ImportDataError("Unexpected end of JSON input")
+
+
+def iter_ndjson(stream):
+    for number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if line:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ImportDataError(f"Line {number}: {exc}")
+
+
+def iter_records(stream, input_format, model=None):
+    """Записи вида (модель, исходный id, поля) из фикстур Django или плоских объектов"""
+    if input_format == "csv":
+        items = csv.DictReader(stream)
+    elif input_format == "ndjson":
+        items = iter_ndjson(stream)
+    else:
+        items = iter_json_array(stream)
+
+    for item in items:
+        if "model" in item and "fields" in item:
+            if item["model"] not in MODEL_LABELS:
+                continue
+            yield MODEL_LABELS[item["model"]], item.get("pk"), item["fields"]
+        else:
+            if model is None:
+                raise ImportDataError("Flat records require the model to be specified")
+            fields = dict(item)
+            source_pk = fields.pop("id", None)
+            yield model, source_pk, fields
+
+
+class BulkImporter:
+    """Пакетная загрузка записей через bulk_create.
+
+    Ссылки executor и parental_task переводятся из исходных id в новые
+    по словарю соответствия. Ссылки на родительские задачи проставляются
+    после загрузки всех задач, поэтому порядок задач во входных данных не важен.
+    Ссылки, которых нет среди загруженных записей, ищутся среди существующих строк.
+    Ссылки на родительские задачи, замыкающие цикл, не проставляются.
+    Загрузка выполняется в одной транзакции: при ошибке в середине файла
+    уже записанные пакеты откатываются, частично загруженных данных без
+    ссылок на родителей не остается, и файл можно загрузить повторно.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, report=None):
+        self.batch_size = batch_size
+        self.report = report or (lambda message: None)
+        self.id_maps = {name: {} for name in MODELS}
+        self.pending = {name: [] for name in MODELS}
+        self.pending_parents = []
+        self.counts = {name: 0 for name in MODELS}
+        self.unresolved = 0
+        self.cycles = 0
+        self.started = time.monotonic()
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    @property
+    def rate(self):
+        return self.total / max(time.monotonic() - self.started, 1e-9)
+
+    def add(self, name, source_pk, fields):
+        self.pending[name].append((source_pk, self.to_python(MODELS[name], fields)))
+        if len(self.pending[name]) >= self.batch_size:
+            self.flush(name)
+
+    @staticmethod
+    def to_python(model, fields):
+        values = {}
+        for name, value in fields.items():
+            field = model._meta.get_field(name)
+            if value == "" and field.null:
+                value = None
+            if field.is_relation:
+                values[field.attname] = int(value) if value is not None else None
+            else:
+                values[field.attname] = field.to_python(value)
+        return values
+
+    def resolve(self, values, attname, id_map, existing):
+        source_pk = values.get(attname)
+        if source_pk is None:
+            return
+        if source_pk in id_map:
+            values[attname] = id_map[source_pk]
+        elif source_pk not in existing:
+            values[attname] = None
+            self.unresolved += 1
+
+    @staticmethod
+    def existing_pks(model, pks):
+        pks = {pk for pk in pks if pk is not None}
+        if not pks:
+            return set()
+        return set(model.objects.filter(pk__in=pks).values_list("pk", flat=True))
+
+    def flush(self, name):
+        batch, self.pending[name] = self.pending[name], []
+        if not batch:
+            return
+        if name == "tasks":
+            # исполнители должны получить новые id раньше задач
+            self.flush("employees")
+            employee_map = self.id_maps["employees"]
+            existing_employees = self.existing_pks(
+                Employee, (values.get("executor_id") for _, values in batch
+                           if values.get("executor_id") not in employee_map)
+            )
+            existing_owners = self.existing_pks(User, (values.get("owner_id") for _, values in batch))
+            for _, values in batch:
+                self.resolve(values, "executor_id", employee_map, existing_employees)
+                self.resolve(values, "owner_id", {}, existing_owners)
+
+        model = MODELS[name]
+        instances = []
+        for _, values in batch:
+            parent = values.pop("parental_task_id", None)
+            instances.append((model(**values), parent))
+        created = model.objects.bulk_create([instance for instance, _ in instances])
+
+        id_map = self.id_maps[name]
+        for (source_pk, _), instance, (_, parent) in zip(batch, created, instances):
+            if source_pk is not None:
+                id_map[int(source_pk)] = instance.pk
+            if parent is not None:
+                self.pending_parents.append((instance.pk, parent))
+        self.counts[name] += len(created)
+        self.report(f"{name}: {self.counts[name]} rows, {self.rate:.0f} rows/sec")
+
+    def link_parents(self):
+        """Проставляет родительские задачи пакетами после загрузки всех задач.
+
+        Родители пакета проверяются find_cycles одним запросом, вместе
+        с уже проставленными в предыдущих пакетах."""
+        task_map = self.id_maps["tasks"]
+        pending, self.pending_parents = self.pending_parents, []
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            existing = self.existing_pks(Task, (parent for _, parent in batch if parent not in task_map))
+            parents = {}
+            for pk, parent in batch:
+                values = {"parental_task_id": parent}
+                self.resolve(values, "parental_task_id", task_map, existing)
+                if values["parental_task_id"] is not None:
+                    parents[pk] = values["parental_task_id"]
+            cycles = find_cycles(parents)
+            self.cycles += len(cycles)
+            tasks = [Task(pk=pk, parental_task_id=parent) for pk, parent in parents.items() if pk not in cycles]
+            Task.objects.bulk_update(tasks, ["parental_task"])
+
+    def finish(self):
+        self.flush("employees")
+        self.flush("tasks")
+        self.link_parents()
+        return self.counts
+
+    def run(self, records):
+        with transaction.atomic():
+            for name, source_pk, fields in records:
+                self.add(name, source_pk, fields)
+            return self.finish()
@@ -0,0 +1,203 @@
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("ttracker.performance")
+
+# Команды управления транзакциями не считаются запросами
+SERVICE_STATEMENTS = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE SAVEPOINT")
+
+
+class QueryBudgetExceeded(Exception):
+    """Представление выполнило больше запросов к БД, чем разрешено query_budget"""
+
+
+class RequestMetrics:
+    """Метрики одного запроса: число и время SQL-запросов, время сериализации"""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.total_time = 0.0
+        self.response_size = None
+        self.view = None
+        self.query_budget = None
+        self.started = time.perf_counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обертка выполнения запросов (connection.execute_wrapper)"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if not sql.lstrip().upper().startswith(SERVICE_STATEMENTS):
+                self.queries += 1
+                self.sql_time += time.perf_counter() - started
+
+    @property
+    def view_name(self):
+        return self.view.__name__ if self.view else None
+
+    def server_timing(self):
+        return ", ".join([
+            f'db;dur={self.sql_time * 1000:.2f};desc="{self.queries} queries"',
+            f"serializer;dur={self.serializer_time * 1000:.2f}",
+            f"total;dur={self.total_time * 1000:.2f}",
+        ])
+
+    def as_dict(self):
+        return {
+            "view": self.view_name,
+            "queries": self.queries,
+            "query_budget": self.query_budget,
+            "sql_ms": round(self.sql_time * 1000, 3),
+            "serializer_ms": round(self.serializer_time * 1000, 3),
+            "total_ms": round(self.total_time * 1000, 3),
+            "response_size": self.response_size,
+        }
+
+
+class QueryMetricsMiddleware:
+    """Считает запросы к БД и время обработки каждого запроса.
+
+    Метрики отдаются в заголовке Server-Timing и пишутся в лог
+    ttracker.performance. Если представление превысило query_budget,
+    превышение пишется в лог или вызывает QueryBudgetExceeded
+    (настройка TTRACKER_QUERY_BUDGET_ACTION: "log" или "raise").
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        request.query_metrics = metrics
+        with ExitStack() as stack:
+            # все соединения, а не только открытые: соединение, впервые
+            # открытое в этом запросе, тоже должно считаться
+            self.attach(stack, metrics, connections.all())
+            response = self.get_response(request)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        """Под ASGI запросы ORM выполняются в потоке sync_to_async (thread_sensitive,
+        один поток на запрос), обертки подключаются к соединениям этого потока"""
+        metrics = RequestMetrics()
+        request.query_metrics = metrics
+        stack = ExitStack()
+        await sync_to_async(lambda: self.attach(stack, metrics, connections.all()))()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, metrics)
+
+    @staticmethod
+    def attach(stack, metrics, databases):
+        for connection in databases:
+            stack.enter_context(connection.execute_wrapper(metrics))
+
+    def finish(self, request, response, metrics):
+        metrics.total_time = time.perf_counter() - metrics.started
+        if not response.streaming:
+            metrics.response_size = len(response.content)
+
+        response["Server-Timing"] = metrics.server_timing()
+        response.query_metrics = metrics
+        self.log(request, response, metrics)
+        self.check_budget(request, metrics)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_metrics.view = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+
+    @staticmethod
+    def log(request, response, metrics):
+        # запись по каждому запросу собирается, только если уровень INFO включен
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        record = dict(metrics.as_dict(), method=request.method, path=request.path, status=response.status_code)
+        logger.info(json.dumps(record, ensure_ascii=False), extra={"metrics": record})
+
+    @staticmethod
+    def check_budget(request, metrics):
+        budget = metrics.query_budget
+        if budget is None or metrics.queries <= budget:
+            return
+        message = (f"{metrics.view_name} executed {metrics.queries} queries "
+                   f"with a budget of {budget} ({request.method} {request.path})")
+        if settings.TTRACKER_QUERY_BUDGET_ACTION == "raise":
+            raise QueryBudgetExceeded(message)
+        logger.warning(message, extra={"metrics": metrics.as_dict()})
+
+
+class QueryBudgetMixin:
+    """Бюджет запросов к БД для представлений DRF.
+
+    query_budget - максимальное число запросов к БД за один HTTP-запрос,
+    включая аутентификацию. Для потоковых ответов учитываются только запросы
+    до начала отдачи тела.
+    """
+
+    query_budget = None
+
+    def get_query_budget(self):
+        return self.query_budget
+
+    def initial(self, request, *args, **kwargs):
+        metrics = getattr(request, "query_metrics", None)
+        if metrics is not None:
+            metrics.query_budget = self.get_query_budget()
+        super().initial(request, *args, **kwargs)
+
+
+class InstrumentedViewMixin(QueryBudgetMixin):
+    """Бюджет запросов и учет времени сериализации для GenericAPIView.
+
+    Время сериализации - от создания сериализатора (get_serializer) до
+    готового ответа (finalize_response) без SQL-запросов за это время:
+    построение data, а для записи еще и проверка входных данных.
+    """
+
+    _serializer_started = None
+
+    def get_serializer(self, *args, **kwargs):
+        metrics = getattr(self.request, "query_metrics", None)
+        if metrics is not None and self._serializer_started is None:
+            self._serializer_started = (time.perf_counter(), metrics.sql_time)
+        return super().get_serializer(*args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        metrics = getattr(request, "query_metrics", None)
+        if metrics is not None and self._serializer_started is not None:
+            started, sql_time = self._serializer_started
+            elapsed = time.perf_counter() - started - (metrics.sql_time - sql_time)
+            metrics.serializer_time += max(elapsed, 0.0)
+            self._serializer_started = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class QueryBudgetAssertionsMixin:
+    """Проверки бюджета запросов для тестов"""
+
+    def assertWithinQueryBudget(self, response, budget=None):
+        metrics = response.query_metrics
+        budget = budget if budget is not None else metrics.query_budget
+        self.assertIsNotNone(budget, f"{metrics.view_name} has no query budget")
+        self.assertLessEqual(
+            metrics.queries, budget,
+            f"{metrics.view_name} executed {metrics.queries} queries with a budget of {budget}"
+        )
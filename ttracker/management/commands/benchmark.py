@@ -0,0 +1,66 @@
+from django.core.management import BaseCommand, CommandError
+
+from ttracker import benchmarks
+
+
+class Command(BaseCommand):
+    help = ("Замеры задержки и числа запросов всех маршрутов ttracker и users "
+            "на временной БД с синтетическими данными")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[10000],
+                            help="число задач, например --sizes 10000 100000 1000000")
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--routes", nargs="+", help="замерить только указанные маршруты")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--workers", type=int, default=1, help="процессы для генерации данных")
+        parser.add_argument("--cache", action="store_true", help="не очищать кеш ответов между запросами")
+        parser.add_argument("--save", help="сохранить результаты в JSON как новую базу")
+        parser.add_argument("--baseline", help="сравнить с сохраненной базой")
+        parser.add_argument("--threshold", type=float, default=0.2,
+                            help="допустимый рост p95 относительно базы (доля)")
+        modes = parser.add_mutually_exclusive_group()
+        for mode in benchmarks.MODES:
+            modes.add_argument(mode.flag, **mode.argument)
+        parser.add_argument("--requests", type=int, default=500, help="запросов на маршрут для --concurrency")
+        parser.add_argument("--threads", type=int, default=4, help="потоков WSGI-воркера для --concurrency")
+        parser.add_argument("--client-delay", type=float, default=50,
+                            help="время чтения ответа медленным клиентом, мс (для --concurrency)")
+
+    def handle(self, *args, **options):
+        mode = next((mode for mode in benchmarks.MODES if options[mode.dest]), None)
+        if mode is None:
+            self.run_routes(options)
+        elif mode.uses_db:
+            with benchmarks.temporary_database():
+                mode.run(options, self.stdout.write)
+        else:
+            mode.run(options, self.stdout.write)
+
+    def run_routes(self, options):
+        """Режим по умолчанию: все маршруты, с сохранением и сравнением базы"""
+        routes = benchmarks.ROUTES
+        if options["routes"]:
+            routes = [route for route in routes if route.name in options["routes"]]
+            if not routes:
+                raise CommandError("No matching routes")
+
+        with benchmarks.temporary_database():
+            results = benchmarks.run(
+                options["sizes"],
+                repeat=options["repeat"],
+                routes=routes,
+                use_cache=options["cache"],
+                seed_value=options["seed"],
+                workers=options["workers"],
+                report=self.stdout.write,
+            )
+
+        if options["save"]:
+            benchmarks.save(results, options["save"])
+            self.stdout.write(f"Baseline saved: {options['save']}")
+        if options["baseline"]:
+            regressions = benchmarks.compare(results, benchmarks.load(options["baseline"]), options["threshold"])
+            if regressions:
+                raise CommandError("Performance regressions:\n" + "\n".join(regressions))
+            self.stdout.write("No regressions against baseline")
@@ -0,0 +1,33 @@
+from django.core.management import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from ttracker.exporters import CHUNK_SIZE, EXPORTS, FORMATS, render
+from ttracker.fieldsets import parse_fieldset
+
+
+class Command(BaseCommand):
+    help = "Потоковая выгрузка задач или сотрудников в ndjson/csv"
+
+    def add_arguments(self, parser):
+        parser.add_argument("model", choices=sorted(EXPORTS))
+        parser.add_argument("--format", dest="output_format", choices=sorted(FORMATS), default="ndjson")
+        parser.add_argument("--output", help="файл для записи, по умолчанию stdout")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+        parser.add_argument("--fields", help="выгружаемые поля через запятую, по умолчанию все")
+
+    def handle(self, *args, **options):
+        fieldset = None
+        if options["fields"]:
+            try:
+                fieldset = parse_fieldset({"fields": options["fields"]}, EXPORTS[options["model"]].output_fields())
+            except ValidationError as exc:
+                raise CommandError(exc.detail["fields"][0])
+        chunks = render(options["model"], options["output_format"], chunk_size=options["chunk_size"],
+                        fieldset=fieldset)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8", newline="") as f:
+                f.writelines(chunks)
+            self.stderr.write(f"Export successfully written: {options['output']}")
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
@@ -1,51 +1,35 @@
-import random
-import json
-from jinja2 import Template
 from django.core.management import BaseCommand
 
+from ttracker.generators import CHUNK_SIZE, DataGenerator
 
-class Command(BaseCommand):
-
-    def handle(self, *args, **kwargs):
-        fixture_template = """
-        [
-            {% for i in range(10) %}
-            {
-                "model": "ttracker.employee",
-                "pk": {{ i + 1 }},
-                "fields": {
-                    "name": "{{ random_choice(['Иванов', 'Петров', 'Сидоров', 'Кузнецов', 'Смирнов', 'Попов', 'Александров', 'Фёдоров', 'Морозов', 'Соколов']) }} {{ random_choice(['Алексей', 'Иван', 'Петр', 'Дмитрий', 'Александр', 'Сергей', 'Олег', 'Максим']) }} {{ random_choice(['Алексеевич', 'Иванович', 'Петрович', 'Сергеевич', 'Александрович', 'Олегович', 'Максимович']) }}",
-                    "position": "{{ 'category 1' if i < 3 else ('category 2' if i < 6 else 'category 3') }}",
-                    "email": "user{{ i+1 }}@mail.ru",
-                    "phone_number": "+79{{ random_digits(9) }}",
-                    "vacation_status": {{ random_choice([true, false])|lower }}
-                }
-            }{% if not loop.last %},{% endif %}
-            {% endfor %}
-        ]
-        """
-
-    # Функции для генерации случайных данных
-        def random_choice(choices):
-            return random.choice(choices)
-
-        def random_digits(n):
-            return ''.join(str(random.randint(0, 9)) for _ in range(n))
-
-        # Подготовка данных для шаблона
-        context = {
-            'random_choice': random_choice,
-            'random_digits': random_digits,
-        }
 
-        # Создание шаблона Jinja
-        template = Template(fixture_template)
-
-        # Генерация контента
-        generated_fixture = template.render(context)
-
-        # Запись результата в JSON файл
-        with open('employees_fixture.json', 'w') as f:
-            f.write(generated_fixture)
-
-        print("Fixture successfully generated: employees_fixture.json")
\ No newline at end of file
+class Command(BaseCommand):
+    help = "Генерация сотрудников и задач для нагрузочного тестирования"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", type=int, default=10)
+        parser.add_argument("--tasks", type=int, default=0)
+        parser.add_argument("--seed", type=int, default=0, help="одинаковое зерно дает одинаковые данные")
+        parser.add_argument("--output", default="employees_fixture.json")
+        parser.add_argument("--format", dest="output_format", choices=("json", "ndjson"), default="json",
+                            help="json - фикстура для loaddata, ndjson - по объекту на строку для import_tasks")
+        parser.add_argument("--database", action="store_true", help="записать данные напрямую в БД")
+        parser.add_argument("--workers", type=int, default=1)
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        generator = DataGenerator(
+            employees=options["employees"],
+            tasks=options["tasks"],
+            seed=options["seed"],
+            chunk_size=options["chunk_size"],
+            workers=options["workers"],
+        )
+        if options["database"]:
+            created = generator.insert()
+            self.stdout.write(f"{created} rows successfully written to the database")
+            return
+
+        with open(options["output"], "w", encoding="utf-8") as f:
+            generator.write(f, options["output_format"])
+        self.stdout.write(f"Fixture successfully generated: {options['output']}")
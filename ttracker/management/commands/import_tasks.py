@@ -0,0 +1,41 @@
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.management import BaseCommand, CommandError
+
+from ttracker.importers import BATCH_SIZE, FORMATS, MODELS, BulkImporter, ImportDataError, iter_records, open_input
+
+
+class Command(BaseCommand):
+    help = "Потоковая загрузка задач и сотрудников из json/ndjson/csv пакетами через bulk_create"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="файл фикстуры Django, ndjson или csv")
+        parser.add_argument("--format", dest="input_format", choices=FORMATS,
+                            help="формат файла, по умолчанию определяется по расширению")
+        parser.add_argument("--model", choices=sorted(MODELS),
+                            help="модель для плоских записей (ndjson/csv без поля model)")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument("--encoding", help="кодировка файла, по умолчанию определяется по BOM")
+
+    def handle(self, *args, **options):
+        input_format = options["input_format"] or options["path"].rsplit(".", 1)[-1].lower()
+        if input_format not in FORMATS:
+            raise CommandError(f"Unknown input format: {input_format}")
+
+        importer = BulkImporter(
+            batch_size=options["batch_size"],
+            report=lambda message: self.stderr.write(message) if options["verbosity"] > 1 else None,
+        )
+        try:
+            with open_input(options["path"], options["encoding"]) as stream:
+                counts = importer.run(iter_records(stream, input_format, options["model"]))
+        except (ImportDataError, FieldDoesNotExist, ValidationError, ValueError, LookupError) as exc:
+            raise CommandError(exc)
+
+        self.stdout.write(
+            f"Imported {counts['employees']} employees and {counts['tasks']} tasks "
+            f"({importer.rate:.0f} rows/sec)"
+        )
+        if importer.unresolved:
+            self.stdout.write(f"{importer.unresolved} references were not found and set to null")
+        if importer.cycles:
+            self.stdout.write(f"{importer.cycles} parent references would form a cycle and were set to null")
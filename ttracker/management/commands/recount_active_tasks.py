@@ -0,0 +1,40 @@
+from django.core.management import BaseCommand, CommandError
+from django.db.models import Count
+
+from ttracker.models import Employee, Task, rebuild_active_task_counts
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает счетчики задач в исполнении у сотрудников и находит расхождения"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="только проверить расхождения, не исправляя их",
+        )
+
+    def handle(self, *args, **options):
+        actual = dict(
+            Task.objects.filter(status=Task.STATUS_IN_PROGRESS, executor__isnull=False)
+            .order_by()
+            .values("executor")
+            .annotate(count=Count("id"))
+            .values_list("executor", "count")
+        )
+        drift = [
+            (pk, stored, actual.get(pk, 0))
+            for pk, stored in Employee.objects.values_list("pk", "active_task_count").iterator()
+            if stored != actual.get(pk, 0)
+        ]
+        for pk, stored, expected in drift:
+            self.stdout.write(f"Employee {pk}: stored {stored}, actual {expected}")
+
+        if options["check"]:
+            if drift:
+                raise CommandError(f"Active task counters drifted for {len(drift)} employees")
+            self.stdout.write("Active task counters are consistent")
+            return
+
+        rebuild_active_task_counts()
+        self.stdout.write(f"Active task counters rebuilt, fixed {len(drift)} employees")
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.7 on 2026-10-18 08:43
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_active_task_count(apps, schema_editor):
+    Employee = apps.get_model("ttracker", "Employee")
+    Task = apps.get_model("ttracker", "Task")
+    counts = Task.objects.filter(
+        executor=OuterRef("pk"), status="in_progress"
+    ).order_by().values("executor").annotate(count=Count("id")).values("count")
+    Employee.objects.update(active_task_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ttracker", "0006_task_deadline_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="employee",
+            name="active_task_count",
+            field=models.IntegerField(
+                default=0,
+                editable=False,
+                help_text="поддерживается автоматически при изменении задач",
+                verbose_name="Задач в исполнении",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=models.Index(
+                fields=["-active_task_count", "id"], name="employee_load_idx"
+            ),
+        ),
+        migrations.RunPython(fill_active_task_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.0.7 on 2026-10-18 09:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ttracker", "0007_employee_active_task_count"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AssignmentSuggestion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "strategy",
+                    models.CharField(
+                        max_length=20, verbose_name="Стратегия распределения"
+                    ),
+                ),
+                (
+                    "position",
+                    models.PositiveIntegerField(verbose_name="Порядковый номер"),
+                ),
+                ("computed_at", models.DateTimeField(verbose_name="Время расчета")),
+                (
+                    "employee",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="ttracker.employee",
+                        verbose_name="Исполнитель",
+                    ),
+                ),
+                (
+                    "task",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="ttracker.task",
+                        verbose_name="Задача",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Предложение исполнителя",
+                "verbose_name_plural": "Предложения исполнителей",
+                "indexes": [
+                    models.Index(
+                        fields=["strategy", "position"],
+                        name="suggestion_strategy_pos_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="assignmentsuggestion",
+            constraint=models.UniqueConstraint(
+                fields=("strategy", "task"), name="suggestion_strategy_task_uniq"
+            ),
+        ),
+    ]
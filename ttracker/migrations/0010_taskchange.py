@@ -0,0 +1,58 @@
+# Generated by Django 5.0.7 on 2026-10-18 09:17
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_task_changes(apps, schema_editor):
+    """Существующие задачи попадают в журнал, чтобы since=0 выдавал все задачи"""
+    Task = apps.get_model("ttracker", "Task")
+    TaskChange = apps.get_model("ttracker", "TaskChange")
+    changed_at = timezone.now()
+    batch = []
+    for task_id in Task.objects.order_by("id").values_list("id", flat=True).iterator(chunk_size=5000):
+        batch.append(TaskChange(task_id=task_id, changed_at=changed_at))
+        if len(batch) == 5000:
+            TaskChange.objects.bulk_create(batch)
+            batch = []
+    TaskChange.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ttracker", "0009_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskChange",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("task_id", models.BigIntegerField(verbose_name="Задача")),
+                ("deleted", models.BooleanField(default=False, verbose_name="Удалена")),
+                (
+                    "changed_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Время изменения"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Изменение задачи",
+                "verbose_name_plural": "Журнал изменений задач",
+                "indexes": [
+                    models.Index(fields=["task_id", "id"], name="taskchange_task_idx")
+                ],
+            },
+        ),
+        migrations.RunPython(fill_task_changes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,144 @@
+# Generated by Django 5.0.7 on 2026-10-18 09:19
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# PostgreSQL: поисковый вектор задачи поддерживается триггером (в том числе
+# при update, bulk_create и загрузке данных), GIN-индексы по вектору и по
+# триграммам ФИО сотрудника (выражение совпадает с UPPER(name::text) из
+# icontains, поэтому индекс используется и фильтром search)
+POSTGRES_FORWARD = [
+    """
+    CREATE FUNCTION ttracker_task_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('russian', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('russian', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER ttracker_task_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description ON ttracker_task
+    FOR EACH ROW EXECUTE FUNCTION ttracker_task_search_vector()
+    """,
+    """
+    UPDATE ttracker_task SET search_vector =
+        setweight(to_tsvector('russian', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(description, '')), 'B')
+    """,
+    "CREATE INDEX task_search_vector_idx ON ttracker_task USING gin (search_vector)",
+    "CREATE INDEX employee_name_trgm_idx ON ttracker_employee USING gin (UPPER(name::text) gin_trgm_ops)",
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS employee_name_trgm_idx",
+    "DROP INDEX IF EXISTS task_search_vector_idx",
+    "DROP TRIGGER IF EXISTS ttracker_task_search_vector_trigger ON ttracker_task",
+    "DROP FUNCTION IF EXISTS ttracker_task_search_vector()",
+]
+
+# SQLite (тесты и локальный запуск): внешние таблицы FTS5 с триггерами.
+# Пересоздание ttracker_task схемой SQLite удаляет триггеры, такие миграции
+# должны создавать их заново
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE ttracker_task_fts USING fts5(
+        title, description, content='ttracker_task', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER ttracker_task_fts_insert AFTER INSERT ON ttracker_task BEGIN
+        INSERT INTO ttracker_task_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER ttracker_task_fts_delete AFTER DELETE ON ttracker_task BEGIN
+        INSERT INTO ttracker_task_fts (ttracker_task_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER ttracker_task_fts_update AFTER UPDATE OF title, description ON ttracker_task BEGIN
+        INSERT INTO ttracker_task_fts (ttracker_task_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO ttracker_task_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    "INSERT INTO ttracker_task_fts (ttracker_task_fts) VALUES ('rebuild')",
+    """
+    CREATE VIRTUAL TABLE ttracker_employee_fts USING fts5(
+        name, content='ttracker_employee', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER ttracker_employee_fts_insert AFTER INSERT ON ttracker_employee BEGIN
+        INSERT INTO ttracker_employee_fts (rowid, name) VALUES (new.id, new.name);
+    END
+    """,
+    """
+    CREATE TRIGGER ttracker_employee_fts_delete AFTER DELETE ON ttracker_employee BEGIN
+        INSERT INTO ttracker_employee_fts (ttracker_employee_fts, rowid, name) VALUES ('delete', old.id, old.name);
+    END
+    """,
+    """
+    CREATE TRIGGER ttracker_employee_fts_update AFTER UPDATE OF name ON ttracker_employee BEGIN
+        INSERT INTO ttracker_employee_fts (ttracker_employee_fts, rowid, name) VALUES ('delete', old.id, old.name);
+        INSERT INTO ttracker_employee_fts (rowid, name) VALUES (new.id, new.name);
+    END
+    """,
+    "INSERT INTO ttracker_employee_fts (ttracker_employee_fts) VALUES ('rebuild')",
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS ttracker_employee_fts_update",
+    "DROP TRIGGER IF EXISTS ttracker_employee_fts_delete",
+    "DROP TRIGGER IF EXISTS ttracker_employee_fts_insert",
+    "DROP TABLE IF EXISTS ttracker_employee_fts",
+    "DROP TRIGGER IF EXISTS ttracker_task_fts_update",
+    "DROP TRIGGER IF EXISTS ttracker_task_fts_delete",
+    "DROP TRIGGER IF EXISTS ttracker_task_fts_insert",
+    "DROP TABLE IF EXISTS ttracker_task_fts",
+]
+
+STATEMENTS = {
+    "postgresql": (POSTGRES_FORWARD, POSTGRES_REVERSE),
+    "sqlite": (SQLITE_FORWARD, SQLITE_REVERSE),
+}
+
+
+def _execute(schema_editor, index):
+    statements = STATEMENTS.get(schema_editor.connection.vendor)
+    if statements is not None:
+        for sql in statements[index]:
+            schema_editor.execute(sql)
+
+
+def create_search(apps, schema_editor):
+    _execute(schema_editor, 0)
+
+
+def drop_search(apps, schema_editor):
+    _execute(schema_editor, 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ttracker", "0010_taskchange"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name="task",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False,
+                help_text="заполняется триггером БД из названия и описания (PostgreSQL)",
+                null=True,
+                verbose_name="Поисковый вектор",
+            ),
+        ),
+        migrations.RunPython(create_search, drop_search),
+    ]
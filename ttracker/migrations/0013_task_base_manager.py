@@ -0,0 +1,21 @@
+# Generated by Django 5.0.7 on 2026-10-18 09:44
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ttracker", "0012_task_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="task",
+            options={
+                "base_manager_name": "objects",
+                "verbose_name": "Задача",
+                "verbose_name_plural": "Задачи",
+            },
+        ),
+    ]
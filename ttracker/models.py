@@ -1,10 +1,28 @@
-from django.db import models
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.postgres.search import SearchVectorField
+from django.core.exceptions import ValidationError
+from django.db import connections, models, router, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from phonenumber_field.modelfields import PhoneNumberField
 
+from ttracker.cache import invalidate
 from users.models import User
 
 NULLABLE = {"blank": True, "null": True}
 
+# Накопитель изменений счетчиков внутри deferred_active_task_deltas
+_pending_deltas = ContextVar("pending_active_task_deltas", default=None)
+# Накопитель записей журнала изменений задач внутри deferred_task_changes
+_pending_changes = ContextVar("pending_task_changes", default=None)
+# Ключ транзакционной advisory-блокировки журнала изменений (PostgreSQL)
+TASK_CHANGES_LOCK_KEY = 7_310_010
+TASK_CHANGES_BATCH_SIZE = 1000
+
 
 class Employee(models.Model):
     POSITION_CAT1 = 'category 1'
@@ -45,13 +63,269 @@ class Employee(models.Model):
         verbose_name='Статус отпуска',
         help_text='статус нахождения в отпуске'
     )
+    active_task_count = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Задач в исполнении',
+        help_text='поддерживается автоматически при изменении задач'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name='Изменен',
+    )
 
     def __str__(self):
         return f'{self.name}, {self.position}, {self.email}'
 
+    def save(self, *args, **kwargs):
+        """Сохранение существующего сотрудника не записывает active_task_count.
+
+        Счетчик меняется F-выражениями при изменении задач, и значение,
+        загруженное вместе с сотрудником, может устареть к моменту сохранения.
+        Записать его можно только явно: save(update_fields=['active_task_count']).
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'active_task_count'
+            ]
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = 'Сотрудник'
         verbose_name_plural = 'Сотрудники'
+        indexes = [
+            models.Index(fields=['-active_task_count', 'id'], name='employee_load_idx'),
+        ]
+
+
+def apply_active_task_deltas(deltas):
+    """Изменяет счетчики задач в исполнении F-выражениями,
+    по одному запросу на каждое значение изменения.
+
+    Запросы по значениям изменения блокируют строки сотрудников в порядке,
+    не связанном с id, и две параллельные массовые операции с общими
+    сотрудниками могут заблокировать друг друга. Поэтому при нескольких
+    сотрудниках строки сначала блокируются одним SELECT ... FOR UPDATE
+    в порядке id (в SQLite запись и так последовательна, запроса нет).
+    """
+    pending = _pending_deltas.get()
+    if pending is not None:
+        pending.update(deltas)
+        return
+    employees_by_delta = defaultdict(list)
+    for employee_id, delta in deltas.items():
+        if employee_id is not None and delta:
+            employees_by_delta[delta].append(employee_id)
+    employee_ids = sorted(pk for pks in employees_by_delta.values() for pk in pks)
+    using = router.db_for_write(Employee)
+    if len(employee_ids) < 2 or not connections[using].features.has_select_for_update:
+        _update_active_task_counts(employees_by_delta)
+        return
+    with transaction.atomic(using=using):
+        list(Employee.objects.filter(pk__in=employee_ids).order_by('pk').select_for_update().values_list('pk'))
+        _update_active_task_counts(employees_by_delta)
+
+
+def _update_active_task_counts(employees_by_delta):
+    for delta, employee_ids in employees_by_delta.items():
+        Employee.objects.filter(pk__in=employee_ids).update(
+            active_task_count=F('active_task_count') + delta
+        )
+
+
+@contextmanager
+def deferred_active_task_deltas():
+    """Накапливает изменения счетчиков (например, из сигналов post_delete
+    по каждой задаче) и записывает их одним проходом при выходе из блока"""
+    if _pending_deltas.get() is not None:
+        yield
+        return
+    pending = Counter()
+    token = _pending_deltas.set(pending)
+    try:
+        yield
+    finally:
+        _pending_deltas.reset(token)
+    apply_active_task_deltas(pending)
+
+
+@contextmanager
+def skipped_active_task_deltas():
+    """Изменения счетчиков в блоке не записываются. Для загрузки большого
+    объема задач, после которой счетчики пересчитываются целиком
+    (rebuild_active_task_counts)"""
+    token = _pending_deltas.set(Counter())
+    try:
+        yield
+    finally:
+        _pending_deltas.reset(token)
+
+
+def rebuild_active_task_counts():
+    """Пересчитывает счетчики всех сотрудников одним UPDATE с подзапросом"""
+    counts = Task.objects.filter(
+        executor=OuterRef('pk'), status=Task.STATUS_IN_PROGRESS
+    ).order_by().values('executor').annotate(count=Count('id')).values('count')
+    Employee.objects.update(active_task_count=Coalesce(Subquery(counts), 0))
+    # массовый update не отправляет сигналов: закешированные ответы со счетчиками сбрасываются явно
+    invalidate('employee')
+
+
+def task_changes_lock_sql(connection):
+    """Начало INSERT в журнал: разделяемая блокировка журнала до конца транзакции (PostgreSQL).
+
+    id записи берется из последовательности при вставке, а видна запись
+    после фиксации, поэтому запись 10 может стать видна позже записи 11.
+    Писатели берут advisory-блокировку в разделяемом режиме в том же
+    запросе (CTE), до выделения id, и не мешают друг другу; чтение журнала
+    (changes_since) берет ее монопольно и ждет фиксации всех начатых записей.
+    В SQLite запись последовательна: блокировка базы держится до фиксации.
+    """
+    if connection.vendor != "postgresql":
+        return ""
+    return f"WITH task_changes_lock AS MATERIALIZED (SELECT pg_advisory_xact_lock_shared({TASK_CHANGES_LOCK_KEY})) "
+
+
+def _insert_task_changes(changes, using=None):
+    """Вставка записей журнала [(task_id, deleted)] под блокировкой журнала"""
+    connection = connections[using or router.db_for_write(TaskChange)]
+    prefix = task_changes_lock_sql(connection)
+    if not prefix:
+        TaskChange.objects.using(connection.alias).bulk_create(
+            [TaskChange(task_id=task_id, deleted=deleted) for task_id, deleted in changes],
+            batch_size=TASK_CHANGES_BATCH_SIZE,
+        )
+        return
+    table = connection.ops.quote_name(TaskChange._meta.db_table)
+    changed_at = timezone.now()
+    with connection.cursor() as cursor:
+        for start in range(0, len(changes), TASK_CHANGES_BATCH_SIZE):
+            batch = changes[start:start + TASK_CHANGES_BATCH_SIZE]
+            values = ", ".join(["(%s::bigint, %s::boolean, %s::timestamptz)"] * len(batch))
+            cursor.execute(
+                f"{prefix}INSERT INTO {table} (task_id, deleted, changed_at) "
+                f"SELECT v.task_id, v.deleted, v.changed_at FROM task_changes_lock, (VALUES {values}) "
+                f"v (task_id, deleted, changed_at)",
+                [param for task_id, deleted in batch for param in (task_id, deleted, changed_at)],
+            )
+
+
+def record_task_changes(task_ids, deleted=False):
+    """Добавляет изменения задач в журнал TaskChange одним запросом"""
+    pending = _pending_changes.get()
+    if pending is not None:
+        pending.extend((task_id, deleted) for task_id in task_ids)
+        return
+    changes = [(task_id, deleted) for task_id in task_ids if task_id is not None]
+    if changes:
+        _insert_task_changes(changes)
+
+
+@contextmanager
+def deferred_task_changes():
+    """Накапливает записи журнала (например, надгробия из сигналов post_delete
+    по каждой задаче) и записывает их одной вставкой при выходе из блока"""
+    if _pending_changes.get() is not None:
+        yield
+        return
+    pending = []
+    token = _pending_changes.set(pending)
+    try:
+        yield
+    finally:
+        _pending_changes.reset(token)
+    if pending:
+        _insert_task_changes(pending)
+
+
+class TaskQuerySet(models.QuerySet):
+    """Массовые операции с задачами поддерживают счетчики сотрудников,
+    журнал изменений TaskChange и сбрасывают кеш ответов, так как сигналы
+    моделей для них не отправляются.
+    bulk_update выполняется через update и отдельной обработки не требует.
+    При delete сигналы отправляются по каждой задаче, изменения счетчиков
+    и надгробия из них накапливаются и записываются вместе"""
+
+    COUNTED_FIELDS = {'status', 'executor', 'executor_id'}
+    BATCH_SIZE = 1000
+
+    def _counted_executors(self, pks):
+        """Исполнители задач в исполнении среди задач с указанными id"""
+        counter = Counter()
+        pks = list(pks)
+        for start in range(0, len(pks), self.BATCH_SIZE):
+            rows = Task.objects.filter(
+                pk__in=pks[start:start + self.BATCH_SIZE],
+                status=Task.STATUS_IN_PROGRESS,
+            ).select_for_update().values_list('executor_id', flat=True)
+            counter.update(rows)
+        return counter
+
+    def _record_changes(self):
+        """Записывает в журнал изменения всех задач запроса одним INSERT ... SELECT"""
+        connection = connections[self.db]
+        sql, params = self.order_by().values('pk').query.sql_with_params()
+        table = connection.ops.quote_name(TaskChange._meta.db_table)
+        prefix = task_changes_lock_sql(connection)
+        source = f'task_changes_lock, ({sql}) changed' if prefix else f'({sql}) changed'
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'{prefix}INSERT INTO {table} (task_id, deleted, changed_at) SELECT changed.id, %s, %s FROM {source}',
+                (False, timezone.now(), *params),
+            )
+
+    def update(self, **kwargs):
+        # auto_now не срабатывает при update, включая bulk_update
+        kwargs.setdefault('updated_at', timezone.now())
+        if not self.COUNTED_FIELDS.intersection(kwargs):
+            # без точки сохранения: ошибка любого из двух запросов откатывает внешнюю транзакцию
+            with transaction.atomic(using=self.db, savepoint=False):
+                # до update: после него задачи могут не попасть под фильтр запроса
+                self._record_changes()
+                rows = super().update(**kwargs)
+            invalidate('task', 'task:bulk')
+            return rows
+        with transaction.atomic(using=self.db):
+            pks = list(self.select_for_update(of=('self',)).values_list('pk', flat=True))
+            before = self._counted_executors(pks)
+            rows = super().update(**kwargs)
+            after = self._counted_executors(pks)
+            after.subtract(before)
+            apply_active_task_deltas(after)
+            record_task_changes(pks)
+        invalidate('task', 'task:bulk')
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            apply_active_task_deltas(Counter(
+                task.executor_id for task in objs if task.status == Task.STATUS_IN_PROGRESS
+            ))
+            record_task_changes([task.pk for task in objs])
+        invalidate('task', 'task:bulk')
+        return objs
+
+    def delete(self):
+        with transaction.atomic(using=self.db), deferred_active_task_deltas(), deferred_task_changes():
+            return super().delete()
+
+    def important(self):
+        """Открытые задачи, от которых зависят задачи в исполнении, по сроку"""
+        return self.filter(
+            status=Task.STATUS_OPEN,
+            parental_task__status=Task.STATUS_IN_PROGRESS
+        ).select_related('parental_task').order_by('deadline')
+
+
+class TaskManager(models.Manager.from_queryset(TaskQuerySet)):
+    """Задачи загружаются без поискового вектора: он нужен только фильтрам
+    поиска, а по размеру сравним с остальными полями задачи вместе"""
+
+    def get_queryset(self):
+        return super().get_queryset().defer('search_vector')
 
 
 class Task(models.Model):
@@ -106,12 +380,137 @@ class Task(models.Model):
         on_delete=models.CASCADE,
         verbose_name="Создатель",
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name='Изменена',
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='Поисковый вектор',
+        help_text='заполняется триггером БД из названия и описания (PostgreSQL)'
+    )
+
+    objects = TaskManager()
 
     def __str__(self):
         return f'{self.title}: {self.status}'
 
+    @property
+    def counted_executor_id(self):
+        """Сотрудник, в счетчик которого входит задача"""
+        if self.status == self.STATUS_IN_PROGRESS:
+            return self.executor_id
+        return None
+
+    def clean(self):
+        """Родительская задача не может быть самой задачей или ее потомком"""
+        # ttracker.tree импортирует модели, поэтому импорт внутри метода
+        from ttracker.tree import find_cycles
+        from ttracker.validators import CYCLE_ERROR
+
+        if self.pk is not None and find_cycles({self.pk: self.parental_task_id}):
+            raise ValidationError({'parental_task': CYCLE_ERROR})
+
+    def save(self, *args, **kwargs):
+        """Сохранение со счетчиком исполнителя и проверкой циклов.
+
+        Текущие статус, исполнитель и родитель задачи читаются одним
+        запросом с блокировкой строки; новая родительская задача проверяется
+        find_cycles, цикл вызывает ValidationError, как в clean().
+        """
+        update_fields = kwargs.get('update_fields')
+        counted = update_fields is None or TaskQuerySet.COUNTED_FIELDS.intersection(update_fields)
+        parent_saved = 'parental_task_id' not in self.get_deferred_fields() and (
+            update_fields is None or {'parental_task', 'parental_task_id'}.intersection(update_fields)
+        )
+        if not counted and not parent_saved:
+            return super().save(*args, **kwargs)
+
+        with transaction.atomic(using=kwargs.get('using')):
+            previous = None
+            if not self._state.adding:
+                row = Task.objects.filter(pk=self.pk).select_for_update().values_list(
+                    'status', 'executor_id', 'parental_task_id'
+                ).first()
+                if row and row[0] == self.STATUS_IN_PROGRESS:
+                    previous = row[1]
+                if row and parent_saved and self.parental_task_id not in (None, row[2]):
+                    self.clean()
+            super().save(*args, **kwargs)
+            current = self.counted_executor_id if counted else previous
+            if previous != current:
+                apply_active_task_deltas({previous: -1, current: 1})
+
     class Meta:
         verbose_name = 'Задача'
         verbose_name_plural = 'Задачи'
+        # SET_NULL подзадач при удалении родителя выполняется через update
+        # базового менеджера: TaskQuerySet.update ставит updated_at, пишет
+        # журнал изменений и сбрасывает кеш подзадач
+        base_manager_name = 'objects'
+        indexes = [
+            models.Index(fields=['status', 'deadline'], name='task_status_deadline_idx'),
+            models.Index(fields=['executor', 'status'], name='task_executor_status_idx'),
+            models.Index(fields=['parental_task', 'status'], name='task_parent_status_idx'),
+            models.Index(
+                fields=['deadline'],
+                condition=models.Q(status='open'),
+                name='task_open_deadline_idx'
+            ),
+            models.Index(fields=['title'], name='task_title_idx'),
+            models.Index(fields=['deadline', 'id'], name='task_deadline_id_idx'),
+            models.Index(fields=['executor', 'deadline'], name='task_executor_deadline_idx'),
+            models.Index(fields=['owner', 'deadline'], name='task_owner_deadline_idx'),
+        ]
+
+
+class AssignmentSuggestion(models.Model):
+    """Предложенный исполнитель важной задачи, рассчитывается фоновой задачей
+    ttracker.tasks.compute_assignment_suggestions для каждой стратегии"""
 
+    strategy = models.CharField(max_length=20, verbose_name='Стратегия распределения')
+    position = models.PositiveIntegerField(verbose_name='Порядковый номер')
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, verbose_name='Задача')
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, verbose_name='Исполнитель')
+    computed_at = models.DateTimeField(verbose_name='Время расчета')
+
+    def __str__(self):
+        return f'{self.task_id} -> {self.employee_id} ({self.strategy})'
+
+    class Meta:
+        verbose_name = 'Предложение исполнителя'
+        verbose_name_plural = 'Предложения исполнителей'
+        constraints = [
+            models.UniqueConstraint(fields=['strategy', 'task'], name='suggestion_strategy_task_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['strategy', 'position'], name='suggestion_strategy_pos_idx'),
+        ]
 
+
+class TaskChange(models.Model):
+    """Журнал изменений задач для дельта-синхронизации клиентов.
+
+    Каждое создание, изменение и удаление задачи добавляет запись, id записи -
+    курсор изменений (первичный ключ служит индексом по курсору). Чтение
+    журнала дожидается фиксации начатых записей (см. task_changes_lock_sql),
+    поэтому запись с id меньше выданного клиенту курсора уже не появится.
+    Записи с deleted - надгробия удаленных задач. Старые записи задачи,
+    перекрытые более новыми, удаляются фоновой задачей compact_task_changes.
+    """
+
+    task_id = models.BigIntegerField(verbose_name='Задача')
+    deleted = models.BooleanField(default=False, verbose_name='Удалена')
+    changed_at = models.DateTimeField(auto_now_add=True, verbose_name='Время изменения')
+
+    def __str__(self):
+        return f'{self.pk}: {self.task_id}{" (удалена)" if self.deleted else ""}'
+
+    class Meta:
+        verbose_name = 'Изменение задачи'
+        verbose_name_plural = 'Журнал изменений задач'
+        indexes = [
+            models.Index(fields=['task_id', 'id'], name='taskchange_task_idx'),
+        ]
@@ -1,5 +1,176 @@
-from rest_framework.pagination import PageNumberPagination
+from base64 import b64decode, b64encode
+from datetime import date
+from urllib import parse
 
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
-class TaskListPagination(PageNumberPagination):
+
+def positive_int(value, cutoff=None):
+    """Положительное целое из параметра запроса, не больше cutoff.
+    Для нуля, отрицательных чисел и не чисел - ValueError"""
+    value = int(value)
+    if value <= 0:
+        raise ValueError(value)
+    if cutoff:
+        return min(value, cutoff)
+    return value
+
+
+class AsyncPageNumberPagination(PageNumberPagination):
+    """Постраничный вывод с асинхронной версией paginate_queryset
+    для асинхронных представлений (acount и aiterator)"""
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # count у Paginator - cached_property, значение подставляется заранее
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+
+        # chunk_size по размеру страницы: prefetch_related выполняется одним запросом
+        self.page.object_list = [obj async for obj in self.page.object_list.aiterator(chunk_size=page_size)]
+        return list(self.page)
+
+
+class TaskListPagination(AsyncPageNumberPagination):
     page_size = 5
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class SearchPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class TaskKeysetPagination(BasePagination):
+    """Постраничный вывод задач (строк values() с полями deadline и id) по ключу (deadline, id).
+
+    Страница выбирается условием по ключу последней записи предыдущей
+    страницы, без COUNT(*) и OFFSET, поэтому любая страница стоит как первая.
+    """
+    page_size = TaskListPagination.page_size
+    page_size_query_param = 'page_size'
+    max_page_size = TaskListPagination.max_page_size
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request)
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request)
+        return self.set_page([row async for row in queryset.aiterator()])
+
+    def get_page_queryset(self, queryset, request):
+        """Запрос страницы с лишней записью, которая показывает, есть ли следующая страница"""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.cursor = self.decode_cursor(request)
+
+        if self.cursor is None:
+            queryset = queryset.order_by('deadline', 'id')
+        else:
+            deadline, pk, reverse = self.cursor
+            if reverse:
+                queryset = queryset.filter(
+                    Q(deadline__lt=deadline) | Q(deadline=deadline, id__lt=pk)
+                ).order_by('-deadline', '-id')
+            else:
+                queryset = queryset.filter(
+                    Q(deadline__gt=deadline) | Q(deadline=deadline, id__gt=pk)
+                ).order_by('deadline', 'id')
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        reverse = self.cursor is not None and self.cursor[2]
+        has_following = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_following
+        else:
+            self.has_next, self.has_previous = has_following, self.cursor is not None
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            return positive_int(request.query_params[self.page_size_query_param], cutoff=self.max_page_size)
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            querystring = b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            deadline = date.fromisoformat(tokens['d'][0])
+            pk = int(tokens['i'][0])
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return deadline, pk, reverse
+
+    def encode_cursor(self, row, reverse=False):
+        tokens = {'d': row['deadline'].isoformat(), 'i': row['id']}
+        if reverse:
+            tokens['r'] = '1'
+        querystring = parse.urlencode(tokens, doseq=True)
+        encoded = b64encode(querystring.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class EmployeeActiveTasksPagination(AsyncPageNumberPagination):
+    page_size = 10
@@ -0,0 +1,68 @@
+import orjson
+from django.conf import settings
+from phonenumber_field.phonenumber import PhoneNumber
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.utils.encoders import JSONEncoder
+
+# Даты и время передаются в default, чтобы формат совпадал с JSONEncoder DRF
+# (миллисекунды, Z для UTC), ключи словарей могут быть числами, как в json
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+class PhoneNumberJSONEncoder(JSONEncoder):
+    """JSONEncoder DRF, PhoneNumber выводится строкой"""
+
+    def default(self, obj):
+        if isinstance(obj, PhoneNumber):
+            return str(obj)
+        return super().default(obj)
+
+
+# типы, которые orjson не сериализует сам (PhoneNumber, date, datetime,
+# Decimal, ленивые строки), выводятся как в JSONEncoder DRF
+default = PhoneNumberJSONEncoder().default
+
+
+def dumps(data):
+    return orjson.dumps(data, default=default, option=ORJSON_OPTIONS)
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """JSONRenderer на orjson, вывод совпадает со стандартным компактным JSON DRF.
+
+    Ответы с отступами (Accept: application/json; indent=4) и настройки
+    UNICODE_JSON=False / COMPACT_JSON=False выводятся стандартным рендерером.
+    """
+
+    encoder_class = PhoneNumberJSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context) or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = dumps(data)
+        # как в JSONRenderer: U+2028 и U+2029 допустимы в JSON, но не в JavaScript
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+class ORJSONParser(JSONParser):
+    """JSONParser на orjson. NaN и Infinity отклоняются, как в strict-режиме DRF"""
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        try:
+            content = stream.read() if stream is not None else b""
+            if encoding.lower().replace("-", "") != "utf8":
+                content = content.decode(encoding)
+            return orjson.loads(content)
+        except (ValueError, UnicodeDecodeError) as exc:
+            raise ParseError(f"JSON parse error - {exc}")
@@ -0,0 +1,87 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connections
+from django.db.models import F, Q, TextField, Value
+from django.db.models.functions import Cast, Upper
+
+from ttracker.models import Employee, Task
+
+SEARCH_CONFIG = "russian"
+# Веса названия и описания задачи в ранге SQLite (в PostgreSQL - веса A и B вектора)
+SQLITE_TASK_WEIGHTS = (4.0, 1.0)
+# Триграммный токенизатор FTS5 не ищет строки короче трех символов
+SQLITE_TRIGRAM_MIN_LENGTH = 3
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _vendor(queryset):
+    return connections[queryset.db].vendor
+
+
+def _fts_phrase(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+def search_tasks(query, queryset=None):
+    """Задачи, найденные по названию и описанию, с рангом rank по убыванию.
+
+    В PostgreSQL - полнотекстовый поиск (websearch-синтаксис, морфология
+    русского языка) по столбцу search_vector с GIN-индексом, в SQLite -
+    таблица FTS5 ttracker_task_fts с поиском по префиксам слов.
+    """
+    queryset = Task.objects.all() if queryset is None else queryset
+    if _vendor(queryset) == "postgresql":
+        search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type="websearch")
+        return queryset.filter(search_vector=search_query).annotate(
+            rank=SearchRank(F("search_vector"), search_query)
+        ).order_by("-rank", "id")
+
+    words = _WORD_RE.findall(query)
+    if not words:
+        return queryset.none()
+    match = " ".join(f"{_fts_phrase(word)}*" for word in words)
+    table = Task._meta.db_table
+    weights = ", ".join(str(weight) for weight in SQLITE_TASK_WEIGHTS)
+    # соединение с таблицей FTS5: ранг считается в том же проходе по совпадениям
+    return queryset.extra(
+        select={"rank": f"-bm25(ttracker_task_fts, {weights})"},
+        tables=["ttracker_task_fts"],
+        where=["ttracker_task_fts MATCH %s", f"ttracker_task_fts.rowid = {table}.id"],
+        params=[match],
+    ).order_by("-rank", "id")
+
+
+def search_employees(query, queryset=None):
+    """Сотрудники, найденные по ФИО, с рангом rank по убыванию.
+
+    В PostgreSQL - подстрока или похожее написание (pg_trgm, сходство
+    триграмм), оба условия используют триграммный GIN-индекс. В SQLite -
+    подстрока через таблицу FTS5 с триграммным токенизатором, без учета опечаток.
+    """
+    queryset = Employee.objects.all() if queryset is None else queryset
+    if _vendor(queryset) == "postgresql":
+        return queryset.annotate(
+            search_name=Upper(Cast("name", output_field=TextField()))
+        ).filter(
+            Q(search_name__trigram_similar=query) | Q(name__icontains=query)
+        ).annotate(rank=TrigramSimilarity("search_name", query)).order_by("-rank", "id")
+
+    query = query.strip()
+    if len(query) < SQLITE_TRIGRAM_MIN_LENGTH:
+        return queryset.filter(name__icontains=query).annotate(rank=Value(0.0)).order_by("-rank", "id")
+    match = _fts_phrase(query)
+    table = Employee._meta.db_table
+    return queryset.extra(
+        select={"rank": "-bm25(ttracker_employee_fts)"},
+        tables=["ttracker_employee_fts"],
+        where=["ttracker_employee_fts MATCH %s", f"ttracker_employee_fts.rowid = {table}.id"],
+        params=[match],
+    ).order_by("-rank", "id")
+
+
+SEARCHES = {
+    "tasks": search_tasks,
+    "employees": search_employees,
+}
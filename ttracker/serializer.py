@@ -1,36 +1,26 @@
-from django.db.models import Q
-from rest_framework.fields import SerializerMethodField
+from rest_framework.fields import CharField, DateField, FloatField, IntegerField, SerializerMethodField
 from rest_framework.serializers import ModelSerializer
 from rest_framework.validators import UniqueTogetherValidator
 
-from ttracker.models import Employee, Task
-from ttracker.validators import TitleValidator
+from ttracker.fieldsets import SparseFieldsetSerializerMixin
+from ttracker.models import AssignmentSuggestion, Employee, Task
+from ttracker.validators import ParentCycleValidator, TitleValidator
+from ttracker.values import ValuesSerializerMixin
 
 
-class EmployeeSerializer(ModelSerializer):
+class EmployeeSerializer(SparseFieldsetSerializerMixin, ModelSerializer):
     class Meta:
         model = Employee
-        fields = "__all__"
+        exclude = ("active_task_count", "updated_at")
 
 
 class EmployeeActiveTasksSerializer(ModelSerializer):
-    count_active_tasks = SerializerMethodField()
+    count_active_tasks = IntegerField(source="active_task_count", read_only=True)
     tasks = SerializerMethodField()
 
-    def get_count_active_tasks(self, employee):
-        """Считает только задачи в исполнении для текущего сотрудника"""
-        return Task.objects.filter(
-            executor=employee.id,
-            status=Task.STATUS_IN_PROGRESS
-        ).count()
-
     def get_tasks(self, employee):
-        """Фильтруем задачи сразу по активности"""
-        tasks = Task.objects.filter(
-            executor=employee.id,
-            status=Task.STATUS_IN_PROGRESS
-        ).values_list('title', flat=True)
-        return list(tasks)
+        """Задачи в исполнении берутся из предзагруженного списка"""
+        return [task.title for task in employee.active_tasks]
 
     class Meta:
         model = Employee
@@ -40,35 +30,70 @@ class EmployeeActiveTasksSerializer(ModelSerializer):
 class TaskSerializer(ModelSerializer):
     class Meta:
         model = Task
-        fields = "__all__"
+        exclude = ("updated_at", "search_vector")
         validators = [
             TitleValidator(field="title"),
             UniqueTogetherValidator(fields=["title"], queryset=Task.objects.all()),
+            ParentCycleValidator(field="parental_task"),
         ]
 
 
 class TaskCreateSerializer(ModelSerializer):
     class Meta:
         model = Task
-        fields = "__all__"
+        exclude = ("updated_at", "search_vector")
 
 
-class TaskListSerializer(ModelSerializer):
+class TaskBulkItemSerializer(ModelSerializer):
+    """Элемент пакетной операции: ссылки принимаются как id и проверяются
+    одним запросом на весь пакет"""
+    id = IntegerField(required=False)
+    executor = IntegerField(required=False, allow_null=True)
+    parental_task = IntegerField(required=False, allow_null=True)
 
     class Meta:
         model = Task
-        fields = "__all__"
+        fields = ("id", "title", "description", "deadline", "parental_task", "executor", "status")
 
 
-class ImportantTaskSerializer(ModelSerializer):
-    executor = SerializerMethodField()
+class TaskListSerializer(SparseFieldsetSerializerMixin, ModelSerializer):
 
     class Meta:
         model = Task
-        fields = ['title', 'deadline', 'executor']
+        exclude = ("updated_at", "search_vector")
+
+
+class TaskValuesSerializer(ValuesSerializerMixin, TaskListSerializer):
+    """Вывод списка задач из строк values(), совпадает с TaskListSerializer"""
+
+
+class EmployeeValuesSerializer(ValuesSerializerMixin, EmployeeSerializer):
+    """Вывод списка сотрудников из строк values(), совпадает с EmployeeSerializer"""
+
+
+class TaskSearchSerializer(TaskListSerializer):
+    """Найденная задача с рангом совпадения"""
+    rank = FloatField(read_only=True)
 
-    def get_executor(self, task):
-        """Получение сотрудников для вывода ФИО"""
-        employees = self.context.get('employees', [])
-        return [employee.name for employee in employees]
+    class Meta(TaskListSerializer.Meta):
+        pass
+
+
+class EmployeeSearchSerializer(EmployeeSerializer):
+    """Найденный сотрудник с рангом совпадения"""
+    rank = FloatField(read_only=True)
+
+    class Meta(EmployeeSerializer.Meta):
+        pass
+
+
+class AssignmentSuggestionSerializer(ModelSerializer):
+    """Важная задача с предложенным исполнителем (ФИО) и временем расчета"""
+    title = CharField(source='task.title')
+    deadline = DateField(source='task.deadline')
+    executor = CharField(source='employee.name')
+
+    class Meta:
+        model = AssignmentSuggestion
+        fields = ['title', 'deadline', 'executor', 'computed_at']
 
@@ -0,0 +1,55 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from ttracker import graph
+from ttracker.cache import invalidate
+from ttracker.models import Employee, Task, apply_active_task_deltas, record_task_changes
+from ttracker.tasks import schedule_suggestions
+
+
+@receiver([post_save, post_delete], sender=Task)
+def invalidate_task_cache(sender, instance, **kwargs):
+    """Сбрасывает кеш списков задач и детального просмотра измененной задачи"""
+    invalidate("task", f"task:{instance.pk}")
+
+
+@receiver([post_save, post_delete], sender=Employee)
+def invalidate_employee_cache(sender, instance, **kwargs):
+    """Сбрасывает кеш ответов, зависящих от сотрудников"""
+    invalidate("employee")
+
+
+@receiver(post_delete, sender=Task)
+def decrement_active_task_count(sender, instance, **kwargs):
+    """Удаленная задача в исполнении уменьшает счетчик исполнителя"""
+    apply_active_task_deltas({instance.counted_executor_id: -1})
+
+
+@receiver(post_save, sender=Task)
+def record_graph_change(sender, instance, **kwargs):
+    """Изменение задачи попадает в журнал графа подчинения задач"""
+    graph.record_change(instance)
+
+
+@receiver(post_delete, sender=Task)
+def record_graph_delete(sender, instance, **kwargs):
+    graph.record_change(instance, deleted=True)
+
+
+@receiver(post_save, sender=Task)
+def record_task_change(sender, instance, **kwargs):
+    """Создание и изменение задачи попадает в журнал дельта-синхронизации"""
+    record_task_changes([instance.pk])
+
+
+@receiver(post_delete, sender=Task)
+def record_task_tombstone(sender, instance, **kwargs):
+    """Удаление задачи (в том числе через TaskDestroyAPIView) оставляет надгробие в журнале"""
+    record_task_changes([instance.pk], deleted=True)
+
+
+@receiver([post_save, post_delete], sender=Task)
+@receiver([post_save, post_delete], sender=Employee)
+def schedule_suggestions_update(sender, instance, **kwargs):
+    """Изменение задач и сотрудников планирует пересчет предложенных исполнителей"""
+    schedule_suggestions()
@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from ttracker.assignment import STRATEGIES
+from ttracker.cache import invalidate
+from ttracker.models import AssignmentSuggestion, Employee, Task
+
+
+def compute_suggestions(strategies=None):
+    """Рассчитывает исполнителей важных задач и сохраняет их в AssignmentSuggestion.
+
+    Задачи и сотрудники загружаются один раз для всех стратегий, старые
+    предложения заменяются одним удалением и одной вставкой в транзакции,
+    поэтому число запросов не зависит от числа задач и стратегий. Если
+    сохранять и удалять нечего, кеш ответов с предложениями не сбрасывается.
+    Возвращает {"tasks": число важных задач, "available": есть ли свободные
+    сотрудники, "suggestions": {стратегия: [AssignmentSuggestion]}}.
+    """
+    strategies = list(strategies or STRATEGIES)
+    tasks = list(Task.objects.important())
+    employees = list(Employee.objects.only('name', 'vacation_status', 'active_task_count')) if tasks else []
+    computed_at = timezone.now()
+
+    suggestions = {}
+    for strategy in strategies:
+        balancer = STRATEGIES[strategy](employees)
+        if not balancer.has_available:
+            suggestions[strategy] = []
+            continue
+        suggestions[strategy] = [
+            AssignmentSuggestion(
+                strategy=strategy,
+                position=position,
+                task=task,
+                employee=employee,
+                computed_at=computed_at,
+            )
+            for position, (task, employee) in enumerate(balancer.assign(tasks))
+        ]
+
+    rows = [suggestion for items in suggestions.values() for suggestion in items]
+    with transaction.atomic():
+        deleted, _ = AssignmentSuggestion.objects.filter(strategy__in=strategies).delete()
+        if rows:
+            AssignmentSuggestion.objects.bulk_create(rows)
+    if deleted or rows:
+        invalidate("suggestion")
+    return {
+        "tasks": len(tasks),
+        "available": any(not employee.vacation_status for employee in employees),
+        "suggestions": suggestions,
+    }
+
+
+def suggestions_stale(computed_at):
+    """Предложения старше интервала периодического пересчета с задержкой
+    пересчета после изменений: фоновый пересчет не выполняется"""
+    max_age = settings.TTRACKER_SUGGESTIONS_INTERVAL + settings.TTRACKER_SUGGESTIONS_DELAY
+    return timezone.now() - computed_at > timedelta(seconds=max_age)
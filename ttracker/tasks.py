@@ -0,0 +1,58 @@
+import logging
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from kombu.exceptions import OperationalError
+
+from ttracker.cache import CACHE_PREFIX
+from ttracker.changes import compact_changes
+from ttracker.suggestions import compute_suggestions
+
+logger = logging.getLogger(__name__)
+
+# Флаг запланированного пересчета: серия изменений дает один пересчет
+SCHEDULED_KEY = f"{CACHE_PREFIX}:suggestions:scheduled"
+
+
+@shared_task(ignore_result=True)
+def compute_assignment_suggestions():
+    """Пересчет предложенных исполнителей важных задач для всех стратегий"""
+    # флаг снимается до расчета: изменения во время расчета запланируют следующий
+    cache.delete(SCHEDULED_KEY)
+    result = compute_suggestions()
+    logger.info("Assignment suggestions computed for %s tasks", result["tasks"])
+
+
+@shared_task(ignore_result=True)
+def compact_task_changes():
+    """Сжатие журнала изменений задач: остается последняя запись каждой задачи"""
+    logger.info("Task change log compacted, %s records removed", compact_changes())
+
+
+def _local_broker():
+    """Брокер memory:// живет в памяти процесса, и задачи из него не доходят до воркера"""
+    return not settings.CELERY_TASK_ALWAYS_EAGER and settings.CELERY_BROKER_URL.startswith("memory://")
+
+
+def _enqueue():
+    if _local_broker():
+        # воркера нет, и задача из очереди в памяти не выполнится; пересчет
+        # в запросе на запись не выполняется, устаревшие предложения
+        # пересчитывает ImportantTasksAPIView (см. suggestions_stale)
+        return
+    delay = settings.TTRACKER_SUGGESTIONS_DELAY
+    if not cache.add(SCHEDULED_KEY, True, timeout=delay + settings.TTRACKER_SUGGESTIONS_INTERVAL):
+        return
+    try:
+        compute_assignment_suggestions.apply_async(countdown=delay)
+    except OperationalError:
+        # брокер недоступен: предложения обновит периодический пересчет
+        cache.delete(SCHEDULED_KEY)
+        logger.warning("Could not schedule assignment suggestions", exc_info=True)
+
+
+def schedule_suggestions():
+    """Планирует пересчет предложений после фиксации транзакции"""
+    transaction.on_commit(_enqueue)
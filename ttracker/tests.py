@@ -1,8 +1,56 @@
 
+import csv
+import gzip
+import itertools
+import os
+import random
+import json
+import re
+import runpy
+import tempfile
+import threading
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
+from phonenumber_field.phonenumber import PhoneNumber
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
-from ttracker.models import Task, Employee
+from rest_framework_simplejwt.tokens import RefreshToken
+import numpy as np
+from ttracker import benchmarks, cache as response_cache, graph
+from ttracker.assignment import linear_sum_assignment
+from ttracker.changes import compact_changes
+from ttracker.filters import TaskFilter
+from ttracker.generators import DataGenerator
+from ttracker.importers import iter_json_array
+from ttracker.instrumentation import (
+    QueryBudgetAssertionsMixin, QueryBudgetExceeded, QueryMetricsMiddleware, RequestMetrics,
+)
+from ttracker.models import (
+    TASK_CHANGES_LOCK_KEY, AssignmentSuggestion, Task, TaskChange, Employee, apply_active_task_deltas,
+    task_changes_lock_sql,
+)
+from ttracker.renderers import ORJSONParser, ORJSONRenderer
+from ttracker.suggestions import compute_suggestions
+from ttracker.serializer import (
+    EmployeeSerializer,
+    EmployeeValuesSerializer,
+    TaskListSerializer,
+    TaskValuesSerializer,
+)
+from ttracker.views import TaskListAPIView
 from users.models import User
 from django.contrib.auth import get_user_model
 
@@ -68,6 +116,21 @@ class TaskTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Task.objects.all().count(), 0)
 
+    def test_parent_destroy_updates_child(self):
+        """Удаление родителя сбрасывает ссылку подзадачи, в том числе в кеше ответа"""
+        child = Task.objects.create(title="Подзадача", deadline="2024-09-22", parental_task=self.task)
+        url = reverse("ttracker:task-detail", args=(child.pk,))
+        cache.clear()
+        self.assertEqual(self.client.get(url).json()["parental_task"], self.task.pk)
+        updated_at = Task.objects.get(pk=child.pk).updated_at
+        cursor = TaskChange.objects.latest("pk").pk
+
+        response = self.client.delete(reverse("ttracker:task-delete", args=(self.task.pk,)))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertIsNone(self.client.get(url).json()["parental_task"])
+        self.assertGreater(Task.objects.get(pk=child.pk).updated_at, updated_at)
+        self.assertTrue(TaskChange.objects.filter(pk__gt=cursor, task_id=child.pk, deleted=False).exists())
+
     def test_task_list(self):
         """Тестирование просмотра списка задач"""
         url = reverse("ttracker:task-list")
@@ -94,6 +157,133 @@ class TaskTestCase(APITestCase):
         self.assertEqual(data, result)
 
 
+class TaskPaginationTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(
+            email="reader@mail.ru",
+            password="readerpass"
+        )
+        Task.objects.bulk_create(
+            Task(title=f"Задача {i}", deadline=f"2024-10-{i % 4 + 1:02d}")
+            for i in range(12)
+        )
+        self.ordered_ids = list(Task.objects.order_by("deadline", "id").values_list("id", flat=True))
+        self.client.force_authenticate(user=self.user)
+
+    def test_page_size(self):
+        """Размер страницы задается клиентом, но не больше максимального"""
+        url = reverse("ttracker:task-list")
+        response = self.client.get(url, {"page_size": 10})
+        self.assertEqual(len(response.json()["results"]), 10)
+        response = self.client.get(url, {"page_size": 1000})
+        self.assertEqual(len(response.json()["results"]), 12)
+        for page_size, expected in (("3", 3), ("0", 5), ("-2", 5), ("x", 5), ("1000", 12)):
+            with self.subTest(page_size=page_size):
+                response = self.client.get(url, {"pagination": "cursor", "page_size": page_size})
+                self.assertEqual(len(response.json()["results"]), expected)
+
+    def test_cursor_pagination(self):
+        """Постраничный обход по ключу (deadline, id) вперед и назад"""
+        url = reverse("ttracker:task-list")
+        response = self.client.get(url, {"pagination": "cursor", "page_size": 5})
+        data = response.json()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", data)
+        self.assertIsNone(data["previous"])
+
+        seen = [task["id"] for task in data["results"]]
+        while data["next"]:
+            # Стоимость страницы не зависит от ее номера: страница и агрегат ETag
+            with self.assertNumQueries(2):
+                response = self.client.get(data["next"])
+            data = response.json()
+            seen += [task["id"] for task in data["results"]]
+        self.assertEqual(seen, self.ordered_ids)
+
+        response = self.client.get(data["previous"])
+        previous_ids = [task["id"] for task in response.json()["results"]]
+        self.assertEqual(previous_ids, self.ordered_ids[5:10])
+
+    def test_invalid_cursor(self):
+        url = reverse("ttracker:task-list")
+        response = self.client.get(url, {"cursor": "invalid"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TaskFilterTestCase(APITestCase):
+    """Фильтрация и сортировка списка задач"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(email="filter@mail.ru", password="filterpass")
+        self.other = User.objects.create(email="filter.other@mail.ru", password="filterpass")
+        self.employee = Employee.objects.create(name="Сотрудник", email="filter.employee@mail.ru")
+        self.parent = Task.objects.create(title="Родительская", deadline="2024-09-01", owner=self.user)
+        self.tasks = [
+            Task.objects.create(
+                title=f"Задача {i}", deadline=f"2024-09-{i + 2:02d}",
+                status=Task.STATUS_IN_PROGRESS if i % 2 else Task.STATUS_OPEN,
+                executor=self.employee if i % 3 == 0 else None,
+                owner=self.other if i < 2 else self.user,
+                parental_task=self.parent if i >= 4 else None,
+            )
+            for i in range(6)
+        ]
+        self.url = reverse("ttracker:task-list")
+        self.client.force_authenticate(user=self.user)
+
+    def ids(self, params):
+        response = self.client.get(self.url, {"page_size": 100, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        return [task["id"] for task in response.json()["results"]]
+
+    def test_filters(self):
+        pks = [task.pk for task in self.tasks]
+        cases = [
+            ({"status": Task.STATUS_IN_PROGRESS}, pks[1::2]),
+            ({"executor": self.employee.pk}, [pks[0], pks[3]]),
+            ({"owner": self.other.pk}, pks[:2]),
+            ({"deadline_after": "2024-09-03", "deadline_before": "2024-09-05"}, pks[1:4]),
+            ({"has_parent": "true"}, pks[4:]),
+            ({"has_parent": "false", "status": Task.STATUS_OPEN}, [self.parent.pk, pks[0], pks[2]]),
+        ]
+        for params, expected in cases:
+            with self.subTest(params=params):
+                self.assertEqual(self.ids(params), expected)
+
+    def test_ordering(self):
+        Task.objects.filter(pk=self.tasks[5].pk).update(deadline="2024-09-02")
+        pks = [task.pk for task in self.tasks]
+        self.assertEqual(self.ids({"ordering": "-deadline"}), [pks[4], pks[3], pks[2], pks[1], pks[5], pks[0],
+                                                               self.parent.pk])
+        # равные сроки упорядочены по id
+        self.assertEqual(self.ids({"ordering": "deadline"})[1:3], [pks[0], pks[5]])
+        self.assertEqual(self.ids({"ordering": "-title", "status": Task.STATUS_OPEN})[0], self.parent.pk)
+
+    def test_values_path_matches_serializer(self):
+        """Строки values() дают тот же ответ, что и TaskListSerializer"""
+        response = self.client.get(self.url, {"page_size": 100})
+        expected = TaskListSerializer(Task.objects.order_by("id"), many=True).data
+        self.assertEqual(response.json()["results"], json.loads(json.dumps(expected)))
+
+    def test_invalid_params(self):
+        for params in ({"status": "unknown"}, {"executor": "x"}, {"deadline_after": "2024-13-01"},
+                       {"ordering": "description"}, {"pagination": "cursor", "ordering": "deadline"}):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cursor_pagination_with_filter(self):
+        response = self.client.get(self.url, {"pagination": "cursor", "status": Task.STATUS_OPEN, "page_size": 2})
+        data = response.json()
+        seen = [task["id"] for task in data["results"]]
+        while data["next"]:
+            data = self.client.get(data["next"]).json()
+            seen += [task["id"] for task in data["results"]]
+        self.assertEqual(seen, [self.parent.pk] + [task.pk for task in self.tasks[::2]])
+
+
 class EmployeeTestCase(APITestCase):
 
     def setUp(self):
@@ -186,7 +376,1396 @@ class EmployeeTestCase(APITestCase):
 
         # Проверяем, что сотрудник с задачами отображается первым
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(data[0]['name'], "Петров Петр Петрович")
-        self.assertEqual(data[0]['count_active_tasks'], 2)
+        self.assertEqual(data['results'][0]['name'], "Петров Петр Петрович")
+        self.assertEqual(data['results'][0]['count_active_tasks'], 2)
+        self.assertEqual(data['results'][0]['tasks'], ["Задача 1", "Задача 2"])
+
+    def test_employee_active_tasks_query_count(self):
+        """Количество запросов не зависит от числа сотрудников"""
+        url = reverse("ttracker:employee-active-tasks")
+        for count in (1, 20):
+            with self.subTest(count=count):
+                for i in range(count):
+                    employee = Employee.objects.create(
+                        name=f"Сотрудник {count}-{i}",
+                        email=f"employee{count}-{i}@mail.ru",
+                    )
+                    Task.objects.create(title=f"Задача {count}-{i}", executor=employee,
+                                        status=Task.STATUS_IN_PROGRESS, deadline="2024-09-30")
+                    Task.objects.create(title=f"Закрытая {count}-{i}", executor=employee,
+                                        status=Task.STATUS_DONE, deadline="2024-09-30")
+                # подсчет, страница сотрудников, задачи в исполнении
+                with self.assertNumQueries(3):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.json()['results'][0]['count_active_tasks'], 1)
+
+
+
+
+class ImportantTasksTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(
+            email="lead@mail.ru",
+            password="leadpass"
+        )
+        self.employees = [
+            Employee.objects.create(
+                name=f"Сотрудник {i}",
+                email=f"employee{i}@mail.ru",
+            )
+            for i in range(3)
+        ]
+        self.parent_task = Task.objects.create(
+            title="Родительская задача",
+            deadline="2024-09-30",
+            status=Task.STATUS_IN_PROGRESS,
+            executor=self.employees[0],
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def create_important_tasks(self, count):
+        Task.objects.bulk_create(
+            Task(
+                title=f"Важная задача {i}",
+                deadline="2024-10-01",
+                parental_task=self.parent_task,
+            )
+            for i in range(count)
+        )
+
+    def test_important_tasks_assignment(self):
+        """Тестирование распределения важных задач по загруженности"""
+        self.create_important_tasks(6)
+        url = reverse("ttracker:important-tasks")
+        response = self.client.get(url)
+        data = response.json()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(data), 6)
+        executors = [item["executor"] for item in data]
+        # Исполнитель родительской задачи получает задачи, пока не перегружен
+        self.assertEqual(executors[0], self.employees[0].name)
+        self.assertEqual(executors.count(self.employees[0].name), 3)
+
+    def test_important_tasks_query_count(self):
+        """Количество запросов не зависит от числа важных задач, готовые предложения читаются одним запросом"""
+        url = reverse("ttracker:important-tasks")
+        for count in (5, 50):
+            with self.subTest(count=count):
+                Task.objects.exclude(pk=self.parent_task.pk).delete()
+                self.create_important_tasks(count)
+                # задачи, сотрудники, удаление и вставка предложений всех стратегий (+ SAVEPOINT)
+                with self.assertNumQueries(6):
+                    compute_suggestions()
+                with self.assertNumQueries(1):
+                    response = self.client.get(url)
+                self.assertEqual(len(response.json()), count)
+
+    def test_assignment_strategies(self):
+        """Все стратегии назначают исполнителя каждой задаче, неизвестная стратегия - ошибка"""
+        self.create_important_tasks(6)
+        url = reverse("ttracker:important-tasks")
+        for strategy in ("greedy", "deadline", "optimal"):
+            with self.subTest(strategy=strategy):
+                # предложений еще нет: расчет только запрошенной стратегии
+                with self.assertNumQueries(7):
+                    response = self.client.get(url, {"strategy": strategy})
+                executors = [item["executor"] for item in response.json()]
+                self.assertEqual(len(executors), 6)
+                self.assertGreaterEqual(executors.count(self.employees[0].name), 2)
+                self.assertEqual(len(set(executors)), 3)
+        response = self.client.get(url, {"strategy": "random"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_suggestions_worker(self):
+        """Изменения задач и сотрудников пересчитывают сохраненные предложения фоновой задачей"""
+        url = reverse("ttracker:important-tasks")
+        cache.clear()
+        with self.settings(CELERY_TASK_ALWAYS_EAGER=True):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.create_important_tasks(3)
+                Task.objects.create(title="Важная задача 3", deadline="2024-09-01", parental_task=self.parent_task)
+            self.assertEqual(AssignmentSuggestion.objects.filter(strategy="greedy").count(), 4)
+            first = self.client.get(url).json()
+            self.assertEqual(first[0]["title"], "Важная задача 3")
+            self.assertIn("computed_at", first[0])
+
+            with self.captureOnCommitCallbacks(execute=True):
+                Employee.objects.exclude(pk=self.employees[2].pk).update(vacation_status=True)
+                self.employees[2].save()
+            with self.assertNumQueries(1):
+                response = self.client.get(url, {"strategy": "optimal"})
+        self.assertEqual({item["executor"] for item in response.json()}, {self.employees[2].name})
+        self.assertGreater(response.json()[0]["computed_at"], first[0]["computed_at"])
+
+    def test_suggestions_without_worker(self):
+        """С брокером memory:// запись не пересчитывает предложения, устаревшие пересчитываются в запросе"""
+        url = reverse("ttracker:important-tasks")
+        self.create_important_tasks(2)
+        compute_suggestions()
+        with self.settings(CELERY_BROKER_URL="memory://", CELERY_TASK_ALWAYS_EAGER=False):
+            with self.captureOnCommitCallbacks() as callbacks:
+                Task.objects.create(title="Важная задача 2", deadline="2024-10-01", parental_task=self.parent_task)
+            with self.assertNumQueries(0):
+                for callback in callbacks:
+                    callback()
+        self.assertEqual(AssignmentSuggestion.objects.filter(strategy="greedy").count(), 2)
+
+        computed_at = datetime(2024, 9, 1, tzinfo=timezone.utc)
+        AssignmentSuggestion.objects.update(computed_at=computed_at)
+        cache.clear()
+        response = self.client.get(url)
+        self.assertEqual(len(response.json()), 3)
+        self.assertGreater(AssignmentSuggestion.objects.filter(strategy="greedy").first().computed_at, computed_at)
+
+    def test_no_suggestions_keep_cache(self):
+        """Без важных задач и сохраненных предложений расчет не сбрасывает кеш ответов"""
+        Task.objects.exclude(pk=self.parent_task.pk).delete()
+        with mock.patch("ttracker.suggestions.invalidate") as invalidate:
+            result = compute_suggestions()
+        self.assertEqual(result["tasks"], 0)
+        invalidate.assert_not_called()
+
+    def test_linear_sum_assignment(self):
+        """Решение совпадает с полным перебором"""
+        rng = random.Random(0)
+        for _ in range(30):
+            rows, columns = rng.randint(1, 4), rng.randint(4, 6)
+            cost = np.array([[rng.randint(0, 5) for _ in range(columns)] for _ in range(rows)], dtype=float)
+            assignment = linear_sum_assignment(cost)
+            best = min(
+                sum(cost[row, column] for row, column in enumerate(permutation))
+                for permutation in itertools.permutations(range(columns), rows)
+            )
+            self.assertEqual(len(set(assignment)), rows)
+            self.assertEqual(cost[np.arange(rows), assignment].sum(), best)
+
+
+class TaskIndexesTestCase(TestCase):
+    """Горячие запросы к задачам не должны приводить к полному просмотру таблицы"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employees = Employee.objects.bulk_create(
+            Employee(name=f"Сотрудник {i}", email=f"employee{i}@mail.ru")
+            for i in range(50)
+        )
+        # Большая часть задач закрыта, открытых и в исполнении немного
+        statuses = [Task.STATUS_DONE] * 18 + [Task.STATUS_OPEN, Task.STATUS_IN_PROGRESS]
+        Task.objects.bulk_create(
+            Task(
+                title=f"Задача {i}",
+                deadline=f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+                status=statuses[i % len(statuses)],
+                executor=cls.employees[i % len(cls.employees)],
+            )
+            for i in range(5000)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def assertNoFullScan(self, queryset):
+        plan = queryset.explain()
+        if connection.vendor == "postgresql":
+            full_scan = re.search(r"Seq Scan on \w*ttracker_task", plan)
+        else:
+            full_scan = re.search(r"\bSCAN (?!.*USING (COVERING )?INDEX)", plan)
+        self.assertIsNone(full_scan, plan)
+
+    def test_hot_queries_use_indexes(self):
+        parent = Task.objects.filter(status=Task.STATUS_IN_PROGRESS).first()
+        querysets = {
+            "status_deadline": Task.objects.filter(status=Task.STATUS_OPEN).order_by("deadline"),
+            "executor_status": Task.objects.filter(
+                executor=self.employees[0], status=Task.STATUS_IN_PROGRESS
+            ),
+            "parent_status": Task.objects.filter(parental_task=parent, status=Task.STATUS_OPEN),
+            "important": Task.objects.filter(
+                status=Task.STATUS_OPEN,
+                parental_task__status=Task.STATUS_IN_PROGRESS
+            ).order_by("deadline"),
+            "title": Task.objects.filter(title="Задача 42"),
+        }
+        for name, queryset in querysets.items():
+            with self.subTest(query=name):
+                self.assertNoFullScan(queryset)
+
+    def test_list_filters_use_indexes(self):
+        """Каждый фильтр списка задач с сортировкой по сроку выполняется по индексу"""
+        params = [
+            {"status": Task.STATUS_OPEN},
+            {"executor": self.employees[0].pk},
+            {"owner": 1},
+            {"deadline_after": "2024-03-01", "deadline_before": "2024-03-02"},
+            {"has_parent": "true"},
+        ]
+        for data in params:
+            with self.subTest(params=data):
+                queryset = TaskFilter({**data, "ordering": "deadline"}, Task.objects.all()).qs
+                self.assertNoFullScan(queryset)
+
+
+class ResponseCacheTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            email="dashboard@mail.ru",
+            password="dashboardpass"
+        )
+        self.task = Task.objects.create(title="Задача", deadline="2024-09-30")
+        self.client.force_authenticate(user=self.user)
+
+    def test_task_detail_cache(self):
+        """Повторный запрос берется из кеша, изменение задачи сбрасывает кеш"""
+        url = reverse("ttracker:task-detail", args=(self.task.pk,))
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(response.json()["title"], "Задача")
+
+        self.task.title = "Новая задача"
+        self.task.save()
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["title"], "Новая задача")
+        self.assertEqual(response_cache.get_stats(), {"hit": 1, "miss": 2})
+
+    def test_cache_key_depends_on_params_and_dependencies(self):
+        url = reverse("ttracker:task-list")
+        self.client.get(url)
+        self.assertEqual(self.client.get(url, {"page_size": 2})["X-Cache"], "MISS")
+        self.assertEqual(self.client.get(url)["X-Cache"], "HIT")
+
+        # Изменение другой задачи не сбрасывает детальный просмотр этой
+        detail_url = reverse("ttracker:task-detail", args=(self.task.pk,))
+        self.client.get(detail_url)
+        Task.objects.create(title="Другая задача", deadline="2024-09-30")
+        self.assertEqual(self.client.get(detail_url)["X-Cache"], "HIT")
+        self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+
+        Employee.objects.create(name="Сотрудник", email="employee@mail.ru")
+        active_url = reverse("ttracker:employee-active-tasks")
+        self.assertEqual(self.client.get(active_url)["X-Cache"], "MISS")
+        Employee.objects.create(name="Сотрудник 2", email="employee2@mail.ru")
+        self.assertEqual(self.client.get(active_url)["X-Cache"], "MISS")
+
+
+class ConditionalGetTestCase(APITestCase):
+    """ETag и Last-Modified: 304 без сериализации, изменение данных меняет ETag"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(email="etag@mail.ru", password="etagpass")
+        self.employee = Employee.objects.create(name="Сотрудник", email="etag.employee@mail.ru")
+        self.task = Task.objects.create(title="Задача", deadline="2024-09-30")
+        self.client.force_authenticate(user=self.user)
+
+    def test_task_detail(self):
+        url = reverse("ttracker:task-detail", args=(self.task.pk,))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+        self.assertIn("Last-Modified", response)
+
+        # валидаторы в кеше: 304 без обращения к БД и без тела ответа
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+        last_modified = response["Last-Modified"]
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.task.title = "Новая задача"
+        self.task.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["title"], "Новая задача")
+
+        # массовое обновление также меняет updated_at
+        etag = response["ETag"]
+        Task.objects.filter(pk=self.task.pk).update(status=Task.STATUS_IN_PROGRESS)
+        response_cache.invalidate("task:bulk")
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_child_detail_after_parent_delete(self):
+        """Удаление родителя меняет ETag подзадачи: старый ETag не дает 304"""
+        child = Task.objects.create(title="Подзадача", deadline="2024-09-30", parental_task=self.task)
+        url = reverse("ttracker:task-detail", args=(child.pk,))
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.delete(reverse("ttracker:task-delete", args=(self.task.pk,)))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertIsNone(response.json()["parental_task"])
+
+    def test_task_list(self):
+        url = reverse("ttracker:task-list")
+        other = Task.objects.create(title="Другая задача", deadline="2024-10-01")
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        # ETag зависит от параметров запроса
+        self.assertNotEqual(self.client.get(url, {"page_size": 1})["ETag"], etag)
+
+        # удаление не меняет последнее изменение, но меняет ETag списка
+        other.delete()
+        response = self.client.get(
+            url, HTTP_IF_NONE_MATCH=etag, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_employees(self):
+        list_url = reverse("ttracker:employee-list")
+        detail_url = reverse("ttracker:employee-detail", args=(self.employee.pk,))
+        for url in (list_url, detail_url):
+            etag = self.client.get(url)["ETag"]
+            with self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+            self.employee.position = f"Должность {url}"
+            self.employee.save()
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(response["ETag"], etag)
+
+    def test_async_task_detail(self):
+        url = reverse("ttracker:async-task-detail", args=(self.task.pk,))
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+
+class TaskCycleTestCase(TestCase):
+    """Циклы в иерархии задач отклоняются при сохранении модели"""
+
+    def setUp(self):
+        self.root = Task.objects.create(title="Корень", deadline="2024-09-30")
+        self.child = Task.objects.create(title="Потомок", deadline="2024-09-30", parental_task=self.root)
+
+    def test_save_rejects_cycle(self):
+        self.root.parental_task = self.child
+        with self.assertRaises(ValidationError):
+            self.root.save()
+        with self.assertRaises(ValidationError):
+            self.root.save(update_fields=["parental_task"])
+        self.assertIsNone(Task.objects.get(pk=self.root.pk).parental_task_id)
+
+    def test_unchanged_parent_not_checked(self):
+        """Родитель проверяется только при изменении: сохранение без него не добавляет запрос"""
+        self.child.title = "Потомок (изменен)"
+        # блокировка строки, обновление и журнал изменений (+ SAVEPOINT и RELEASE)
+        with self.assertNumQueries(5):
+            self.child.save()
+
+    def test_deferred_parent_not_loaded(self):
+        """Родитель, не загруженный из БД, не сохраняется и не проверяется"""
+        child = Task.objects.defer("parental_task").get(pk=self.child.pk)
+        child.title = "Потомок (изменен)"
+        with CaptureQueriesContext(connection) as queries:
+            child.save()
+        update = next(query["sql"] for query in queries.captured_queries if query["sql"].startswith("UPDATE"))
+        self.assertNotIn("parental_task_id", update)
+        self.assertEqual(Task.objects.get(pk=self.child.pk).parental_task_id, self.root.pk)
+
+
+class ActiveTaskCountTestCase(TestCase):
+
+    def setUp(self):
+        self.first = Employee.objects.create(name="Первый", email="first@mail.ru")
+        self.second = Employee.objects.create(name="Второй", email="second@mail.ru")
+
+    def assertCounts(self, first, second):
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual((self.first.active_task_count, self.second.active_task_count), (first, second))
+
+    def test_save_and_delete(self):
+        """Счетчик меняется при смене статуса, исполнителя и удалении задачи"""
+        task = Task.objects.create(title="Задача", deadline="2024-09-30", executor=self.first)
+        self.assertCounts(0, 0)
+        task.status = Task.STATUS_IN_PROGRESS
+        task.save()
+        self.assertCounts(1, 0)
+        task.executor = self.second
+        task.save()
+        self.assertCounts(0, 1)
+        task.delete()
+        self.assertCounts(0, 0)
+
+    def test_employee_save_keeps_count(self):
+        """Сохранение загруженного ранее сотрудника не затирает счетчик"""
+        stale = Employee.objects.get(pk=self.first.pk)
+        Task.objects.create(title="Задача", deadline="2024-09-30",
+                            executor=self.first, status=Task.STATUS_IN_PROGRESS)
+        stale.name = "Первый (переименован)"
+        stale.save()
+        self.assertCounts(1, 0)
+        self.assertEqual(self.first.name, "Первый (переименован)")
+        stale.active_task_count = 3
+        stale.save(update_fields=["active_task_count"])
+        self.assertCounts(3, 0)
+
+    def test_bulk_operations(self):
+        """Счетчик поддерживается массовыми операциями"""
+        tasks = Task.objects.bulk_create(
+            Task(title=f"Задача {i}", deadline="2024-09-30",
+                 executor=self.first, status=Task.STATUS_IN_PROGRESS)
+            for i in range(4)
+        )
+        self.assertCounts(4, 0)
+        Task.objects.filter(pk__in=[tasks[0].pk, tasks[1].pk]).update(executor=self.second)
+        self.assertCounts(2, 2)
+        Task.objects.filter(executor=self.second).update(status=Task.STATUS_DONE)
+        self.assertCounts(2, 0)
+        tasks[2].executor = self.second
+        Task.objects.bulk_update([tasks[2]], ["executor"])
+        self.assertCounts(1, 1)
+        Task.objects.filter(executor=self.first).delete()
+        self.assertCounts(0, 1)
+
+    def test_bulk_delete_single_counter_update(self):
+        """Удаление набора задач обновляет счетчики одним запросом, а не по запросу на задачу"""
+        Task.objects.bulk_create(
+            Task(title=f"Задача {i}", deadline="2024-09-30",
+                 executor=self.first if i % 2 else self.second, status=Task.STATUS_IN_PROGRESS)
+            for i in range(6)
+        )
+        # включая каскадное удаление предложенных исполнителей, сброс ссылок
+        # подзадач с записью в журнал и вставку надгробий
+        with self.assertNumQueries(9):
+            Task.objects.all().delete()
+        self.assertCounts(0, 0)
+
+    def test_deltas_lock_employees_in_pk_order(self):
+        """Перед изменением счетчиков нескольких сотрудников строки блокируются в порядке id"""
+        with mock.patch.object(connection.features, "has_select_for_update", True), \
+                mock.patch.object(connection.ops, "for_update_sql", return_value=""), \
+                CaptureQueriesContext(connection) as queries:
+            apply_active_task_deltas({self.second.pk: 2, self.first.pk: -1})
+        statements = [query["sql"] for query in queries.captured_queries if "SAVEPOINT" not in query["sql"]]
+        self.assertEqual(len(statements), 3)
+        self.assertTrue(statements[0].startswith("SELECT"))
+        self.assertIn('ORDER BY "ttracker_employee"."id" ASC', statements[0])
+        self.assertCounts(-1, 2)
+
+    def test_recount_command(self):
+        """Команда пересчета находит и исправляет расхождения"""
+        Task.objects.create(title="Задача", deadline="2024-09-30",
+                            executor=self.first, status=Task.STATUS_IN_PROGRESS)
+        Employee.objects.filter(pk=self.first.pk).update(active_task_count=5)
+        with self.assertRaises(CommandError):
+            call_command("recount_active_tasks", "--check", stdout=StringIO())
+        with mock.patch("ttracker.models.invalidate") as invalidate:
+            call_command("recount_active_tasks", stdout=StringIO())
+        invalidate.assert_called_once_with("employee")
+        self.assertCounts(1, 0)
+        call_command("recount_active_tasks", "--check", stdout=StringIO())
+
+
+class TaskBulkTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(
+            email="bulk@mail.ru",
+            password="bulkpass"
+        )
+        self.employee = Employee.objects.create(name="Сотрудник", email="employee@mail.ru")
+        self.parent = Task.objects.create(title="Родительская задача", deadline="2024-09-30")
+        self.url = reverse("ttracker:task-bulk")
+        self.client.force_authenticate(user=self.user)
+
+    def test_task_create_sets_owner(self):
+        """Создатель задачи сохраняется одним запросом на запись"""
+        url = reverse("ttracker:task-create")
+        response = self.client.post(url, {"title": "Задача", "deadline": "2024-09-30"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()["owner"], self.user.pk)
+
+    def test_bulk_create(self):
+        """Пакет задач проверяется и создается с фиксированным числом запросов"""
+        items = [
+            {"title": f"Задача {i}", "deadline": "2024-10-01", "executor": self.employee.pk,
+             "parental_task": self.parent.pk, "status": Task.STATUS_IN_PROGRESS}
+            for i in range(100)
+        ]
+        # две проверки ссылок, вставка, обновление счетчика и журнал изменений в одной транзакции
+        with self.assertNumQueries(7):
+            response = self.client.post(self.url, items, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.json()["created"]), 100)
+        self.assertEqual(Task.objects.filter(owner=self.user).count(), 100)
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.active_task_count, 100)
+
+    def test_bulk_create_partial_errors(self):
+        """Ошибочные элементы возвращаются по индексам, остальные сохраняются"""
+        items = [
+            {"title": "Верная задача", "deadline": "2024-10-01"},
+            {"title": "Без срока"},
+            {"title": "Чужой исполнитель", "deadline": "2024-10-01", "executor": 999},
+        ]
+        response = self.client.post(self.url, items, format="json")
+        data = response.json()
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(len(data["created"]), 1)
+        self.assertEqual([error["index"] for error in data["errors"]], [1, 2])
+        self.assertIn("executor", data["errors"][1]["errors"])
+
+        response = self.client.post(f"{self.url}?atomic=true", items, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Task.objects.count(), 2)
+
+    def test_bulk_update_and_delete(self):
+        tasks = Task.objects.bulk_create(
+            Task(title=f"Задача {i}", deadline="2024-10-01") for i in range(3)
+        )
+        items = [
+            {"id": tasks[0].pk, "status": Task.STATUS_DONE},
+            {"id": tasks[1].pk, "title": "Родительская задача"},
+            {"id": 999, "status": Task.STATUS_DONE},
+        ]
+        response = self.client.patch(self.url, items, format="json")
+        data = response.json()
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([task["id"] for task in data["updated"]], [tasks[0].pk])
+        self.assertEqual([error["index"] for error in data["errors"]], [1, 2])
+        self.assertEqual(Task.objects.get(pk=tasks[0].pk).status, Task.STATUS_DONE)
+
+        response = self.client.delete(self.url, [tasks[0].pk, tasks[1].pk], format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["deleted"], sorted([tasks[0].pk, tasks[1].pk]))
+        self.assertEqual(Task.objects.count(), 2)
 
+    def test_bulk_update_reuses_titles(self):
+        """Названия проверяются по итогу пакета: задача может занять название, освобожденное в пакете"""
+        first, second = Task.objects.bulk_create(
+            Task(title=title, deadline="2024-10-01") for title in ("Первая", "Вторая")
+        )
+        items = [
+            {"id": first.pk, "title": "Вторая (новая)"},
+            {"id": second.pk, "title": "Первая"},
+            {"id": self.parent.pk, "title": "Родительская задача"},
+        ]
+        response = self.client.patch(self.url, items, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.json())
+
+        # название задачи, не меняющей его в пакете, занято; отклоненный
+        # элемент не освобождает прежнее название своей задачи
+        items = [
+            {"id": first.pk, "title": "Родительская задача"},
+            {"id": second.pk, "title": "Вторая (новая)"},
+            {"id": self.parent.pk, "status": Task.STATUS_DONE},
+        ]
+        response = self.client.patch(self.url, items, format="json")
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([error["index"] for error in response.json()["errors"]], [0, 1])
+        self.assertEqual(Task.objects.get(pk=second.pk).title, "Первая")
+
+    def test_bulk_delete_rejects_booleans(self):
+        response = self.client.delete(self.url, [True, self.parent.pk], format="json")
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.json()["errors"][0]["index"], 0)
+        self.assertEqual(response.json()["deleted"], [self.parent.pk])
+
+
+class TaskChangesTestCase(APITestCase):
+    """Дельта-синхронизация по журналу изменений задач"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(email="sync@mail.ru", password="syncpass")
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("ttracker:task-changes")
+        self.tasks = [Task.objects.create(title=f"Задача {i}", deadline="2024-09-30") for i in range(5)]
+
+    def sync(self, since, **params):
+        response = self.client.get(self.url, {"since": since, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
 
+    def test_changes_since_cursor(self):
+        data = self.sync(0)
+        self.assertEqual([task["id"] for task in data["changed"]], [task.pk for task in self.tasks])
+        self.assertEqual(data["deleted"], [])
+        self.assertFalse(data["has_more"])
+        cursor = data["cursor"]
+        self.assertEqual(self.sync(cursor), {"cursor": cursor, "has_more": False, "changed": [], "deleted": []})
+
+        first, second, third = self.tasks[:3]
+        first.title = "Измененная задача"
+        first.save()
+        # массовое изменение, после которого задачи не попадают под фильтр
+        Task.objects.filter(pk=second.pk, status=Task.STATUS_OPEN).update(status=Task.STATUS_DONE)
+        new = Task.objects.create(title="Новая задача", deadline="2024-10-01")
+        response = self.client.delete(reverse("ttracker:task-delete", args=(third.pk,)))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        # стоимость зависит от числа изменений, а не от размера таблицы
+        with self.assertNumQueries(2):
+            data = self.sync(cursor)
+        changed = {task["id"]: task for task in data["changed"]}
+        self.assertEqual(sorted(changed), [first.pk, second.pk, new.pk])
+        self.assertEqual(changed[first.pk]["title"], "Измененная задача")
+        self.assertEqual(changed[second.pk]["status"], Task.STATUS_DONE)
+        self.assertEqual(data["deleted"], [third.pk])
+        self.assertGreater(data["cursor"], cursor)
+
+        # повторный опрос с тем же курсором берется из кеша
+        with self.assertNumQueries(0):
+            self.assertEqual(self.sync(cursor), data)
+
+    def test_limit_and_compaction(self):
+        for task in self.tasks:
+            task.title = f"{task.title} (изменена)"
+            task.save()
+        Task.objects.filter(pk__in=[task.pk for task in self.tasks[:2]]).delete()
+
+        pages, cursor, has_more = [], 0, True
+        while has_more:
+            data = self.sync(cursor, limit=4)
+            pages.append(data)
+            cursor, has_more = data["cursor"], data["has_more"]
+        self.assertEqual(len(pages), 3)
+        changed = {task["id"] for page in pages for task in page["changed"]}
+        deleted = {task_id for page in pages for task_id in page["deleted"]}
+        self.assertEqual(changed - deleted, {task.pk for task in self.tasks[2:]})
+        self.assertEqual(deleted, {task.pk for task in self.tasks[:2]})
+
+        # сжатие оставляет последнюю запись каждой задачи, ответ не меняется
+        full = self.sync(0)
+        self.assertEqual(compact_changes(), 7)
+        self.assertEqual(TaskChange.objects.count(), 5)
+        cache.clear()
+        self.assertEqual(self.sync(0), full)
+        self.assertEqual(full["deleted"], [task.pk for task in self.tasks[:2]])
+
+    def test_invalid_params(self):
+        for params in ({"since": "-1"}, {"since": "abc"}, {"limit": "x"}):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_lock_sql(self):
+        # SQLite последовательна, в PostgreSQL писатели берут разделяемую блокировку журнала
+        self.assertEqual(task_changes_lock_sql(connection), "")
+        postgresql = mock.Mock(vendor="postgresql")
+        self.assertIn(f"pg_advisory_xact_lock_shared({TASK_CHANGES_LOCK_KEY})", task_changes_lock_sql(postgresql))
+
+
+class SearchTestCase(QueryBudgetAssertionsMixin, APITestCase):
+    """Поиск задач и сотрудников (в тестах - SQLite FTS5)"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(email="search@mail.ru", password="searchpass")
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("ttracker:search")
+        self.in_title = Task.objects.create(title="Разработка схемы вычислителя", deadline="2024-09-30")
+        self.in_description = Task.objects.create(
+            title="Проверка", description="Схема питания вычислителя", deadline="2024-09-30"
+        )
+        Task.objects.create(title="Оформление документации", deadline="2024-09-30")
+
+    def search(self, q, **params):
+        response = self.client.get(self.url, {"q": q, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertWithinQueryBudget(response)
+        return response.json()
+
+    def test_tasks_ranked(self):
+        data = self.search("ВЫЧИСЛИТЕЛ")
+        self.assertEqual(data["count"], 2)
+        # совпадение в названии весит больше, чем в описании
+        self.assertEqual([task["id"] for task in data["results"]], [self.in_title.pk, self.in_description.pk])
+        self.assertGreater(data["results"][0]["rank"], data["results"][1]["rank"])
+        self.assertNotIn("search_vector", data["results"][0])
+        self.assertEqual(self.search("схем питания")["count"], 1)
+        self.assertEqual(self.search("испытания")["count"], 0)
+
+    def test_vector_not_loaded(self):
+        """Задачи загружаются без поискового вектора, в том числе списком задач"""
+        self.assertIn("search_vector", Task.objects.get(pk=self.in_title.pk).get_deferred_fields())
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("ttracker:task-list"))
+            self.search("ВЫЧИСЛИТЕЛ")
+        self.assertTrue(queries.captured_queries)
+        for query in queries.captured_queries:
+            self.assertNotIn('"search_vector"', query["sql"].split(" FROM ")[0])
+
+    def test_index_follows_changes(self):
+        """Индекс обновляется триггерами, в том числе при массовых операциях"""
+        self.in_title.title = "Испытания блока"
+        self.in_title.save()
+        Task.objects.bulk_create([Task(title="Испытания платы", deadline="2024-09-30")])
+        Task.objects.filter(pk=self.in_description.pk).update(description="Программа испытаний")
+        self.assertEqual(self.search("испытани")["count"], 3)
+        self.assertEqual(self.search("вычислителя")["count"], 0)
+        Task.objects.filter(title__startswith="Испытания").delete()
+        self.assertEqual(self.search("испытани")["count"], 1)
+
+    def test_employees(self):
+        ivanov = Employee.objects.create(name="Иванов Иван Иванович", email="ivanov@mail.ru")
+        Employee.objects.create(name="Петров Петр Петрович", email="petrov@mail.ru")
+        data = self.search("иванов", type="employees")
+        self.assertEqual([employee["id"] for employee in data["results"]], [ivanov.pk])
+        self.assertIn("rank", data["results"][0])
+        # подстрока внутри слова и короткие строки
+        self.assertEqual(self.search("ВАНОВ", type="employees")["count"], 1)
+        self.assertEqual(self.search("Пе", type="employees")["count"], 1)
+
+    def test_invalid_params(self):
+        for params in ({}, {"q": "  "}, {"q": "схема", "type": "users"}):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TaskTreeTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(email="tree@mail.ru", password="treepass")
+        self.client.force_authenticate(user=self.user)
+        # root -> a -> (a1, a2), root -> b
+        self.root = Task.objects.create(title="Корень", deadline="2024-09-30", status=Task.STATUS_IN_PROGRESS)
+        self.a = Task.objects.create(title="Ветка А", deadline="2024-09-30", parental_task=self.root)
+        self.b = Task.objects.create(title="Ветка Б", deadline="2024-09-30", parental_task=self.root,
+                                     status=Task.STATUS_DONE)
+        self.a1 = Task.objects.create(title="Лист А1", deadline="2024-09-30", parental_task=self.a)
+        self.a2 = Task.objects.create(title="Лист А2", deadline="2024-09-30", parental_task=self.a,
+                                      status=Task.STATUS_DONE)
+
+    def test_subtree_with_rollup(self):
+        """Поддерево со сводкой статусов строится одним запросом"""
+        url = reverse("ttracker:task-subtree", args=(self.root.pk,))
+        with self.assertNumQueries(1):
+            data = self.client.get(url).json()
+        self.assertEqual([child["id"] for child in data["children"]], [self.a.pk, self.b.pk])
+        self.assertEqual(data["rollup"], {"total": 5, "open": 2, "in_progress": 1, "done": 2})
+        self.assertEqual(data["children"][0]["rollup"], {"total": 3, "open": 2, "in_progress": 0, "done": 1})
+        self.assertEqual(data["deadline"], "2024-09-30")
+
+        data = self.client.get(url, {"depth": 1}).json()
+        self.assertEqual(data["children"][0]["children"], [])
+        self.assertEqual(self.client.get(url, {"depth": "-1"}).status_code, status.HTTP_400_BAD_REQUEST)
+        missing = reverse("ttracker:task-subtree", args=(999,))
+        self.assertEqual(self.client.get(missing).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_ancestors(self):
+        url = reverse("ttracker:task-ancestors", args=(self.a1.pk,))
+        with self.assertNumQueries(1):
+            data = self.client.get(url).json()
+        self.assertEqual([(task["id"], task["depth"]) for task in data["ancestors"]],
+                         [(self.a.pk, 1), (self.root.pk, 2)])
+
+    def test_cycle_detection(self):
+        """Задачу нельзя подчинить самой себе или своему потомку"""
+        url = reverse("ttracker:task-update", args=(self.root.pk,))
+        response = self.client.patch(url, {"parental_task": self.a1.pk})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("parental_task", response.json())
+
+        self.root.parental_task = self.root
+        with self.assertRaises(ValidationError):
+            self.root.full_clean()
+
+        # цикл между двумя элементами одного пакета
+        items = [{"id": self.b.pk, "parental_task": self.a1.pk}, {"id": self.a.pk, "parental_task": self.b.pk}]
+        response = self.client.patch(reverse("ttracker:task-bulk"), items, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error["index"] for error in response.json()["errors"]], [0, 1])
+
+
+class TaskGraphTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        graph.reset()
+        self.user = User.objects.create(email="graph@mail.ru", password="graphpass")
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("ttracker:task-analysis")
+        # root <- middle <- leaf: подзадача блокирует всю цепочку выше
+        self.root = Task.objects.create(title="Корень", deadline="2024-10-30", status=Task.STATUS_IN_PROGRESS)
+        self.middle = Task.objects.create(title="Середина", deadline="2024-10-10", parental_task=self.root)
+        self.leaf = Task.objects.create(title="Лист", deadline="2024-10-20", parental_task=self.middle)
+        closed = Task.objects.create(title="Закрытая", deadline="2024-09-30", status=Task.STATUS_DONE)
+        Task.objects.create(title="Под закрытой", deadline="2024-09-30", parental_task=closed)
+
+    def test_blockers_and_chains(self):
+        with self.assertNumQueries(2):
+            data = self.client.get(self.url).json()
+        self.assertEqual([(task["id"], task["blocked_tasks"]) for task in data["blockers"]],
+                         [(self.leaf.pk, 2), (self.middle.pk, 1)])
+        chain = data["critical_chains"][0]
+        self.assertEqual([task["id"] for task in chain["tasks"]], [self.leaf.pk, self.middle.pk, self.root.pk])
+        self.assertEqual((chain["length"], chain["deadline"]), (3, "2024-10-10"))
+        self.assertEqual(self.client.get(self.url, {"limit": 0}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_incremental_update(self):
+        """Изменение задачи применяется к графу без повторного чтения таблицы"""
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.middle.status = Task.STATUS_DONE
+            self.middle.save()
+        with self.assertNumQueries(1):
+            data = self.client.get(self.url).json()
+        self.assertEqual(data["blockers"], [])
+        self.assertEqual([chain["length"] for chain in data["critical_chains"]], [1, 1, 1])
+
+        # массовое изменение приводит к полной перезагрузке графа
+        Task.objects.filter(pk=self.middle.pk).update(status=Task.STATUS_OPEN)
+        with self.assertNumQueries(2):
+            data = self.client.get(self.url).json()
+        self.assertEqual(data["blockers"][0]["blocked_tasks"], 2)
+
+
+class ExportTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(
+            email="report@mail.ru",
+            password="reportpass"
+        )
+        self.employee = Employee.objects.create(
+            name="Иванов Иван Иванович",
+            email="ivanov@mail.ru",
+            phone_number="+79161234567",
+        )
+        self.task = Task.objects.create(title="Задача, с запятой", deadline="2024-09-30", executor=self.employee)
+        self.client.force_authenticate(user=self.user)
+
+    def test_export_tasks_ndjson(self):
+        url = reverse("ttracker:export", args=("tasks",))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson; charset=utf-8")
+        lines = b"".join(response.streaming_content).decode("utf-8").splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [{
+            "id": self.task.pk,
+            "title": "Задача, с запятой",
+            "description": None,
+            "deadline": "2024-09-30",
+            "parental_task": None,
+            "executor": self.employee.pk,
+            "status": "open",
+            "owner": None,
+        }])
+
+    def test_export_employees_csv(self):
+        url = reverse("ttracker:export", args=("employees",))
+        response = self.client.get(url, {"output": "csv"})
+        rows = list(csv.reader(b"".join(response.streaming_content).decode("utf-8").splitlines()))
+        self.assertEqual(rows[0], ["id", "name", "position", "email", "phone_number", "vacation_status"])
+        self.assertEqual(rows[1][1], "Иванов Иван Иванович")
+        self.assertEqual(rows[1][4], "+79161234567")
+
+    def test_export_command(self):
+        out = StringIO()
+        call_command("export_data", "tasks", "--format", "csv", stdout=out)
+        rows = list(csv.reader(out.getvalue().splitlines()))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][1], "Задача, с запятой")
+
+
+class ValuesSerializerTestCase(TestCase):
+
+    def setUp(self):
+        self.employee = Employee.objects.create(
+            name="Иванов Иван Иванович",
+            email="ivanov@mail.ru",
+            phone_number="+79161234567",
+        )
+        Employee.objects.create(name="Петров Петр Петрович", email="petrov@mail.ru")
+        parent = Task.objects.create(title="Родитель", deadline="2024-09-30", executor=self.employee)
+        Task.objects.create(title="Подзадача", description="описание", deadline="2024-10-01", parental_task=parent)
+
+    def assertSameOutput(self, model_serializer, values_serializer):
+        queryset = model_serializer.Meta.model.objects.order_by("pk")
+        expected = JSONRenderer().render(model_serializer(queryset, many=True).data)
+        rows = values_serializer.values_queryset(queryset)
+        self.assertEqual(JSONRenderer().render(values_serializer(rows, many=True).data), expected)
+
+    def test_same_output_as_model_serializer(self):
+        self.assertSameOutput(TaskListSerializer, TaskValuesSerializer)
+        self.assertSameOutput(EmployeeSerializer, EmployeeValuesSerializer)
+
+    def test_phone_number_read_as_text(self):
+        """Номер читается строкой из БД, без разбора в PhoneNumber"""
+        row = EmployeeValuesSerializer.values_queryset(Employee.objects.filter(pk=self.employee.pk)).get()
+        self.assertIs(type(row["phone_number_text"]), str)
+        self.assertEqual(EmployeeValuesSerializer.convert_row(row)["phone_number"], "+79161234567")
+        self.assertEqual(EmployeeValuesSerializer.output_fields()[4], "phone_number")
+
+    def test_serializers_benchmark(self):
+        results = benchmarks.measure_serializers(rows=50, repeat=1)
+        self.assertEqual(results["tasks values"]["rows"], 2)
+        self.assertIn("speedup", results["employees values"])
+
+
+class SparseFieldsetTestCase(APITestCase):
+    """?fields= и ?exclude= сужают ответ и столбцы запроса"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(email="fields@mail.ru", password="fieldspass")
+        self.employee = Employee.objects.create(
+            name="Иванов Иван Иванович", email="ivanov@mail.ru", phone_number="+79161234567"
+        )
+        for number in range(3):
+            Task.objects.create(title=f"Отчет {number}", description="длинное описание", deadline="2024-09-30",
+                                executor=self.employee)
+        self.task = Task.objects.order_by("pk").first()
+        self.client.force_authenticate(user=self.user)
+
+    def get(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse([query["sql"] for query in queries if "description" in query["sql"]])
+        return response.json()
+
+    def test_task_list(self):
+        url = reverse("ttracker:task-list")
+        data = self.get(url, {"fields": "title,deadline"})
+        self.assertEqual(data["results"][0], {"title": "Отчет 0", "deadline": "2024-09-30"})
+        data = self.get(url, {"exclude": "description,parental_task,owner", "ordering": "-title"})
+        self.assertEqual(list(data["results"][0]), ["id", "title", "deadline", "status", "executor"])
+        self.assertEqual(data["results"][0]["title"], "Отчет 2")
+        # ключ курсора читается, но в ответ не попадает
+        data = self.get(url, {"fields": "title", "pagination": "cursor", "page_size": 2})
+        self.assertEqual(data["results"], [{"title": "Отчет 0"}, {"title": "Отчет 1"}])
+        self.assertEqual(self.get(data["next"])["results"], [{"title": "Отчет 2"}])
+
+    def test_task_detail_and_changes(self):
+        data = self.get(reverse("ttracker:task-detail", args=(self.task.pk,)), {"fields": "id,title,executor"})
+        self.assertEqual(data, {"id": self.task.pk, "title": "Отчет 0", "executor": self.employee.pk})
+        data = self.get(reverse("ttracker:task-changes"), {"since": 0, "fields": "id,status"})
+        self.assertEqual(data["changed"][0], {"id": self.task.pk, "status": "open"})
+
+    def test_employees_and_search(self):
+        data = self.get(reverse("ttracker:employee-list"), {"fields": "name,phone_number"})
+        self.assertEqual(data, [{"name": "Иванов Иван Иванович", "phone_number": "+79161234567"}])
+        data = self.get(reverse("ttracker:employee-detail", args=(self.employee.pk,)), {"exclude": "phone_number"})
+        self.assertNotIn("phone_number", data)
+        self.assertEqual(data["email"], "ivanov@mail.ru")
+        data = self.get(reverse("ttracker:search"), {"q": "отчет", "fields": "id,rank"})
+        self.assertEqual(set(data["results"][0]), {"id", "rank"})
+
+    def test_export(self):
+        response = self.client.get(reverse("ttracker:export", args=("tasks",)), {"output": "csv", "fields": "title,id"})
+        rows = list(csv.reader(b"".join(response.streaming_content).decode("utf-8").splitlines()))
+        self.assertEqual(rows[:2], [["id", "title"], [str(self.task.pk), "Отчет 0"]])
+
+    def test_unknown_fields(self):
+        response = self.client.get(reverse("ttracker:task-list"), {"fields": "title,secret"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("secret", response.json()["fields"][0])
+        response = self.client.get(reverse("ttracker:task-list"), {"fields": "title", "exclude": "title"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        with self.assertRaises(CommandError):
+            call_command("export_data", "tasks", "--fields", "secret", stdout=StringIO())
+
+    def test_write_ignores_fieldset(self):
+        url = reverse("ttracker:employee-detail", args=(self.employee.pk,))
+        response = self.client.patch(f"{url}?fields=name", {"name": "Иванов Петр Иванович"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["email"], "ivanov@mail.ru")
+
+
+class RenderingTestCase(APITestCase):
+    """orjson-рендерер совпадает с JSONRenderer, сжатие ответов по Accept-Encoding"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(email="gzip@mail.ru", password="gzippass")
+        Task.objects.bulk_create(
+            Task(title=f"Задача {number}", description="описание " * 5, deadline="2024-09-30") for number in range(50)
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_renderer_matches_drf(self):
+        data = {
+            "phone": PhoneNumber.from_string("+79161234567"),
+            "date": date(2024, 9, 30),
+            "time": datetime(2024, 9, 30, 12, 0, 0, 123456, tzinfo=timezone.utc),
+            "amount": Decimal("10.50"),
+            "text": "строка\u2028",
+            1: [None, True, 1.5],
+        }
+        expected = JSONRenderer().render({**data, "phone": "+79161234567"})
+        self.assertEqual(ORJSONRenderer().render(data), expected)
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+        self.assertIn(b"\n", ORJSONRenderer().render(data, "application/json; indent=2"))
+
+    def test_parser(self):
+        self.assertEqual(ORJSONParser().parse(BytesIO('{"title": "Задача"}'.encode())), {"title": "Задача"})
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(BytesIO(b'{"title": NaN}'))
+        response = self.client.post(
+            reverse("ttracker:task-create"), '{"title": "Новая", "deadline": "2024-10-01"}',
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response["Content-Type"], "application/json")
+
+    def test_task_list_compressed(self):
+        url = reverse("ttracker:task-list")
+        plain = self.client.get(url, {"page_size": 50})
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertEqual(plain["Vary"], "Accept, Accept-Encoding")
+
+        response = self.client.get(url, {"page_size": 50}, HTTP_ACCEPT_ENCODING="br, gzip;q=0.8")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertLess(len(response.content), len(plain.content))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        etag = response["ETag"]
+        self.assertEqual(etag, "W/" + plain["ETag"])
+        response = self.client.get(url, {"page_size": 50}, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # короткий ответ и отказ клиента (q=0) - без сжатия
+        response = self.client.get(url, {"page_size": 1}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertNotIn("Content-Encoding", response)
+        response = self.client.get(url, {"page_size": 50}, HTTP_ACCEPT_ENCODING="gzip;q=0")
+        self.assertNotIn("Content-Encoding", response)
+
+    def test_export_stream_compressed(self):
+        response = self.client.get(reverse("ttracker:export", args=("tasks",)), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        lines = gzip.decompress(b"".join(response.streaming_content)).decode("utf-8").splitlines()
+        self.assertEqual(len(lines), 50)
+        self.assertEqual(json.loads(lines[0])["title"], "Задача 0")
+
+    def test_global_compression(self):
+        url = reverse("ttracker:employee-list")
+        Employee.objects.bulk_create(Employee(name=f"Сотрудник {number}", email=f"e{number}@mail.ru")
+                                     for number in range(30))
+        self.assertNotIn("Content-Encoding", self.client.get(url, HTTP_ACCEPT_ENCODING="gzip"))
+        with override_settings(TTRACKER_COMPRESSION=True):
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))), 30)
+
+    def test_rendering_benchmark(self):
+        results = benchmarks.measure_rendering(rows=50, repeat=1)
+        self.assertEqual(results["task-list orjson"]["bytes"], results["task-list json"]["bytes"])
+        self.assertLess(results["export orjson"]["bytes"], results["export json"]["bytes"])
+
+
+class ImportTestCase(TestCase):
+
+    fixture = [
+        {"model": "ttracker.employee", "pk": 7, "fields": {
+            "name": "Иванов Иван Иванович", "position": "category 1",
+            "email": "ivanov@mail.ru", "phone_number": "+79161234567", "vacation_status": False}},
+        {"model": "ttracker.task", "pk": 11, "fields": {
+            "title": "Дочерняя задача", "deadline": "2024-09-30", "status": "in_progress",
+            "executor": 7, "parental_task": 12, "owner": None}},
+        {"model": "ttracker.task", "pk": 12, "fields": {
+            "title": "Родительская задача", "deadline": "2024-09-30", "status": "open",
+            "executor": 7, "parental_task": None, "owner": None}},
+    ]
+
+    def write_input(self, content, suffix, encoding="utf-8"):
+        f = tempfile.NamedTemporaryFile("w", suffix=suffix, encoding=encoding, delete=False)
+        with f:
+            f.write(content)
+        self.addCleanup(os.remove, f.name)
+        return f.name
+
+    def test_iter_json_array_across_chunks(self):
+        """Объекты, разорванные границей блока чтения, собираются целиком"""
+        stream = StringIO(json.dumps(self.fixture, ensure_ascii=False, indent=2))
+        self.assertEqual(list(iter_json_array(stream, read_size=7)), self.fixture)
+
+    def test_import_fixture(self):
+        """Ссылки переводятся в новые id, в том числе на задачи ниже по файлу"""
+        path = self.write_input(json.dumps(self.fixture, ensure_ascii=False), ".json", encoding="utf-16")
+        out = StringIO()
+        call_command("import_tasks", path, "--batch-size", "1", stdout=out)
+        self.assertIn("Imported 1 employees and 2 tasks", out.getvalue())
+
+        employee = Employee.objects.get()
+        child = Task.objects.get(title="Дочерняя задача")
+        self.assertEqual(child.executor, employee)
+        self.assertEqual(child.parental_task.title, "Родительская задача")
+        self.assertEqual(employee.active_task_count, 1)
+
+    def test_import_csv(self):
+        employee = Employee.objects.create(name="Сотрудник", email="employee@mail.ru")
+        path = self.write_input(
+            "id,title,description,deadline,parental_task,executor,status,owner\n"
+            f"1,Задача,,2024-09-30,,{employee.pk},open,\n"
+            "2,Подзадача,,2024-10-01,1,999,open,\n",
+            ".csv",
+        )
+        out = StringIO()
+        call_command("import_tasks", path, "--model", "tasks", stdout=out)
+        self.assertIn("1 references were not found", out.getvalue())
+        subtask = Task.objects.get(title="Подзадача")
+        self.assertIsNone(subtask.executor)
+        self.assertEqual(subtask.parental_task.executor, employee)
+        self.assertIsNone(subtask.description)
+
+    def test_import_error_rolls_back(self):
+        """Ошибка в середине файла откатывает уже записанные пакеты"""
+        path = self.write_input(
+            "id,title,description,deadline,parental_task,executor,status,owner\n"
+            "1,Первая,,2024-09-30,,,open,\n"
+            "2,Вторая,,2024-09-30,1,,open,\n"
+            "3,Третья,,не дата,1,,open,\n",
+            ".csv",
+        )
+        with self.assertRaises(CommandError):
+            call_command("import_tasks", path, "--model", "tasks", "--batch-size", "1", stdout=StringIO())
+        self.assertFalse(Task.objects.exists())
+
+    def test_import_skips_cycles(self):
+        """Родительские задачи, замыкающие цикл, не проставляются"""
+        path = self.write_input(
+            "id,title,description,deadline,parental_task,executor,status,owner\n"
+            "1,Первая,,2024-09-30,2,,open,\n"
+            "2,Вторая,,2024-09-30,1,,open,\n"
+            "3,Третья,,2024-09-30,1,,open,\n",
+            ".csv",
+        )
+        out = StringIO()
+        call_command("import_tasks", path, "--model", "tasks", stdout=out)
+        self.assertIn("2 parent references would form a cycle", out.getvalue())
+        self.assertEqual(
+            dict(Task.objects.values_list("title", "parental_task__title")),
+            {"Первая": None, "Вторая": None, "Третья": "Первая"},
+        )
+
+
+class DataGeneratorTestCase(TestCase):
+
+    def generate(self, **kwargs):
+        stream = StringIO()
+        DataGenerator(employees=20, tasks=300, chunk_size=100, **kwargs).write(stream, "ndjson")
+        return stream.getvalue()
+
+    def test_deterministic_output(self):
+        """Одинаковое зерно дает одинаковые данные при любом числе процессов"""
+        output = self.generate(seed=1)
+        self.assertEqual(output, self.generate(seed=1, workers=2))
+        self.assertNotEqual(output, self.generate(seed=2))
+
+        records = [json.loads(line) for line in output.splitlines()]
+        tasks = [record for record in records if record["model"] == "ttracker.task"]
+        self.assertEqual(len(tasks), 300)
+        self.assertTrue(any(task["fields"]["parental_task"] for task in tasks))
+
+    def test_json_fixture(self):
+        """Формат json совместим с loaddata"""
+        stream = StringIO()
+        DataGenerator(employees=2, tasks=3, seed=1).write(stream, "json")
+        records = json.loads(stream.getvalue())
+        self.assertEqual([record["model"] for record in records], ["ttracker.employee"] * 2 + ["ttracker.task"] * 3)
+
+    def test_insert_into_database(self):
+        Employee.objects.create(name="Сотрудник", email="existing@mail.ru")
+        with CaptureQueriesContext(connection) as queries:
+            created = DataGenerator(employees=10, tasks=200, seed=3, chunk_size=50).insert()
+        self.assertEqual(created, 210)
+        # счетчики пересчитываются одним запросом после всех блоков, а не в каждом блоке
+        updates = [query for query in queries.captured_queries if query["sql"].startswith('UPDATE "ttracker_employee"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(Task.objects.count(), 200)
+        self.assertTrue(Task.objects.filter(parental_task__parental_task__isnull=False).exists())
+        call_command("recount_active_tasks", "--check", stdout=StringIO())
+
+
+class BenchmarkTestCase(TestCase):
+
+    def test_all_routes_measured(self):
+        """Каждый маршрут отвечает ожидаемым кодом и попадает в результаты"""
+        results = benchmarks.run([50], repeat=1)
+        self.assertEqual(set(results["results"]["50"]), {route.name for route in benchmarks.ROUTES})
+        self.assertEqual(results["results"]["50"]["employee-active-tasks"]["queries"], 3)
+
+    def test_assignment_benchmark(self):
+        results = benchmarks.measure_assignment(tasks=300, employees=30, repeat=1)
+        self.assertEqual(set(results), {"greedy", "deadline", "optimal"})
+
+    def test_mode_dispatch(self):
+        """Флаг режима запускает только его замер, режимы взаимоисключающие"""
+        out = StringIO()
+        call_command("benchmark", "--assignment", "60", "6", "--repeat", "1", stdout=out)
+        self.assertEqual([line.split()[0] for line in out.getvalue().splitlines()], ["greedy", "deadline", "optimal"])
+        with self.assertRaises(CommandError):
+            call_command("benchmark", "--assignment", "60", "6", "--search")
+
+    def test_search_benchmark(self):
+        """Поиск через индекс находит то же, что и ILIKE, на сгенерированных данных"""
+        benchmarks.seed(300)
+        results = benchmarks.measure_search(repeat=1)
+        for entity, query, _, _ in benchmarks.SEARCH_CASES:
+            ilike = results[f"{entity} '{query}' ilike"]["found"]
+            self.assertGreater(ilike, 0)
+            self.assertEqual(results[f"{entity} '{query}' search"]["found"], ilike)
+
+    def test_compare_detects_regressions(self):
+        baseline = {"results": {"10000": {"task-list": {"p95_ms": 10.0, "queries": 2}}}}
+        current = {"results": {"10000": {"task-list": {"p95_ms": 11.0, "queries": 2}}}}
+        self.assertEqual(benchmarks.compare(current, baseline), [])
+        current["results"]["10000"]["task-list"] = {"p95_ms": 20.0, "queries": 3}
+        self.assertEqual(len(benchmarks.compare(current, baseline)), 2)
+
+
+class InstrumentationTestCase(QueryBudgetAssertionsMixin, APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(email="metrics@mail.ru", password="metricspass")
+        Task.objects.create(title="Задача", deadline="2024-09-30")
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("ttracker:task-list")
+
+    def test_server_timing_and_budget(self):
+        """Ответ содержит Server-Timing, число запросов укладывается в бюджет представления"""
+        response = self.client.get(self.url)
+        metrics = response.query_metrics
+        self.assertEqual(metrics.view_name, "TaskListAPIView")
+        self.assertEqual(metrics.queries, 3)
+        self.assertGreater(metrics.serializer_time, 0)
+        self.assertIn('desc="3 queries"', response["Server-Timing"])
+        self.assertWithinQueryBudget(response)
+
+    def test_task_destroy_budget(self):
+        """Удаление задачи в исполнении с подзадачей и предложением исполнителя укладывается в бюджет"""
+        employee = Employee.objects.create(name="Сотрудник", email="metrics.employee@mail.ru")
+        task = Task.objects.create(title="Родитель", deadline="2024-09-30", executor=employee,
+                                   status=Task.STATUS_IN_PROGRESS)
+        Task.objects.create(title="Подзадача", deadline="2024-09-30", parental_task=task)
+        AssignmentSuggestion.objects.create(strategy="greedy", position=0, task=task, employee=employee,
+                                            computed_at=datetime.now(timezone.utc))
+        with override_settings(TTRACKER_QUERY_BUDGET_ACTION="raise"):
+            response = self.client.delete(reverse("ttracker:task-delete", args=(task.pk,)))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(response.query_metrics.queries, 7)
+        self.assertWithinQueryBudget(response)
+
+    def test_budget_exceeded(self):
+        with mock.patch.object(TaskListAPIView, "query_budget", 1):
+            with self.assertLogs("ttracker.performance", "WARNING"):
+                self.client.get(self.url)
+            with override_settings(TTRACKER_QUERY_BUDGET_ACTION="raise"), self.assertRaises(QueryBudgetExceeded):
+                self.client.get(self.url, {"page_size": 2})
+
+
+    def test_serializer_class_unchanged(self):
+        """Учет времени сериализации не подменяет класс сериализатора"""
+        view = TaskListAPIView()
+        view.request = mock.Mock(query_metrics=RequestMetrics(), query_params={}, method="GET")
+        view.format_kwarg = None
+        self.assertIs(type(view.get_serializer()), view.get_serializer_class())
+
+    def test_log_skipped_when_info_disabled(self):
+        with mock.patch("ttracker.instrumentation.json.dumps") as dumps:
+            self.client.get(self.url)
+        dumps.assert_not_called()
+        with self.assertLogs("ttracker.performance", "INFO") as logs:
+            self.client.get(self.url)
+        self.assertIn('"view": "TaskListAPIView"', logs.output[0])
+
+    def test_counts_connection_opened_in_request(self):
+        """Запросы считаются и по соединению, которое поток открывает впервые"""
+        def view(request):
+            with connections["default"].cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return HttpResponse()
+
+        middleware = QueryMetricsMiddleware(view)
+        responses = []
+
+        def handle():
+            try:
+                responses.append(middleware(RequestFactory().get("/")))
+            finally:
+                connections.close_all()
+
+        thread = threading.Thread(target=handle)
+        thread.start()
+        thread.join()
+        self.assertEqual(responses[0].query_metrics.queries, 1)
+
+class ProductionSettingsTestCase(TestCase):
+
+    def test_requires_redis(self):
+        """Профиль продакшена не запускается с локальным кешем процесса"""
+        with mock.patch("config.settings.REDIS_URL", None), self.assertRaises(ImproperlyConfigured):
+            runpy.run_module("config.settings_production")
+        with mock.patch("config.settings.REDIS_URL", "redis://redis:6379/0"):
+            settings = runpy.run_module("config.settings_production")
+        self.assertEqual(settings["REDIS_URL"], "redis://redis:6379/0")
+
+class AsyncViewsTestCase(QueryBudgetAssertionsMixin, APITestCase):
+    """Асинхронные представления отдают те же ответы, что и синхронные"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(email="async@mail.ru", password="asyncpass")
+        self.employees = [
+            Employee.objects.create(name=f"Сотрудник {i}", email=f"async{i}@mail.ru") for i in range(3)
+        ]
+        for i in range(12):
+            Task.objects.create(title=f"Задача {i}", deadline=f"2024-09-{i + 1:02d}",
+                                executor=self.employees[i % 3], status=Task.STATUS_IN_PROGRESS)
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+    def test_same_responses(self):
+        task = Task.objects.order_by("pk").first()
+        cases = [
+            ("ttracker:task-list", "ttracker:async-task-list", (), {}),
+            ("ttracker:task-list", "ttracker:async-task-list", (), {"page": "last", "page_size": 5}),
+            ("ttracker:task-list", "ttracker:async-task-list", (), {"pagination": "cursor"}),
+            ("ttracker:task-detail", "ttracker:async-task-detail", (task.pk,), {}),
+            ("ttracker:task-detail", "ttracker:async-task-detail", (0,), {}),
+            ("ttracker:employee-active-tasks", "ttracker:async-employee-active-tasks", (), {"search": "1"}),
+        ]
+        for sync_name, async_name, args, params in cases:
+            with self.subTest(view=async_name, params=params):
+                expected = self.client.get(reverse(sync_name, args=args), params)
+                response = self.client.get(reverse(async_name, args=args), params)
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(response.content, expected.content.replace(b"/tasks/", b"/async/tasks/"))
+                self.assertEqual(response.query_metrics.queries, expected.query_metrics.queries)
+                self.assertWithinQueryBudget(response)
+                if expected.status_code == status.HTTP_200_OK:
+                    self.assertEqual(self.client.get(reverse(async_name, args=args), params)["X-Cache"], "HIT")
+
+    def test_authentication_required(self):
+        self.client.credentials()
+        response = self.client.get(reverse("ttracker:async-task-list"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer invalid")
+        response = self.client.get(reverse("ttracker:async-task-list"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_async_client(self):
+        """Запросы через ASGI-обработчик выполняются асинхронными запросами ORM"""
+        response = await self.async_client.get(
+            reverse("ttracker:async-employee-active-tasks"), headers={"Authorization": f"Bearer {self.token}"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data["count"], 3)
+        self.assertEqual(sorted(len(item["tasks"]) for item in data["results"]), [4, 4, 4])
+        self.assertEqual(response.query_metrics.queries, 4)
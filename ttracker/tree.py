@@ -0,0 +1,137 @@
+from django.db import connection
+
+from ttracker.models import Task
+
+# Ограничение глубины рекурсии: защищает от зацикливания на данных,
+# записанных в обход проверки циклов (например, загруженных фикстурой)
+MAX_DEPTH = 1000
+
+NODE_FIELDS = ("id", "title", "deadline", "parental_task", "executor", "status")
+
+SUBTREE_SQL = """
+WITH RECURSIVE subtree (id, depth) AS (
+    SELECT id, 0 FROM {table} WHERE id = %s
+    UNION ALL
+    SELECT child.id, subtree.depth + 1
+    FROM {table} child JOIN subtree ON child.parental_task_id = subtree.id
+    WHERE subtree.depth < %s
+)
+SELECT task.id, task.title, task.deadline, task.parental_task_id, task.executor_id, task.status, subtree.depth
+FROM subtree JOIN {table} task ON task.id = subtree.id
+ORDER BY subtree.depth, task.id
+"""
+
+ANCESTORS_SQL = """
+WITH RECURSIVE chain (id, depth) AS (
+    SELECT id, 0 FROM {table} WHERE id IN ({anchors})
+    UNION ALL
+    SELECT parent.parental_task_id, chain.depth + 1
+    FROM {table} parent JOIN chain ON parent.id = chain.id
+    WHERE parent.parental_task_id IS NOT NULL AND chain.depth < %s
+)
+SELECT task.id, task.title, task.deadline, task.parental_task_id, task.executor_id, task.status, chain.depth
+FROM chain JOIN {table} task ON task.id = chain.id
+ORDER BY chain.depth, task.id
+"""
+
+
+def _fetch(sql, params):
+    deadline = Task._meta.get_field("deadline")
+    table = connection.ops.quote_name(Task._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(sql.replace("{table}", table), params)
+        rows = cursor.fetchall()
+    # курсор отдает значения без преобразований Django (в SQLite дата - строка)
+    return [
+        dict(zip(NODE_FIELDS, row[:-1]), deadline=deadline.to_python(row[2]), depth=row[-1])
+        for row in rows
+    ]
+
+
+def empty_rollup():
+    return {"total": 0, **{value: 0 for value, _ in Task.STATUSES}}
+
+
+def subtree(pk, max_depth=MAX_DEPTH):
+    """Задача со всеми потомками до глубины max_depth одним запросом.
+
+    Возвращает вложенное дерево, у каждого узла rollup - число задач
+    его поддерева (включая сам узел) по статусам. None, если задачи нет.
+    """
+    rows = _fetch(SUBTREE_SQL, [pk, max_depth])
+    if not rows:
+        return None
+    nodes = {}
+    for row in rows:
+        if row["id"] in nodes:
+            # повтор возможен только при цикле в данных, узел уже добавлен на меньшей глубине
+            continue
+        row["children"] = []
+        row["rollup"] = empty_rollup()
+        nodes[row["id"]] = row
+    rows = list(nodes.values())
+    # строки упорядочены по глубине: потомки обходятся раньше предков
+    for row in reversed(rows):
+        rollup = row["rollup"]
+        rollup["total"] += 1
+        rollup[row["status"]] += 1
+        parent = nodes.get(row["parental_task"]) if row["depth"] else None
+        if parent is not None:
+            parent["children"].append(row)
+            for key, value in rollup.items():
+                parent["rollup"][key] += value
+    for row in rows:
+        row["children"].reverse()
+        del row["parental_task"], row["depth"]
+    return nodes[pk]
+
+
+def ancestors(pk, max_depth=MAX_DEPTH):
+    """Цепочка предков задачи от родителя к корню одним запросом.
+
+    depth - расстояние до задачи (1 у родителя). None, если задачи нет.
+    """
+    rows = _fetch(ANCESTORS_SQL.replace("{anchors}", "%s"), [pk, max_depth])
+    if not rows:
+        return None
+    chain, seen = [], {pk}
+    for row in rows[1:]:
+        if row["id"] in seen:
+            # данные уже содержат цикл
+            break
+        seen.add(row["id"])
+        del row["parental_task"]
+        chain.append(row)
+    return chain
+
+
+def parent_map(pks, max_depth=MAX_DEPTH):
+    """Родители задач pks и всех их предков: {id: parental_task_id}"""
+    pks = list(pks)
+    if not pks:
+        return {}
+    anchors = ", ".join(["%s"] * len(pks))
+    rows = _fetch(ANCESTORS_SQL.replace("{anchors}", anchors), pks + [max_depth])
+    return {row["id"]: row["parental_task"] for row in rows}
+
+
+def find_cycles(changes):
+    """Задачи, новая родительская задача которых замкнет цикл.
+
+    changes - {id задачи: id новой родительской задачи}. Изменения
+    проверяются совместно, поэтому находится и цикл между несколькими
+    задачами одного пакета. Предки загружаются одним запросом.
+    """
+    changes = {pk: parent for pk, parent in changes.items() if pk is not None and parent is not None}
+    parents = parent_map(set(changes.values()))
+    parents.update(changes)
+    cycles = set()
+    for pk, parent in changes.items():
+        seen = set()
+        while parent is not None and parent not in seen:
+            if parent == pk:
+                cycles.add(pk)
+                break
+            seen.add(parent)
+            parent = parents.get(parent)
+    return cycles
@@ -2,14 +2,24 @@ from django.urls import path, include
 from rest_framework.routers import SimpleRouter
 from ttracker.apps import TtrackerConfig
 from ttracker.views import (
+    AsyncEmployeeActiveTasksListAPIView,
+    AsyncTaskListAPIView,
+    AsyncTaskRetrieveAPIView,
     EmployeeAPIView,
     EmployeeActiveTasksListAPIView,
     TaskCreateAPIView,
+    TaskBulkAPIView,
+    TaskChangesAPIView,
     TaskListAPIView,
     TaskRetrieveAPIView,
+    TaskSubtreeAPIView,
+    TaskAncestorsAPIView,
     TaskUpdateAPIView,
     TaskDestroyAPIView,
     ImportantTasksAPIView,
+    TaskAnalysisAPIView,
+    ExportAPIView,
+    SearchAPIView,
 )
 app_name = TtrackerConfig.name
 
@@ -19,11 +29,23 @@ router.register(r'employees', EmployeeAPIView, basename='employee')
 custom_urlpatterns = [
     path('employees-active-tasks/', EmployeeActiveTasksListAPIView.as_view(), name='employee-active-tasks'),
     path('tasks/create/', TaskCreateAPIView.as_view(), name='task-create'),
+    path('tasks/bulk/', TaskBulkAPIView.as_view(), name='task-bulk'),
+    path('tasks/changes/', TaskChangesAPIView.as_view(), name='task-changes'),
     path('tasks/', TaskListAPIView.as_view(), name='task-list'),
     path('tasks/<int:pk>/', TaskRetrieveAPIView.as_view(), name='task-detail'),
+    path('tasks/<int:pk>/subtree/', TaskSubtreeAPIView.as_view(), name='task-subtree'),
+    path('tasks/<int:pk>/ancestors/', TaskAncestorsAPIView.as_view(), name='task-ancestors'),
     path('tasks/<int:pk>/update/', TaskUpdateAPIView.as_view(), name='task-update'),
     path('tasks/<int:pk>/delete/', TaskDestroyAPIView.as_view(), name='task-delete'),
+    path('tasks/analysis/', TaskAnalysisAPIView.as_view(), name='task-analysis'),
     path('tasks/important/', ImportantTasksAPIView.as_view(), name='important-tasks'),
+    path('export/<str:model>/', ExportAPIView.as_view(), name='export'),
+    path('search/', SearchAPIView.as_view(), name='search'),
+    # асинхронные варианты для ASGI-сервера (config.asgi)
+    path('async/employees-active-tasks/', AsyncEmployeeActiveTasksListAPIView.as_view(),
+         name='async-employee-active-tasks'),
+    path('async/tasks/', AsyncTaskListAPIView.as_view(), name='async-task-list'),
+    path('async/tasks/<int:pk>/', AsyncTaskRetrieveAPIView.as_view(), name='async-task-detail'),
 ]
 
 urlpatterns = router.urls + custom_urlpatterns
@@ -1,6 +1,10 @@
 import re
 from rest_framework.serializers import ValidationError
 
+from ttracker.tree import find_cycles
+
+CYCLE_ERROR = "Task hierarchy must not contain cycles."
+
 
 class TitleValidator:
 
@@ -10,7 +14,27 @@ class TitleValidator:
     def __call__(self, value):
         reg = re.compile("^[а-яА-Яa-zA-Z0-9\.\-\,\№]")
         val = dict(value).get(self.field)
+        if val is None:
+            # частичное изменение без названия
+            return
         if not bool(reg.match(val)):
             raise ValidationError(
                 f"{self.field} must contain only letters, digits, dots, hyphens, commas, and spaces."
             )
+
+
+class ParentCycleValidator:
+    """Родительская задача не может быть самой задачей или ее потомком"""
+
+    requires_context = True
+
+    def __init__(self, field):
+        self.field = field
+
+    def __call__(self, value, serializer):
+        instance = serializer.instance
+        parent = dict(value).get(self.field)
+        if instance is None or parent is None or parent.pk == instance.parental_task_id:
+            return
+        if find_cycles({instance.pk: parent.pk}):
+            raise ValidationError({self.field: [CYCLE_ERROR]})
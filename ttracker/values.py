@@ -0,0 +1,140 @@
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db import models
+from django.db.models.functions import Cast
+from django.utils.functional import cached_property
+from phonenumber_field import modelfields
+from phonenumber_field.serializerfields import PhoneNumberField
+from rest_framework import fields, relations
+
+
+def _date(value):
+    return value.isoformat()
+
+
+def _string(value):
+    return str(value)
+
+
+# Преобразования значений values() в значения ответа по точному типу поля
+# сериализатора, None - значение передается как есть. Для остальных полей
+# используется to_representation поля
+CONVERTERS = {
+    fields.IntegerField: None,
+    fields.BooleanField: None,
+    fields.FloatField: None,
+    fields.ChoiceField: None,
+    relations.PrimaryKeyRelatedField: None,
+    fields.CharField: _string,
+    fields.EmailField: _string,
+    fields.DateField: _date,
+    PhoneNumberField: _string,
+}
+# Поля моделей, из которых values() возвращает str: строковое поле
+# сериализатора передает значение как есть (PhoneNumberField модели - наследник
+# CharField, но возвращает PhoneNumber, поэтому сравнение по точному типу)
+STRING_MODEL_FIELDS = (models.CharField, models.TextField, models.EmailField)
+
+
+def _converter(field, model_field):
+    if isinstance(field, fields.CharField) and type(model_field) in STRING_MODEL_FIELDS:
+        return None
+    if type(field) in CONVERTERS:
+        return CONVERTERS[type(field)]
+    return field.to_representation
+
+
+def _raw_phone_numbers():
+    """Номер хранится в БД в формате PHONENUMBER_DB_FORMAT, а str(PhoneNumber) -
+    в PHONENUMBER_DEFAULT_FORMAT (некорректный номер - исходной строкой в обоих
+    случаях). При совпадении форматов строка из БД равна ответу и разбор
+    номера при чтении не нужен"""
+    return (getattr(settings, "PHONENUMBER_DB_FORMAT", "E164")
+            == getattr(settings, "PHONENUMBER_DEFAULT_FORMAT", "E164"))
+
+
+def get_model_field(model, source):
+    try:
+        return model._meta.get_field(source)
+    except FieldDoesNotExist:
+        return None
+
+
+class ValuesSerializerMixin:
+    """Быстрый вывод строк values() для сериализаторов только для чтения.
+
+    По полям сериализатора один раз для класса составляется план: ключ
+    ответа, столбец values() (внешний ключ - id, source через точку - путь
+    через __) и преобразование значения. Строка-словарь переводится в ответ
+    по плану без обхода полей DRF, результат совпадает с to_representation
+    для экземпляра модели. Поля, удаленные из fields экземпляра (fieldset),
+    исключаются из плана. Экземпляры моделей сериализуются как обычно.
+    """
+
+    @classmethod
+    def get_values_plan(cls):
+        if "_values_plan" not in cls.__dict__:
+            plan, expressions = [], {}
+            model = cls.Meta.model
+            for name, field in cls().fields.items():
+                if field.write_only:
+                    continue
+                if field.source == "*" or isinstance(field, (fields.SerializerMethodField, relations.ManyRelatedField)):
+                    raise ImproperlyConfigured(f"{cls.__name__}.{name} can not be read from values()")
+                model_field = get_model_field(model, field.source) if "." not in field.source else None
+                if isinstance(model_field, modelfields.PhoneNumberField) and _raw_phone_numbers():
+                    # строка из БД без преобразования в PhoneNumber
+                    column = f"{name}_text"
+                    expressions[column] = Cast(field.source, output_field=models.CharField())
+                    plan.append((name, column, None))
+                    continue
+                plan.append((name, field.source.replace(".", "__"), _converter(field, model_field)))
+            cls._values_plan = tuple(plan)
+            cls._values_expressions = expressions
+        return cls._values_plan
+
+    @classmethod
+    def output_fields(cls):
+        """Ключи строки ответа"""
+        return tuple(key for key, _, _ in cls.get_values_plan())
+
+    @classmethod
+    def values_queryset(cls, queryset, fieldset=None, columns=()):
+        """queryset.values() со столбцами плана: всех полей или полей fieldset,
+        columns - дополнительные столбцы, не попадающие в ответ"""
+        expressions = {}
+        fields_ = list(columns)
+        for key, column, _ in cls.get_values_plan():
+            if fieldset is not None and key not in fieldset:
+                continue
+            if column in cls._values_expressions:
+                expressions[column] = cls._values_expressions[column]
+            elif column not in fields_:
+                fields_.append(column)
+        return queryset.values(*fields_, **expressions)
+
+    @classmethod
+    def convert_row(cls, row, plan=None):
+        plan = cls.get_values_plan() if plan is None else plan
+        result = {}
+        for key, column, convert in plan:
+            value = row[column]
+            result[key] = value if convert is None or value is None else convert(value)
+        return result
+
+    @cached_property
+    def values_plan(self):
+        """План полей сериализатора (с учетом удаленных из fields)"""
+        return tuple(entry for entry in self.get_values_plan() if entry[0] in self.fields)
+
+    @cached_property
+    def _values_passthrough(self):
+        # строка values() уже имеет вид ответа: ключи совпадают, преобразований нет
+        return all(key == column and convert is None for key, column, convert in self.values_plan)
+
+    def to_representation(self, instance):
+        if isinstance(instance, dict):
+            if self._values_passthrough and len(instance) == len(self.values_plan):
+                return instance
+            return self.convert_row(instance, self.values_plan)
+        return super().to_representation(instance)
@@ -1,163 +1,483 @@
-from django.db.models import Count, Q
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.response import Response
 from rest_framework import viewsets, generics, status
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.filters import SearchFilter
-
-from ttracker.models import Employee, Task
-from ttracker.paginators import TaskListPagination
+from rest_framework.views import APIView
+
+from ttracker.assignment import STRATEGIES
+from ttracker.async_api import AsyncListMixin, AsyncRetrieveMixin
+from ttracker.bulk import NOT_FOUND, TaskBatch, TaskUpdateBatch
+from ttracker.cache import CachedResponseMixin
+from ttracker.changes import DEFAULT_LIMIT, MAX_LIMIT, changes_since
+from ttracker.compression import CompressedResponseMixin
+from ttracker.conditional import ConditionalGetMixin, ConditionalViewSetMixin
+from ttracker.exporters import EXPORTS, FORMATS, render
+from ttracker.fieldsets import SparseFieldsetMixin, parse_fieldset
+from ttracker.filters import TaskFilter
+from ttracker.graph import analyze
+from ttracker.instrumentation import InstrumentedViewMixin, QueryBudgetMixin
+from ttracker.models import AssignmentSuggestion, Employee, Task
+from ttracker.paginators import (
+    EmployeeActiveTasksPagination,
+    SearchPagination,
+    TaskKeysetPagination,
+    TaskListPagination,
+)
 from ttracker.serializer import (
     EmployeeSerializer,
+    EmployeeValuesSerializer,
     TaskCreateSerializer,
     TaskListSerializer,
     TaskSerializer,
+    TaskValuesSerializer,
     EmployeeActiveTasksSerializer,
-    ImportantTaskSerializer
+    EmployeeSearchSerializer,
+    TaskSearchSerializer,
+    AssignmentSuggestionSerializer
 )
+from ttracker.search import SEARCHES
+from ttracker.suggestions import compute_suggestions, suggestions_stale
+from ttracker.tasks import schedule_suggestions
+from ttracker.tree import MAX_DEPTH, ancestors, subtree
 
 
-class EmployeeAPIView(viewsets.ModelViewSet):
-    """CRUD сотрудников"""
+class EmployeeAPIView(InstrumentedViewMixin, SparseFieldsetMixin, ConditionalViewSetMixin, viewsets.ModelViewSet):
+    """CRUD сотрудников, список и просмотр сотрудника поддерживают ETag и Last-Modified
+    и выбор полей ответа (?fields=, ?exclude=)"""
     queryset = Employee.objects.all()
     serializer_class = EmployeeSerializer
+    # кешируются только валидаторы условного GET
+    cache_dependencies = ("employee",)
+    query_budget = 5
+
+    def get_queryset(self):
+        """Список читается строками values()"""
+        if self.action == "list":
+            return self.narrow_queryset(Employee.objects.order_by("id"))
+        return self.narrow_queryset(super().get_queryset())
 
+    def get_serializer_class(self):
+        if self.action == "list":
+            return EmployeeValuesSerializer
+        return super().get_serializer_class()
 
-class EmployeeActiveTasksListAPIView(generics.ListAPIView):
+
+class EmployeeActiveTasksListAPIView(InstrumentedViewMixin, CachedResponseMixin, generics.ListAPIView):
     """Контроллер вывода сотрудников по степени занятости"""
-    queryset = Employee.objects.all()
+    cache_dependencies = ("task", "employee")
     serializer_class = EmployeeActiveTasksSerializer
+    pagination_class = EmployeeActiveTasksPagination
     filter_backends = [SearchFilter]
     search_fields = ["name",]
+    query_budget = 4
 
     def get_queryset(self):
-        self.queryset = Employee.objects.all()
-        self.queryset = self.queryset.select_related()
-        self.queryset = Employee.objects.annotate(tasks_count=Count("task")).order_by(
-            "-tasks_count"
-        )
-        return self.queryset
+        """Сотрудники сортируются по поддерживаемому счетчику задач в исполнении,
+        названия задач подгружаются одним дополнительным запросом"""
+        active_tasks = Task.objects.filter(
+            status=Task.STATUS_IN_PROGRESS
+        ).only("title", "executor").order_by("id")
+        return Employee.objects.prefetch_related(
+            Prefetch("task_set", queryset=active_tasks, to_attr="active_tasks")
+        ).order_by("-active_task_count", "id")
+
 
+class AsyncEmployeeActiveTasksListAPIView(AsyncListMixin, EmployeeActiveTasksListAPIView):
+    """Асинхронный вариант вывода сотрудников по степени занятости (для ASGI-сервера)"""
 
-class TaskCreateAPIView(generics.CreateAPIView):
+
+class TaskCreateAPIView(InstrumentedViewMixin, generics.CreateAPIView):
     """создание задачи"""
 
     queryset = Task.objects.all()
     serializer_class = TaskCreateSerializer
+    query_budget = 4
 
     def perform_create(self, serializer):
-        task = serializer.save()
-        task.owner = self.request.user
-        task.save()
+        serializer.save(owner=self.request.user)
+
 
+class TaskBulkAPIView(InstrumentedViewMixin, generics.GenericAPIView):
+    """Пакетное создание (POST), изменение (PATCH) и удаление (DELETE) задач.
 
-class TaskListAPIView(generics.ListAPIView):
-    """показывает все созданные задачи сотрудников по 5 страниц"""
+    POST и PATCH принимают массив задач, DELETE - массив id.
+    Ошибки возвращаются по каждому элементу, корректные элементы сохраняются
+    в одной транзакции. С параметром atomic=true любая ошибка отменяет весь пакет"""
 
     queryset = Task.objects.all()
     serializer_class = TaskListSerializer
+    max_batch_size = 5000
+    write_batch_size = 500
+    query_budget = 8
+
+    def get_query_budget(self):
+        """Запись идет порциями по write_batch_size, бюджет растет с числом порций"""
+        items = self.request.data
+        batches = -(-len(items) // self.write_batch_size) if isinstance(items, list) else 0
+        return self.query_budget + 2 * batches
+
+    def get_items(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({"detail": "Expected a list of items."})
+        if len(items) > self.max_batch_size:
+            raise ValidationError({"detail": f"Batch size must not exceed {self.max_batch_size} items."})
+        return items
+
+    def is_atomic(self, request):
+        return request.query_params.get("atomic", "").lower() in ("1", "true")
+
+    def batch_response(self, request, errors, key, result):
+        """Код ответа: 400 если ничего не записано из-за ошибок, 207 при частичном успехе"""
+        if not errors:
+            response_status = status.HTTP_200_OK if request.method != "POST" else status.HTTP_201_CREATED
+        elif result:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({key: result, "errors": errors}, status=response_status)
+
+    def post(self, request, *args, **kwargs):
+        batch = TaskBatch(self.get_items(request))
+        if not batch.validate() and self.is_atomic(request):
+            return self.batch_response(request, batch.errors, "created", [])
+
+        tasks = [
+            Task(owner=request.user, **TaskBatch.to_model_fields(data))
+            for _, data in batch.valid
+        ]
+        tasks = Task.objects.bulk_create(tasks, batch_size=self.write_batch_size)
+        # массовая запись не отправляет сигналы моделей
+        schedule_suggestions()
+        return self.batch_response(request, batch.errors, "created", self.get_serializer(tasks, many=True).data)
+
+    def patch(self, request, *args, **kwargs):
+        batch = TaskUpdateBatch(self.get_items(request))
+        if not batch.validate() and self.is_atomic(request):
+            return self.batch_response(request, batch.errors, "updated", [])
+
+        tasks, fields = [], set()
+        for _, data in batch.valid:
+            task = batch.tasks[data["id"]]
+            for field, value in TaskBatch.to_model_fields(data).items():
+                setattr(task, field, value)
+                fields.add(field)
+            tasks.append(task)
+        if tasks and fields:
+            with transaction.atomic():
+                Task.objects.bulk_update(tasks, fields, batch_size=self.write_batch_size)
+            schedule_suggestions()
+        return self.batch_response(request, batch.errors, "updated", self.get_serializer(tasks, many=True).data)
+
+    def delete(self, request, *args, **kwargs):
+        ids = self.get_items(request)
+        # type, а не isinstance: bool - подкласс int, и true не должно удалять задачу 1
+        errors = [
+            {"index": index, "errors": {"id": ["A valid integer is required."]}}
+            for index, pk in enumerate(ids)
+            if type(pk) is not int
+        ]
+        ids = [pk for pk in ids if type(pk) is int]
+        existing = set(Task.objects.filter(pk__in=ids).values_list("pk", flat=True))
+        errors += [
+            {"index": index, "errors": {"id": [NOT_FOUND]}}
+            for index, pk in enumerate(request.data)
+            if type(pk) is int and pk not in existing
+        ]
+        errors.sort(key=lambda error: error["index"])
+        if errors and self.is_atomic(request):
+            return self.batch_response(request, errors, "deleted", [])
+
+        Task.objects.filter(pk__in=existing).delete()
+        return self.batch_response(request, errors, "deleted", sorted(existing))
+
+
+class TaskListAPIView(InstrumentedViewMixin, SparseFieldsetMixin, CompressedResponseMixin, ConditionalGetMixin,
+                      CachedResponseMixin, generics.ListAPIView):
+    """показывает все созданные задачи сотрудников по 5 на странице,
+    размер страницы задается параметром page_size (не более 100).
+    С параметром pagination=cursor выдача идет по ключу (deadline, id) без подсчета общего количества.
+    Фильтры status, executor, owner, deadline_after, deadline_before, has_parent и сортировка
+    ordering (id, deadline, title, updated_at) описаны в TaskFilter. Задачи читаются строками values(),
+    ?fields= и ?exclude= выбирают поля ответа и читаемые столбцы"""
+
+    queryset = Task.objects.all()
+    serializer_class = TaskValuesSerializer
     pagination_class = TaskListPagination
+    keyset_pagination_class = TaskKeysetPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = TaskFilter
+    cache_dependencies = ("task",)
+    query_budget = 4
+
+    def get_queryset(self):
+        return self.narrow_queryset(Task.objects.order_by('id'))
+
+    def get_values_columns(self):
+        """Ключ курсора читается и без полей id и deadline в ответе"""
+        if isinstance(self.paginator, TaskKeysetPagination):
+            return ('id', 'deadline')
+        return ()
+
+    def filter_queryset(self, queryset):
+        if isinstance(self.paginator, TaskKeysetPagination) and 'ordering' in self.request.query_params:
+            raise ValidationError({"ordering": ["Ordering is not supported with cursor pagination."]})
+        return super().filter_queryset(queryset)
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if 'cursor' in params or params.get('pagination') == 'cursor':
+                self._paginator = self.keyset_pagination_class()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+
+class TaskRetrieveAPIView(InstrumentedViewMixin, SparseFieldsetMixin, ConditionalGetMixin, CachedResponseMixin,
+                          generics.RetrieveAPIView):
+    """детальный просмотр задачи, ?fields= и ?exclude= выбирают поля ответа"""
+
+    queryset = Task.objects.all()
+    serializer_class = TaskListSerializer
+    query_budget = 3
+
+    def get_queryset(self):
+        return self.narrow_queryset(super().get_queryset())
+
+    def get_cache_dependencies(self):
+        return ("task:bulk", f"task:{self.kwargs['pk']}")
+
+
+class AsyncTaskListAPIView(AsyncListMixin, TaskListAPIView):
+    """Асинхронный вариант списка задач (для ASGI-сервера)"""
+
 
+class AsyncTaskRetrieveAPIView(AsyncRetrieveMixin, TaskRetrieveAPIView):
+    """Асинхронный вариант детального просмотра задачи (для ASGI-сервера)"""
 
-class TaskRetrieveAPIView(generics.RetrieveAPIView):
-    """детальный просмотр задачи"""
+
+class TaskChangesAPIView(InstrumentedViewMixin, SparseFieldsetMixin, CompressedResponseMixin, CachedResponseMixin,
+                         generics.ListAPIView):
+    """Дельта-синхронизация: задачи, созданные, измененные и удаленные после курсора.
+
+    Клиент передает курсор из предыдущего ответа (?since=, 0 - полная
+    синхронизация) и повторяет запрос, пока has_more истинно. Размер ответа
+    задается ?limit= (записей журнала, не более MAX_LIMIT). Подзадачи
+    удаленной задачи приходят в changed со сброшенным parental_task.
+    ?fields= и ?exclude= выбирают поля задач changed."""
 
     queryset = Task.objects.all()
     serializer_class = TaskListSerializer
+    pagination_class = None
+    cache_dependencies = ("task",)
+    # журнал и задачи; в PostgreSQL еще блокировка журнала (см. changes_since)
+    query_budget = 4
+
+    def get_int_param(self, name, default):
+        value = self.request.query_params.get(name)
+        if value is None:
+            return default
+        if not value.isdigit():
+            raise ValidationError({name: ["A valid non-negative integer is required."]})
+        return int(value)
+
+    def get_queryset(self):
+        return self.narrow_queryset(super().get_queryset())
+
+    def list(self, request, *args, **kwargs):
+        since = self.get_int_param("since", 0)
+        limit = min(self.get_int_param("limit", DEFAULT_LIMIT), MAX_LIMIT) or DEFAULT_LIMIT
+        result = changes_since(since, limit, queryset=self.get_queryset())
+        result["changed"] = self.get_serializer(result["changed"], many=True).data
+        return Response(result)
+
 
+class TaskTreeAPIView(APIView):
+    """Базовый класс обхода иерархии задач рекурсивным запросом"""
 
-class TaskUpdateAPIView(generics.UpdateAPIView):
+    cache_dependencies = ("task",)
+    query_budget = 2
+
+    def get_max_depth(self):
+        depth = self.request.query_params.get("depth")
+        if depth is None:
+            return MAX_DEPTH
+        if not depth.isdigit():
+            raise ValidationError({"depth": ["A valid non-negative integer is required."]})
+        return min(int(depth), MAX_DEPTH)
+
+    def get(self, request, pk):
+        data = self.get_tree(pk, self.get_max_depth())
+        if data is None:
+            raise NotFound()
+        return Response(data)
+
+
+class TaskSubtreeAPIView(QueryBudgetMixin, CachedResponseMixin, TaskTreeAPIView):
+    """Задача со всеми подзадачами в виде дерева, у каждого узла rollup -
+    количество задач его поддерева по статусам. Глубина ограничивается параметром depth"""
+
+    def get_tree(self, pk, max_depth):
+        return subtree(pk, max_depth=max_depth)
+
+
+class TaskAncestorsAPIView(QueryBudgetMixin, CachedResponseMixin, TaskTreeAPIView):
+    """Цепочка родительских задач от непосредственного родителя до корня"""
+
+    def get_tree(self, pk, max_depth):
+        chain = ancestors(pk, max_depth=max_depth)
+        return None if chain is None else {"id": pk, "ancestors": chain}
+
+
+class TaskGraphView(APIView):
+    """Анализ графа подчинения задач, количество элементов задается параметром limit (не более 100)"""
+
+    max_limit = 100
+
+    def get(self, request):
+        limit = request.query_params.get("limit", "10")
+        if not limit.isdigit() or not 0 < int(limit) <= self.max_limit:
+            raise ValidationError({"limit": [f"A valid integer from 1 to {self.max_limit} is required."]})
+        return Response(analyze(int(limit)))
+
+
+class TaskAnalysisAPIView(QueryBudgetMixin, CachedResponseMixin, TaskGraphView):
+    """Открытые задачи, от которых зависит больше всего незавершенных задач
+    (blockers), и самые длинные цепочки незавершенных задач с ближайшим
+    сроком на цепочке (critical_chains). Граф задач хранится в памяти
+    процесса и обновляется по журналу изменений"""
+
+    cache_dependencies = ("task",)
+    query_budget = 3
+
+
+class TaskUpdateAPIView(InstrumentedViewMixin, generics.UpdateAPIView):
     """редактирование задачи"""
 
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
+    query_budget = 6
 
 
-class TaskDestroyAPIView(generics.DestroyAPIView):
+class TaskDestroyAPIView(InstrumentedViewMixin, generics.DestroyAPIView):
     """удаление задачи"""
 
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
+    # выборка задачи, каскад предложений исполнителей, журнал и сброс ссылки
+    # подзадач (INSERT ... SELECT и UPDATE), удаление, счетчик исполнителя, надгробие
+    query_budget = 7
+
+
+class ExportAPIView(QueryBudgetMixin, CompressedResponseMixin, APIView):
+    """Потоковая выгрузка задач или сотрудников, формат задается параметром output (ndjson или csv),
+    ?fields= и ?exclude= выбирают выгружаемые поля"""
+
+    query_budget = 1
+
+    def get(self, request, model):
+        if model not in EXPORTS:
+            raise NotFound()
+        output_format = request.query_params.get("output", "ndjson")
+        if output_format not in FORMATS:
+            raise ValidationError({"output": [f"Choose one of: {', '.join(FORMATS)}."]})
+        fieldset = parse_fieldset(request.query_params, EXPORTS[model].output_fields())
+        response = StreamingHttpResponse(
+            render(model, output_format, fieldset=fieldset),
+            content_type=f"{FORMATS[output_format]}; charset=utf-8",
+        )
+        response["Content-Disposition"] = f'attachment; filename="{model}.{output_format}"'
+        return response
+
+
+class SearchAPIView(InstrumentedViewMixin, SparseFieldsetMixin, CachedResponseMixin, generics.ListAPIView):
+    """Поиск задач по названию и описанию (?type=tasks, по умолчанию) или
+    сотрудников по ФИО (?type=employees), строка поиска - параметр q.
+    Результаты упорядочены по рангу совпадения и выводятся постранично,
+    ?fields= и ?exclude= выбирают поля ответа"""
+
+    pagination_class = SearchPagination
+    serializer_classes = {
+        "tasks": TaskSearchSerializer,
+        "employees": EmployeeSearchSerializer,
+    }
+    query_budget = 3
+
+    def get_search_type(self):
+        search_type = self.request.query_params.get("type", "tasks")
+        if search_type not in SEARCHES:
+            raise ValidationError({"type": [f"Choose one of: {', '.join(SEARCHES)}."]})
+        return search_type
 
+    def get_search_query(self):
+        query = self.request.query_params.get("q", "").strip()
+        if not query:
+            raise ValidationError({"q": ["This field is required."]})
+        return query
 
-class ImportantTasksAPIView(generics.ListAPIView):
-    serializer_class = ImportantTaskSerializer
+    def get_cache_dependencies(self):
+        return ("task",) if self.get_search_type() == "tasks" else ("employee",)
+
+    def get_serializer_class(self):
+        return self.serializer_classes[self.get_search_type()]
 
     def get_queryset(self):
-        """Получает важные задачи, которые не взяты в работу,
-        но от которых зависят другие задачи"""
-        return Task.objects.filter(
-            status=Task.STATUS_OPEN,
-            parental_task__status=Task.STATUS_IN_PROGRESS
-        ).select_related('parental_task').order_by('deadline')
+        return self.narrow_queryset(SEARCHES[self.get_search_type()](self.get_search_query()))
 
-    def list(self, request, *args, **kwargs):
-        """Получает список важных задач и исполнителей """
-        important_tasks = self.get_queryset()
-
-        if not important_tasks.exists():
-            return Response(
-                {"detail": "No important tasks found."},
-                status=status.HTTP_404_NOT_FOUND
-            )
-
-        # Получаем сотрудников, не находящихся в отпуске, с подсчетом их активных задач
-        employees_with_task_count = Employee.objects.filter(
-            vacation_status=False
-        ).annotate(
-            task_count=Count('task', filter=Q(task__status=Task.STATUS_IN_PROGRESS))
-        ).order_by('task_count')
-
-        if not employees_with_task_count.exists():
-            return Response(
-                {"detail": "No available employees found."},
-                status=status.HTTP_404_NOT_FOUND
-            )
-
-        # Преобразуем список сотрудников в итератор для циклического распределения
-        employees_list = list(employees_with_task_count)
-        least_loaded_employee = employees_list[0]
-        employee_index = 0  # Начальный индекс для распределения задач
-
-        task_employee_mapping = []
-
-        for task in important_tasks:
-            parent_task = task.parental_task
-            assigned_employee = None
-
-            if parent_task and parent_task.executor:
-                parent_executor = parent_task.executor
-
-                # Проверяем загруженность исполнителя родительской задачи
-                if parent_executor.task_set.filter(status=Task.STATUS_IN_PROGRESS).count() <= least_loaded_employee.task_count + 2:
-                    assigned_employee = parent_executor
-
-            # Если родительский сотрудник не подходит, назначаем наименее загруженного
-            if not assigned_employee:
-                if employee_index >= len(employees_list):
-                    employee_index = 0  # Перезапускаем индекс, если все сотрудники использованы
-                assigned_employee = employees_list[employee_index]
-                employee_index += 1
-
-            # Добавляем задачу и сотрудника в список
-            task_employee_mapping.append({
-                "task": task,
-                "employee": assigned_employee
-            })
-
-        # Сериализация данных с передачей выбранного исполнителя для каждой задачи через контекст
-        serializer = self.get_serializer(
-            [task["task"] for task in task_employee_mapping],
-            many=True,
-            context={'employees': [task["employee"] for task in task_employee_mapping]}
-        )
 
-        # Формируем финальный результат с назначенным исполнителем
-        result = []
-        for i, data in enumerate(serializer.data):
-            data['executor'] = task_employee_mapping[i]["employee"].name
-            result.append(data)
+class ImportantTasksAPIView(InstrumentedViewMixin, CachedResponseMixin, generics.ListAPIView):
+    """Важные задачи с предложенными исполнителями.
 
-        return Response(result, status=status.HTTP_200_OK)
+    Исполнители рассчитываются фоновой задачей compute_assignment_suggestions
+    (периодически и после изменения задач и сотрудников), представление
+    читает готовый результат одним запросом по индексу. Расчет в запросе
+    выполняется, только если для стратегии еще нет сохраненных предложений
+    или они устарели (фоновый пересчет не выполняется, см. suggestions_stale)."""
 
+    serializer_class = AssignmentSuggestionSerializer
+    cache_dependencies = ("suggestion",)
+    # 1 запрос при готовых предложениях, расчет в запросе добавляет 4
+    query_budget = 5
 
+    def get_strategy(self):
+        """Стратегия распределения из параметра strategy:
+        greedy (по умолчанию), deadline или optimal"""
+        strategy = self.request.query_params.get("strategy", "greedy")
+        if strategy not in STRATEGIES:
+            raise ValidationError({"strategy": [f"Choose one of: {', '.join(STRATEGIES)}."]})
+        return strategy
 
+    def get_queryset(self):
+        return AssignmentSuggestion.objects.filter(
+            strategy=self.get_strategy()
+        ).select_related('task', 'employee').only(
+            'computed_at', 'task__title', 'task__deadline', 'employee__name'
+        ).order_by('position')
 
+    def list(self, request, *args, **kwargs):
+        """Получает список важных задач и исполнителей """
+        suggestions = list(self.get_queryset())
+
+        if not suggestions or suggestions_stale(suggestions[0].computed_at):
+            strategy = self.get_strategy()
+            result = compute_suggestions([strategy])
+            if not result["tasks"]:
+                return Response(
+                    {"detail": "No important tasks found."},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            if not result["available"]:
+                return Response(
+                    {"detail": "No available employees found."},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            suggestions = result["suggestions"][strategy]
+
+        serializer = self.get_serializer(suggestions, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)